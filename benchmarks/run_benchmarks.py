@@ -0,0 +1,200 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Benchmarks
+#
+# Purpose: Time each stage of the ranking pipeline on synthetic catalogs
+#          and write the results as JSON
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+
+# Benchmark the exorank package of this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import exorank
+from exorank import column_read, parm_metrix, ranking_mult, rank_table, rank_table_save, stream_rank, native_column, peak_rss_mb
+from exorank.pipeline import load_columns
+from synthetic import synthetic_extensions, write_catalog
+# ------------------------------------------------------------- #
+
+
+# Benchmark Settings
+# ------------------------------------------------------------- #
+# Ranking columns, their types and scalings, used for every catalog
+bench_options = ['pwd', 'gmag', 'plx', 'teff', 'pm']
+bench_types = ['pwd', 'mag', 'plx', 'teff', 'pm']
+bench_scalings = [1.0, 0.5, 0.5, 0.2, 0.3]
+
+# Rows in each of the true positive and true negative control tables
+control_rows = 1000
+# ------------------------------------------------------------- #
+
+
+
+# Timing Functions
+# ------------------------------------------------------------- #
+@contextlib.contextmanager
+def timed_stage(results, stage, n_rows, trace=True):
+    # Time one stage, and track its peak Python/numpy allocations with tracemalloc
+    if trace:
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+    seconds = time.perf_counter() - start
+    result = {
+        'stage': stage,
+        'rows': n_rows,
+        'seconds': seconds,
+        'rows_per_s': n_rows / seconds if seconds > 0 else None,
+        'peak_mb': (tracemalloc.get_traced_memory()[1] - start_memory) / 1024**2 if trace else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    results.append(result)
+
+def bench_catalog(file, filetype, n_rows, controls, chunk_size, stream=False, trace=True):
+    # Run the pipeline stage by stage on one catalog, the same way exorank.rank_file does
+    results = []
+    with timed_stage(results, 'read', n_rows, trace):
+        table = load_columns(file, filetype, ['RA', 'DEC'] + bench_options, table_cache=False)
+        ra_list = native_column(table['RA'])
+        dec_list = native_column(table['DEC'])
+    with timed_stage(results, 'transform', n_rows, trace):
+        column_space = column_read(table, bench_options, bench_types)
+        parameter_matrix = parm_metrix(column_space, bench_types)
+    with timed_stage(results, 'score', n_rows, trace):
+        ranked_list = ranking_mult(parameter_matrix, bench_scalings)
+    with timed_stage(results, 'rank', n_rows, trace):
+        ranked_table = rank_table(None, ranked_list, ra_list, dec_list, bench_options, column_space)
+    del table, column_space, parameter_matrix, ranked_list
+
+    # Subject sets go to a scratch directory that is removed afterwards
+    output_dir = tempfile.mkdtemp(prefix='exorank_bench_')
+    try:
+        with timed_stage(results, 'save', n_rows, trace):
+            rank_table_save(ranked_table, controls[0], 'bench', chunk_size, 0.05, 0.05, controls[1], output_dir=output_dir)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    del ranked_table
+
+    # Optionally time the whole chunked scoring path as one stage
+    if stream:
+        with timed_stage(results, 'stream', n_rows, trace):
+            stream_rank(file, filetype, bench_options, bench_types, bench_scalings)
+    return results
+# ------------------------------------------------------------- #
+
+
+
+# Result Functions
+# ------------------------------------------------------------- #
+def git_commit():
+    # Commit of this checkout, so results can be matched to the code they measured
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    # Machine and library versions the benchmark ran with
+    return {
+        'exorank': exorank.__version__,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def compare_results(results, baseline):
+    # Print the speedup of every stage against an earlier results file
+    old = {(r['filetype'], r['rows'], r['stage']): r['seconds'] for r in baseline['results']}
+    print(f"{'type':>6} {'rows':>10} {'stage':>10} {'old s':>10} {'new s':>10} {'speedup':>8}")
+    for r in results:
+        key = (r['filetype'], r['rows'], r['stage'])
+        if key in old:
+            print(f"{r['filetype']:>6} {r['rows']:>10} {r['stage']:>10} {old[key]:>10.4f} {r['seconds']:>10.4f} {old[key] / r['seconds']:>7.2f}x")
+
+def print_header():
+    print(f"{'type':>6} {'rows':>10} {'stage':>10} {'seconds':>10} {'rows/s':>12} {'peak MB':>9}")
+
+def print_results(results):
+    for r in results:
+        peak = '' if r['peak_mb'] is None else f"{r['peak_mb']:.1f}"
+        print(f"{r['filetype']:>6} {r['rows']:>10} {r['stage']:>10} {r['seconds']:>10.4f} {r['rows_per_s']:>12.0f} {peak:>9}")
+# ------------------------------------------------------------- #
+
+
+
+# Command Line
+# ------------------------------------------------------------- #
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark the ExoRANK pipeline on synthetic catalogs.')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5, 1e6], help='catalog sizes in rows, e.g. 1e4 1e6 1e8')
+    parser.add_argument('--types', nargs='+', default=list(synthetic_extensions), choices=list(synthetic_extensions), help='file types to benchmark')
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'), help='where synthetic catalogs are written and reused')
+    parser.add_argument('--output', default='bench_results.json', help='JSON results file')
+    parser.add_argument('--compare', help='earlier JSON results file to compare against')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic catalog seed')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='subject set size for the save stage')
+    parser.add_argument('--stream', action='store_true', help='also time the streaming scorer')
+    parser.add_argument('--no-tracemalloc', action='store_true', help='skip per-stage memory tracking, which slows allocation-heavy stages')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    trace = not args.no_tracemalloc
+    if trace:
+        tracemalloc.start()
+
+    # The control tables are the same small catalog for every run
+    control_file = os.path.join(args.data_dir, f'controls_{control_rows}_{args.seed}.csv')
+    if not os.path.exists(control_file):
+        write_catalog(control_file, 'CSV', control_rows, seed=args.seed + 1)
+    controls = (pd.read_csv(control_file), pd.read_csv(control_file))
+
+    results = []
+    print_header()
+    for filetype in args.types:
+        for n_rows in [int(size) for size in args.sizes]:
+            # Catalogs are reused between runs, since writing the large ones takes a while
+            file = os.path.join(args.data_dir, f'synthetic_{n_rows}_{args.seed}{synthetic_extensions[filetype]}')
+            if not os.path.exists(file):
+                start = time.perf_counter()
+                write_catalog(file, filetype, n_rows, seed=args.seed)
+                print(f'#   Wrote {file} in {time.perf_counter() - start:.1f} s')
+            for result in bench_catalog(file, filetype, n_rows, controls, args.chunk_size, stream=args.stream, trace=trace):
+                results.append(dict(result, filetype=filetype, file_bytes=os.path.getsize(file)))
+                print_results(results[-1:])
+
+    # Write the machine-readable results
+    with open(args.output, 'w') as output:
+        json.dump({'environment': environment(), 'options': vars(args), 'results': results}, output, indent=1)
+    print(f'#   Wrote {len(results)} results to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare_results(results, json.load(baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+# ------------------------------------------------------------- #
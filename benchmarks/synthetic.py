@@ -0,0 +1,149 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Synthetic Catalogs
+#
+# Purpose: Write realistic fake ranking catalogs (RA/DEC, parallax, proper
+#          motion, magnitude, Teff, white dwarf probability) for benchmarks
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from astropy.io import fits
+# ------------------------------------------------------------- #
+
+
+# Synthetic Catalog Settings
+# ------------------------------------------------------------- #
+# Columns of every synthetic catalog, in file order
+synthetic_columns = ['RA', 'DEC', 'pwd', 'gmag', 'plx', 'distance', 'teff', 'pm']
+
+# Extension used for each file type
+synthetic_extensions = {'CSV': '.csv', 'FITS': '.fits', 'ASCII': '.txt', 'IPAC': '.tbl'}
+
+# Fraction of missing (NaN) and zero values put into the measured columns
+missing_fraction = 0.03
+zero_fraction = 0.005
+
+# Width of one IPAC column, between the | separators
+ipac_width = 22
+# ------------------------------------------------------------- #
+
+
+
+# Catalog Generation Functions
+# ------------------------------------------------------------- #
+def generate_chunk(n, seed, chunk_index=0):
+    # Every chunk has its own generator, so a catalog is the same however it is chunked
+    rng = np.random.default_rng([seed, chunk_index])
+
+    # Positions uniform on the sky
+    ra = rng.uniform(0, 360, n)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+
+    # Volume-limited distances out to 200 pc, with noisy parallaxes (some negative)
+    distance = 200 * rng.uniform(0, 1, n)**(1/3) + 1
+    plx = 1000 / distance + rng.normal(0, 0.5, n)
+
+    # Proper motions from ~40 km/s tangential velocities, in mas/yr
+    pm = np.abs(1000 * rng.normal(0, 40, n) / (4.74 * distance))
+
+    # Apparent magnitudes of faint, mostly degenerate stars
+    gmag = rng.normal(12, 2, n) + 5 * np.log10(distance / 10)
+
+    # Effective temperatures between about 3000 K and 30000 K
+    teff = np.clip(np.exp(rng.normal(np.log(7000), 0.5, n)), 2500, 40000)
+
+    # White dwarf probabilities, mostly low
+    pwd = rng.beta(0.5, 2, n)
+
+    chunk = {'RA': ra, 'DEC': dec, 'pwd': pwd, 'gmag': gmag, 'plx': plx, 'distance': distance, 'teff': teff, 'pm': pm}
+
+    # Knock out some measurements, and zero some parallaxes and proper motions, like real catalogs
+    for column in ['pwd', 'gmag', 'plx', 'distance', 'teff', 'pm']:
+        chunk[column][rng.uniform(0, 1, n) < missing_fraction] = np.nan
+    for column in ['plx', 'pm']:
+        chunk[column][rng.uniform(0, 1, n) < zero_fraction] = 0.0
+    return chunk
+
+def chunk_sizes(n_rows, chunk_rows):
+    # Split n_rows into chunks of at most chunk_rows
+    return [min(chunk_rows, n_rows - start) for start in range(0, n_rows, chunk_rows)]
+# ------------------------------------------------------------- #
+
+
+
+# Catalog Writing Functions
+# ------------------------------------------------------------- #
+def write_fits(path, n_rows, seed, chunk_rows):
+    # Write the header for the full row count, then append big-endian rows chunk by chunk,
+    # so catalogs larger than memory can be written
+    columns = fits.ColDefs([fits.Column(name=column, format='D') for column in synthetic_columns])
+    header = fits.BinTableHDU.from_columns(columns, nrows=0).header
+    header['NAXIS2'] = n_rows
+    record = np.dtype([(column, '>f8') for column in synthetic_columns])
+    with open(path, 'wb') as out:
+        out.write(fits.PrimaryHDU().header.tostring().encode('ascii'))
+        out.write(header.tostring().encode('ascii'))
+        for chunk_index, n in enumerate(chunk_sizes(n_rows, chunk_rows)):
+            chunk = generate_chunk(n, seed, chunk_index)
+            rows = np.empty(n, dtype=record)
+            for column in synthetic_columns:
+                rows[column] = chunk[column]
+            rows.tofile(out)
+
+        # FITS data blocks are padded to a multiple of 2880 bytes
+        data_bytes = n_rows * record.itemsize
+        out.write(b'\0' * (-data_bytes % 2880))
+
+def write_text(path, filetype, n_rows, seed, chunk_rows):
+    with open(path, 'w') as out:
+        # IPAC tables start with |-separated name, type and null lines
+        if filetype == 'IPAC':
+            out.write('|' + '|'.join(column.center(ipac_width) for column in synthetic_columns) + '|\n')
+            out.write('|' + '|'.join('double'.center(ipac_width) for column in synthetic_columns) + '|\n')
+            out.write('|' + '|'.join('nan'.center(ipac_width) for column in synthetic_columns) + '|\n')
+        for chunk_index, n in enumerate(chunk_sizes(n_rows, chunk_rows)):
+            chunk = pd.DataFrame(generate_chunk(n, seed, chunk_index), columns=synthetic_columns)
+            if filetype == 'CSV':
+                chunk.to_csv(out, index=False, header=(chunk_index == 0))
+            elif filetype == 'ASCII':
+                chunk.to_csv(out, index=False, header=(chunk_index == 0), sep=' ', na_rep='nan')
+            else:
+                # Each IPAC value sits right-aligned under its column, after the separator position
+                np.savetxt(out, chunk.to_numpy(), fmt=f' %{ipac_width}.15g', delimiter='')
+
+def write_catalog(path, filetype, n_rows, seed=0, chunk_rows=1000000):
+    # Write a synthetic catalog of n_rows rows in the given file type
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if filetype == 'FITS':
+        write_fits(path, n_rows, seed, chunk_rows)
+    else:
+        write_text(path, filetype, n_rows, seed, chunk_rows)
+    return path
+# ------------------------------------------------------------- #
+
+
+
+# Command Line
+# ------------------------------------------------------------- #
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic ExoRANK ranking catalog.')
+    parser.add_argument('path', help='output file')
+    parser.add_argument('--rows', type=float, default=1e4, help='number of rows, e.g. 1e6')
+    parser.add_argument('--type', default='CSV', choices=list(synthetic_extensions), help='file type')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--chunk-rows', type=int, default=1000000, help='rows generated and written at a time')
+    args = parser.parse_args(argv)
+    write_catalog(args.path, args.type, int(args.rows), seed=args.seed, chunk_rows=args.chunk_rows)
+    print(f'#   Wrote {int(args.rows)} {args.type} rows to {args.path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+# ------------------------------------------------------------- #
@@ -0,0 +1,28 @@
+#-----------------------------------------------------------------------#
+# ExoRANK v1.0.0
+# By Hunter Brooks, at NAU, Flagstaff: June 12, 2024
+#
+# Purpose: Rank a Table Based Off Given Parameters
+#-----------------------------------------------------------------------#
+
+# The GUI lives in exorank.gui and is only imported when it is launched,
+# so importing the package never needs PySimpleGUI or a display.
+from .tables import filetype_list, read_table, read_fits_columns, native_column, table_frame, column_read
+from .transforms import transform_registry, register_transform, get_transform, transform_key, transform_names, transform_domain, invalid_policy, apply_transform, register_spec_transforms, restore_transforms, spec_transforms
+from .columns import precision_list, file_backed, compact_column, column_store, take_rows, store_bytes
+from .ranking import parm_transform, parm_metrix, ranking_mult, rank_keys, top_rows, rank_order, rank_table
+from .controls import draw_controls, plan_controls, save_control_manifest
+from .output import subject_set_rows, build_subject_set, write_subject_set, rank_table_save
+from .spec import load_spec, validate_spec, spec_columns
+from .instrument import peak_rss_mb, current_rss_mb, memory_limit, add_event_handler, remove_event_handler, emit, stage, progress, message, event_summary, json_lines_handler, console_handler, profile_call
+from .jobs import JobCancelled, JobQueue
+from .stream import iter_table_chunks, stream_rank, is_ranked_plan, plan_tables
+from .cache import cache_info, set_cache_limits, clear_cache
+from .tablecache import table_cache_dir, read_cached_columns, cache_chunks, store_table_columns, list_table_cache, clear_table_cache
+from .sky import check_region, region_mask, sky_cells, build_sky_index, region_cells, region_rows, top_per_cell_rows
+from .checkpoint import checkpoint_dir, export_journal_path, ranking_fingerprint, save_ranking, load_ranking, save_plan, load_plan, read_export_journal, verified_records
+from .sweep import sweep_weights, score_block, sweep_top, pruned_sweep_top, rank_correlations, neighbour_vectors, neighbour_correlations, weight_sweep, sweep_table, stable_targets
+from .shards import is_sharded, shard_files, score_shard, merge_two_runs, merge_runs, rank_shards
+from .pipeline import rank, load_columns, read_columns, load_parameters, load_table, load_sky_index, rank_file, run, sweep
+
+__version__ = '1.0.0'
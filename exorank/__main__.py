@@ -0,0 +1,246 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Command Line
+#
+# Purpose: Run ExoRANK from a ranking spec, e.g. python -m exorank run spec.json
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import sys
+import argparse
+# ------------------------------------------------------------- #
+
+
+
+# Command Line Functions
+# ------------------------------------------------------------- #
+def build_parser():
+    parser = argparse.ArgumentParser(prog='exorank', description='Rank a table based off given parameters.')
+    commands = parser.add_subparsers(dest='command')
+    
+    # Headless run from a JSON/YAML spec
+    run_parser = commands.add_parser('run', help='rank a table from a JSON/YAML ranking spec')
+    run_parser.add_argument('spec', help='path to the ranking spec (.json, .yaml or .yml)')
+    run_parser.add_argument('--file', help='override the ranking file; a directory or glob ranks every shard in it')
+    run_parser.add_argument('--output', help='override the output file name from the spec')
+    run_parser.add_argument('--output-dir', help='override the output directory from the spec')
+    run_parser.add_argument('--workers', type=int, help='number of processes writing CSV subject sets (a Parquet file has one writer)')
+    run_parser.add_argument('--seed', type=int, help='seed for shuffling the subject sets')
+    run_parser.add_argument('--format', dest='output_format', choices=['csv', 'parquet'], help='write CSV subject sets, or one Parquet file with a row group per subject set')
+    run_parser.add_argument('--no-control-repeats', action='store_true', help='do not reuse a control row until every control row has been used')
+    run_parser.add_argument('--no-table-cache', action='store_true', help='do not read or write the on-disk table cache')
+    run_parser.add_argument('--cache-verify', choices=['mtime', 'hash'], help='check cached tables by modification time or by content hash')
+    run_parser.add_argument('--shard-workers', type=int, help='number of processes scoring shards when the spec file is a directory or glob')
+    run_parser.add_argument('--stream', action='store_true', help='read and score the ranking table in row chunks')
+    run_parser.add_argument('--chunk-memory-mb', type=float, help='memory budget for one streamed chunk, in MB')
+    run_parser.add_argument('--top-k', type=int, help='only rank, keep and write the best N targets')
+    run_parser.add_argument('--max-rss-mb', type=float, help='stop the run once its peak memory goes over this many MB')
+    run_parser.add_argument('--cone', type=float, nargs=3, metavar=('RA', 'DEC', 'RADIUS'), help='only rank targets inside this cone, in degrees')
+    run_parser.add_argument('--box', type=float, nargs=4, metavar=('RA_MIN', 'RA_MAX', 'DEC_MIN', 'DEC_MAX'), help='only rank targets inside this RA/DEC box, in degrees')
+    run_parser.add_argument('--top-per-cell', type=int, help='only keep the best N targets in every sky cell')
+    run_parser.add_argument('--sky-cell-deg', type=float, help='size of the sky cells used by --top-per-cell and the sky index, in degrees')
+    run_parser.add_argument('--precision', choices=['float64', 'float32'], help='keep the transformed parameters as float64, or as float32 to halve their memory')
+    run_parser.add_argument('--checkpoint', action='store_true', help='keep the ranking and the control plan on disk and journal every written subject set')
+    run_parser.add_argument('--resume', action='store_true', help='resume a checkpointed export, only writing the missing subject sets')
+    run_parser.add_argument('--events', help='write every stage timing and progress event as a JSON line to this file ("-" for the terminal)')
+    run_parser.add_argument('--profile', help='run under cProfile and save the stats to this file')
+    run_parser.add_argument('--quiet', action='store_true', help='do not print messages, stage timings and progress')
+    
+    # Score many scalings at once and report how stable the top targets are
+    sweep_parser = commands.add_parser('sweep', help='compare the top targets over a grid or random sample of scalings')
+    sweep_parser.add_argument('spec', help='path to the ranking spec; its scalings are the reference')
+    sweep_vectors = sweep_parser.add_mutually_exclusive_group(required=True)
+    sweep_vectors.add_argument('--samples', type=int, help='number of random scaling vectors, each scaling drawn between 0 and 1')
+    sweep_vectors.add_argument('--steps', type=int, help='grid of this many scalings between 0 and 1 for every column')
+    sweep_parser.add_argument('--top-k', type=int, help='number of top targets compared between scalings (default: the spec top_k, or 100)')
+    sweep_parser.add_argument('--file', help='override the ranking file')
+    sweep_parser.add_argument('--output', help='override the output file name from the spec')
+    sweep_parser.add_argument('--output-dir', help='override the output directory from the spec')
+    sweep_parser.add_argument('--seed', type=int, help='seed for the random scaling vectors')
+    sweep_parser.add_argument('--quiet', action='store_true', help='do not print messages, stage timings and progress')
+    
+    # Inspect or clear the on-disk table cache
+    cache_parser = commands.add_parser('cache', help='inspect or clear the on-disk table cache')
+    cache_parser.add_argument('action', choices=['list', 'clear'], help='list the cached tables, or remove them')
+    cache_parser.add_argument('files', nargs='*', help='only clear the cache of these source files')
+    
+    # List the registered column types
+    commands.add_parser('types', help='list the column types, their units, valid domains and invalid policies')
+    
+    # The original PySimpleGUI window
+    commands.add_parser('gui', help='open the ExoRANK window')
+    return parser
+
+def run_command(args):
+    # The library is only imported once a command needs it
+    from .spec import load_spec, validate_spec
+    from .pipeline import run
+    from .instrument import add_event_handler, remove_event_handler, json_lines_handler, console_handler, profile_call
+    
+    # Apply the command line overrides on top of the spec
+    spec = load_spec(args.spec)
+    if args.file:
+        spec['file'] = args.file
+    if args.output:
+        spec['output'] = args.output
+    if args.output_dir:
+        spec['output_dir'] = args.output_dir
+    if args.workers is not None:
+        spec['workers'] = args.workers
+    if args.seed is not None:
+        spec['seed'] = args.seed
+    if args.output_format:
+        spec['output_format'] = args.output_format
+    if args.no_control_repeats:
+        spec['controls_replace'] = False
+    if args.no_table_cache:
+        spec['table_cache'] = False
+    if args.cache_verify:
+        spec['cache_verify'] = args.cache_verify
+    if args.shard_workers is not None:
+        spec['shard_workers'] = args.shard_workers
+    if args.stream:
+        spec['stream'] = True
+    if args.chunk_memory_mb is not None:
+        spec['chunk_memory_mb'] = args.chunk_memory_mb
+    if args.top_k is not None:
+        spec['top_k'] = args.top_k
+    if args.max_rss_mb is not None:
+        spec['max_rss_mb'] = args.max_rss_mb
+    if args.cone:
+        spec['region'] = {'cone': args.cone}
+    if args.box:
+        spec['region'] = {'box': args.box}
+    if args.top_per_cell is not None:
+        spec['top_per_cell'] = args.top_per_cell
+    if args.sky_cell_deg is not None:
+        spec['sky_cell_deg'] = args.sky_cell_deg
+    if args.precision:
+        spec['precision'] = args.precision
+    if args.checkpoint:
+        spec['checkpoint'] = True
+    if args.resume:
+        spec['resume'] = True
+    
+    # Stage timings go to the terminal, and to a JSON lines file if asked for
+    handlers = [] if args.quiet else [console_handler]
+    events_file = None
+    if args.events == '-':
+        handlers.append(json_lines_handler(sys.stdout))
+    elif args.events:
+        events_file = open(args.events, 'w')
+        handlers.append(json_lines_handler(events_file))
+    for handler in handlers:
+        add_event_handler(handler)
+    
+    if not args.quiet:
+        print('#----------------------------------------------------#')
+        print('#           ExoRANK Has Started Running!             #')
+        print('#----------------------------------------------------#')
+    try:
+        if args.profile:
+            profile_call(args.profile, run, validate_spec(spec))
+        else:
+            run(validate_spec(spec))
+    finally:
+        for handler in handlers:
+            remove_event_handler(handler)
+        if events_file is not None:
+            events_file.close()
+    if not args.quiet:
+        print('#----------------------------------------------------#')
+        print('#           ExoRANK Has Finished Running!            #')
+        print(f'# Output Tables Were Saved to {spec["output_dir"]!r}')
+        print('#----------------------------------------------------#')
+    return 0
+
+def sweep_command(args):
+    import numpy as np
+    from .spec import load_spec
+    from .pipeline import sweep
+    from .instrument import add_event_handler, remove_event_handler, console_handler
+    
+    spec = load_spec(args.spec)
+    for key in ('file', 'output', 'output_dir'):
+        if getattr(args, key):
+            spec[key] = getattr(args, key)
+    if args.seed is not None:
+        spec['seed'] = args.seed
+    
+    if not args.quiet:
+        add_event_handler(console_handler)
+    try:
+        report = sweep(spec, steps=args.steps, samples=args.samples, top_k=args.top_k)
+    finally:
+        remove_event_handler(console_handler)
+    
+    # Summarise the vectors against the spec's own scalings
+    print(f"#   Swept {len(report['weights']) - 1} scaling vectors over the top {report['top_k']} targets")
+    metrics = [('top-k overlap', 'overlap'), ('Spearman', 'spearman'), ('Kendall', 'kendall'), ('neighbour Spearman', 'neighbour_spearman'), ('neighbour Kendall', 'neighbour_kendall'), ('TP recovery', 'tp_recovery')]
+    for label, key in metrics:
+        if key in report:
+            values = report[key][1:] if len(report[key]) > 1 else report[key]
+            print(f'#   {label:<18} min {values.min():.3f}  median {np.median(values):.3f}  max {values.max():.3f}' + (f'  (spec scalings {report[key][0]:.3f})' if key == 'tp_recovery' else ''))
+    print(f"#   Results saved to {report['files'][0]} and {report['files'][1]}")
+    return 0
+
+def cache_command(args):
+    from .tablecache import table_cache_dir, list_table_cache, clear_table_cache
+    
+    if args.action == 'clear':
+        removed = clear_table_cache(args.files or None)
+        print(f'#   Removed {removed} cached tables from {table_cache_dir()}')
+        return 0
+    
+    # List every cached table with its size and whether its source file changed since
+    entries = list_table_cache()
+    print(f'#   Table cache: {table_cache_dir()} ({len(entries)} tables)')
+    for entry in entries:
+        state = 'current' if entry['current'] else 'stale'
+        print(f"{entry['source']}  [{entry['filetype']}, {entry['rows']} rows, {entry['bytes'] / 1024**2:.1f} MB, {state}]  {', '.join(entry['columns'])}")
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    if args.command == 'gui':
+        # PySimpleGUI is only imported in GUI mode
+        from .gui import main as gui_main
+        gui_main()
+        return 0
+    
+    if args.command == 'cache':
+        return cache_command(args)
+    
+    if args.command == 'sweep':
+        try:
+            return sweep_command(args)
+        except (ValueError, KeyError, OSError, MemoryError, ImportError) as error:
+            print('#------------------------------------------------#')
+            print(f'#   ExoRANK Failed: {error}')
+            print('#------------------------------------------------#')
+            return 1
+    
+    if args.command == 'types':
+        from .transforms import transform_registry, transform_domain, invalid_policy
+        for name, transform in transform_registry.items():
+            print(f"{name:<10} {transform['units']:<12} {transform_domain(transform):<16} {invalid_policy(transform):<14} {transform['description']}")
+        return 0
+    
+    if args.command == 'run':
+        try:
+            return run_command(args)
+        except (ValueError, KeyError, OSError, MemoryError, ImportError) as error:
+            print('#------------------------------------------------#')
+            print(f'#   ExoRANK Failed: {error}')
+            print('#------------------------------------------------#')
+            return 1
+    
+    build_parser().print_help()
+    return 2
+# ------------------------------------------------------------- #
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#-----------------------------------------------------------------------#
+# ExoRANK In-Memory Cache
+#
+# Purpose: Keep transformed parameter matrices and control tables between runs
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .columns import file_backed
+# ------------------------------------------------------------- #
+
+
+# Cache State
+# ------------------------------------------------------------- #
+# Least recently used entries sit at the front, each stored as (value, size in bytes)
+memory_cache = OrderedDict()
+memory_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+memory_cache_limits = {'max_entries': 8, 'max_bytes': 2 * 1024**3}
+# ------------------------------------------------------------- #
+
+
+
+# Cache Functions
+# ------------------------------------------------------------- #
+def file_key(file):
+    # A file is identified by its absolute path, modification time and size, so edits invalidate it
+    stat = os.stat(file)
+    return (os.path.abspath(file), stat.st_mtime_ns, stat.st_size)
+
+def value_bytes(value):
+    # Approximate memory held by a cached value; arrays mapped from a file do not count
+    if isinstance(value, np.ndarray):
+        return 0 if file_backed(value) else value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, dict):
+        return sum(value_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_bytes(item) for item in value)
+    return 0
+
+def cache_get(key):
+    # Return the cached value and mark it as recently used, or None on a miss
+    if key in memory_cache:
+        memory_cache.move_to_end(key)
+        memory_cache_stats['hits'] += 1
+        return memory_cache[key][0]
+    memory_cache_stats['misses'] += 1
+    return None
+
+def cache_put(key, value):
+    # Entries of an older version of the same file (same kind and path, but another modification
+    # time or size) can never hit again, so drop them; other settings for the same version stay
+    for old_key in [old_key for old_key in memory_cache if old_key[:2] == key[:2] and old_key[2:4] != key[2:4]]:
+        del memory_cache[old_key]
+
+    # Store the value, then evict the least recently used entries until the cache fits its limits
+    memory_cache[key] = (value, value_bytes(value))
+    while len(memory_cache) > 1 and (len(memory_cache) > memory_cache_limits['max_entries'] or cache_bytes() > memory_cache_limits['max_bytes']):
+        memory_cache.popitem(last=False)
+        memory_cache_stats['evictions'] += 1
+    return value
+
+def cache_bytes():
+    # Total size of every cached value
+    return sum(size for _, size in memory_cache.values())
+
+def cache_info():
+    # Hit, miss and size counters of the cache
+    return dict(memory_cache_stats, entries=len(memory_cache), bytes=cache_bytes(), **memory_cache_limits)
+
+def set_cache_limits(max_entries=None, max_bytes=None):
+    # Change the LRU bounds; entries over the new bounds go at the next insert
+    if max_entries is not None:
+        memory_cache_limits['max_entries'] = int(max_entries)
+    if max_bytes is not None:
+        memory_cache_limits['max_bytes'] = int(max_bytes)
+    return cache_info()
+
+def clear_cache():
+    # Drop every entry and reset the counters
+    memory_cache.clear()
+    memory_cache_stats.update(hits=0, misses=0, evictions=0)
+# ------------------------------------------------------------- #
@@ -0,0 +1,156 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Export Checkpoints
+#
+# Purpose: Persist the ranked table and the control plan, and journal every
+#          written subject set, so an interrupted export can be resumed
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from .tablecache import file_hash, read_meta, write_meta
+from .shards import is_sharded, shard_files
+from .stream import is_ranked_plan
+# ------------------------------------------------------------- #
+
+
+# Checkpoint Settings
+# ------------------------------------------------------------- #
+# Spec settings that change the ranked table; anything else only changes how it is exported
+ranking_spec_keys = ['type', 'columns', 'transforms', 'top_k', 'region', 'top_per_cell', 'sky_cell_deg', 'precision']
+# ------------------------------------------------------------- #
+
+
+
+# Checkpoint Location Functions
+# ------------------------------------------------------------- #
+def checkpoint_dir(output_dir, output):
+    # The checkpoint of an output sits next to its subject sets
+    return os.path.join(output_dir, f'{output}_checkpoint')
+
+def export_journal_path(output_dir, output):
+    return os.path.join(output_dir, f'{output}_export.jsonl')
+
+def settings_id(settings):
+    # Short hash of a JSON-able settings dict
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:16]
+# ------------------------------------------------------------- #
+
+
+
+# Ranking Checkpoint Functions
+# ------------------------------------------------------------- #
+def ranking_fingerprint(spec):
+    # The ranking files (every shard of a sharded run) by path, size and modification time,
+    # plus the settings that change the ranked table
+    files = shard_files(spec['file'], spec['type']) if is_sharded(spec['file']) else [spec['file']]
+    versions = [[os.path.abspath(file), os.stat(file).st_size, os.stat(file).st_mtime_ns] for file in files]
+    return settings_id({'files': versions, 'spec': {key: spec.get(key) for key in ranking_spec_keys}})
+
+def save_ranking(ranked_table, directory, fingerprint):
+    # Each column is saved as a .npy file; the meta file is removed first and written last,
+    # so a ranking cut short by a crash is never loaded
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        os.remove(os.path.join(directory, 'meta.json'))
+    
+    # A streamed ranking plan keeps its file rows and ranks, and where to read the rest
+    if is_ranked_plan(ranked_table):
+        columns = ['rows', 'ranks']
+        stream = {key: ranked_table[key] for key in ('file', 'filetype', 'columns', 'user_options', 'chunk_rows', 'table_cache', 'cache_verify', 'top_k')}
+        stream['dtypes'] = {column: dtype.str for column, dtype in ranked_table['dtypes'].items()}
+        arrays = [ranked_table[column] for column in columns]
+    else:
+        columns = list(ranked_table.columns)
+        stream = None
+        arrays = [ranked_table[column].to_numpy() for column in columns]
+    for j, values in enumerate(arrays):
+        np.save(os.path.join(directory, f'column_{j}.npy'), values, allow_pickle=False)
+    write_meta(directory, {'fingerprint': fingerprint, 'rows': len(arrays[0]), 'columns': columns, 'stream': stream})
+
+def load_ranking(directory, fingerprint):
+    # The saved ranked table (or streamed ranking plan), or None if there is none for this fingerprint
+    meta = read_meta(directory)
+    if meta is None or meta.get('fingerprint') != fingerprint:
+        return None
+    arrays = {column: np.load(os.path.join(directory, f'column_{j}.npy'), allow_pickle=False) for j, column in enumerate(meta['columns'])}
+    if meta.get('stream') is None:
+        return pd.DataFrame(arrays)
+    ranked_plan = dict(meta['stream'], kind='stream', **arrays)
+    ranked_plan['dtypes'] = {column: np.dtype(dtype) for column, dtype in ranked_plan['dtypes'].items()}
+    return ranked_plan
+# ------------------------------------------------------------- #
+
+
+
+# Control Plan Checkpoint Functions
+# ------------------------------------------------------------- #
+def save_plan(directory, settings, plan):
+    # One plan per set of export settings, since the chunk size changes the number of draws
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'plan_{settings_id(settings)}.npz')
+    np.savez(path + '.tmp.npz', true_positive=plan['true_positive'], true_negative=plan['true_negative'])
+    os.replace(path + '.tmp.npz', path)
+
+def load_plan(directory, settings):
+    # The saved plan for these export settings, or None
+    path = os.path.join(directory, f'plan_{settings_id(settings)}.npz')
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as saved:
+        return {'seed': settings['seed'], 'replace': settings['controls_replace'], 'true_positive': saved['true_positive'], 'true_negative': saved['true_negative']}
+# ------------------------------------------------------------- #
+
+
+
+# Export Journal Functions
+# ------------------------------------------------------------- #
+def read_export_journal(path, settings):
+    # Subject sets finished by an earlier export with the same settings, keyed by file name
+    try:
+        with open(path) as journal:
+            lines = journal.read().splitlines()
+    except OSError:
+        return {}
+    records = {}
+    for n, line in enumerate(lines):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # The last line may have been cut short by a crash
+            continue
+        if n == 0:
+            if entry.get('settings') != settings:
+                return {}
+            continue
+        records[entry['file']] = entry
+    return records
+
+def verified_records(output_dir, records):
+    # Only subject sets whose file still exists with the journaled checksum count as done
+    done = {}
+    for name, record in records.items():
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path) and os.path.getsize(path) == record['bytes'] and file_hash(path) == record['sha256']:
+            done[name] = record
+    return done
+
+def open_export_journal(path, settings, done):
+    # Start the journal over with the settings and the verified records, then append to it
+    journal = open(path, 'w')
+    journal.write(json.dumps({'settings': settings}) + '\n')
+    for record in done.values():
+        journal.write(json.dumps(record) + '\n')
+    journal.flush()
+    return journal
+
+def journal_subject_set(journal, name, digest, size, rows):
+    # Record one finished subject set; each line is flushed so it survives a crash right after
+    journal.write(json.dumps({'file': name, 'sha256': digest, 'bytes': size, 'rows': rows}) + '\n')
+    journal.flush()
+# ------------------------------------------------------------- #
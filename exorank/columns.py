@@ -0,0 +1,69 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Column Store
+#
+# Purpose: Compact columnar container of the ranking columns, passed
+#          between stages as arrays and views instead of copies
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import mmap
+import numpy as np
+from .tables import native_column
+# ------------------------------------------------------------- #
+
+
+# Column Store Settings
+# ------------------------------------------------------------- #
+# Precisions the transformed parameter matrix can be kept in; float32 halves its memory
+precision_list = ['float64', 'float32']
+# ------------------------------------------------------------- #
+
+
+
+# Column Functions
+# ------------------------------------------------------------- #
+def file_backed(column):
+    # True for arrays that are views into a memory-mapped file, e.g. the table cache
+    while column is not None:
+        if isinstance(column, (np.memmap, mmap.mmap)):
+            return True
+        column = getattr(column, 'base', None)
+    return False
+
+def compact_column(column):
+    # A contiguous native array that does not keep a parsed table alive; arrays that already
+    # own their data or are mapped from a file are kept as they are, anything else is copied once
+    column = native_column(column)
+    if column.flags.c_contiguous and (column.flags.owndata or file_backed(column)):
+        return column
+    return np.array(column)
+# ------------------------------------------------------------- #
+
+
+
+# Column Store Functions
+# ------------------------------------------------------------- #
+def column_store(ra_list, dec_list, column_space, parameter_matrix, row_id=None):
+    # RA, DEC and the ranking columns as 1-D arrays, the (rows, parameters) matrix, and the
+    # table row number of every row, so selections can always be traced back to the table
+    if row_id is None:
+        row_id = np.arange(len(ra_list), dtype=np.int64)
+    return {
+        'row_id': row_id,
+        'ra': ra_list,
+        'dec': dec_list,
+        'column_space': column_space,
+        'parameter_matrix': parameter_matrix,
+    }
+
+def take_rows(store, rows):
+    # A new store holding only the given rows; the store it was taken from is left untouched
+    return column_store(store['ra'][rows], store['dec'][rows], [column[rows] for column in store['column_space']], store['parameter_matrix'][rows], row_id=store['row_id'][rows])
+
+def store_bytes(store):
+    # Memory held by the store, leaving out columns that are mapped from a file
+    arrays = [store['row_id'], store['ra'], store['dec'], store['parameter_matrix']] + list(store['column_space'])
+    return sum(array.nbytes for array in arrays if not file_backed(array))
+# ------------------------------------------------------------- #
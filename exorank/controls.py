@@ -0,0 +1,78 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Control Injection
+#
+# Purpose: Plan which true-positive and true-negative rows go into each subject set
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import json
+import numpy as np
+# ------------------------------------------------------------- #
+
+
+
+# Control Planning Functions
+# ------------------------------------------------------------- #
+def draw_controls(rng, n_chunks, n_rows, n_draws, replace):
+    # Each row of the result holds the control rows of one chunk
+    picks = np.empty((n_chunks, n_draws), dtype=np.int64)
+    if n_draws == 0:
+        return picks
+
+    if replace:
+        # Rows may come back in later chunks, but never twice in the same chunk
+        for chunk in range(n_chunks):
+            picks[chunk] = rng.choice(n_rows, size=n_draws, replace=False)
+        return picks
+
+    # Without replacement, walk through shuffled passes of the table so no row repeats
+    # until every row has been used once
+    remaining = rng.permutation(n_rows)
+    for chunk in range(n_chunks):
+        if len(remaining) >= n_draws:
+            picks[chunk] = remaining[:n_draws]
+            remaining = remaining[n_draws:]
+            continue
+        
+        # A chunk that crosses into the next pass is filled only with rows not already in it;
+        # the rows it skips go first in the rest of the new pass
+        fresh = rng.permutation(n_rows)
+        skipped = np.isin(fresh, remaining)
+        fill = fresh[~skipped]
+        n_fill = n_draws - len(remaining)
+        picks[chunk] = np.concatenate([remaining, fill[:n_fill]])
+        remaining = np.concatenate([fresh[skipped], fill[n_fill:]])
+    return picks
+
+def plan_controls(n_chunks, n_positive_rows, n_positive, n_negative_rows, n_negative, seed, replace=True):
+    # Draw every chunk's controls up front from one seeded generator
+    rng = np.random.default_rng(seed)
+    return {
+        'seed': seed,
+        'replace': replace,
+        'true_positive': draw_controls(rng, n_chunks, n_positive_rows, n_positive, replace),
+        'true_negative': draw_controls(rng, n_chunks, n_negative_rows, n_negative, replace),
+    }
+
+def save_control_manifest(plan, starts, files, path):
+    # Record which control rows (by row number in their tables) each subject set received
+    manifest = {
+        'seed': plan['seed'],
+        'replace': plan['replace'],
+        'subject_sets': [
+            {
+                'subject_set': int(start),
+                'file': os.path.basename(file),
+                'true_positive_rows': plan['true_positive'][chunk].tolist(),
+                'true_negative_rows': plan['true_negative'][chunk].tolist(),
+            }
+            for chunk, (start, file) in enumerate(zip(starts, files))
+        ],
+    }
+    with open(path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    return path
+# ------------------------------------------------------------- #
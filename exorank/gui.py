@@ -0,0 +1,291 @@
+#-----------------------------------------------------------------------#
+# ExoRANK GUI
+#
+# Purpose: PySimpleGUI window for setting up and running ExoRANK
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import PySimpleGUI as sg
+from .tables import filetype_list
+from .transforms import transform_names
+from .output import rank_table_save
+from .pipeline import load_table, rank_file
+from .instrument import event_summary
+from .jobs import JobQueue, JobCancelled
+# ------------------------------------------------------------- #
+
+
+
+# ExoRANK GUI Layout
+# ------------------------------------------------------------- #
+def build_window():
+    # Sets General ExoRANK Settings
+    sg.theme('LightBlue3')
+    
+    #Makes the layout of WRAP for the single object search, by providing a location for: ra, dec, radius, output file name, catalogs, and output
+    layout = [
+        [sg.Text('ExoRANK', justification='center', size=(12, 1), font = ('Chalkduster', 52))],
+
+        [sg.Text('Ranking File Directory', font = ('Times New Roman', 22), size=(50, 1), justification='center')],
+        [sg.FileBrowse('Ranking File Browser', size = (80, 1), key = 'file', file_types = [('CSV Files', '*.csv'), ('FITS Files', '*.fits'), ('ASCII Files', '*.txt'), ('IPAC Files', '*.txt')])],
+        
+        [sg.Text('True-Positive File Directory', font = ('Times New Roman', 22), size=(50, 1), justification='center')],
+        [sg.FileBrowse('True-Positive File Browser', size = (80, 1), key = 'tp_file', file_types = [('CSV Files', '*.csv'), ('FITS Files', '*.fits'), ('ASCII Files', '*.txt'), ('IPAC Files', '*.txt')])],
+        
+        [sg.Text('True-Negative File Directory', font = ('Times New Roman', 22), size=(50, 1), justification='center')],
+        [sg.FileBrowse('True-Negative File Browser', size = (80, 1), key = 'tn_file', file_types = [('CSV Files', '*.csv'), ('FITS Files', '*.fits'), ('ASCII Files', '*.txt'), ('IPAC Files', '*.txt')])],
+        
+        [sg.Text('Filetype', font = ('Times New Roman', 22), size=(22, 1), justification='center'),   sg.Text('NOP', size=(12, 1), justification='center', font = ('Times New Roman', 22))],
+        [sg.Combo(filetype_list, size = (25), font = ('Times New Roman', 15), key = 'type'),          sg.InputText(size = (25), font = ('Times New Roman', 15), key = 'nop')],            
+        
+        [sg.Text('Chunk Size', size=(12, 1), justification='center', font = ('Times New Roman', 22)),   sg.Text('Positive %', size=(12, 1), justification='center', font = ('Times New Roman', 22)),   sg.Text('Negative %', size=(12, 1), justification='center', font = ('Times New Roman', 22))],
+        [sg.InputText(size = (16), font = ('Times New Roman', 15), key = 'chunk')                   ,   sg.InputText(size = (16), font = ('Times New Roman', 15), key = 'additional_perc'),            sg.InputText(size = (19), font = ('Times New Roman', 15), key = 'bad_perc')],
+                        
+        [sg.Text('Output File Name', size=(40, 1), justification='center', font = ('Times New Roman', 22))], 
+        [sg.InputText(key = 'output2', font = ('Times New Roman', 15), size = (60, 2), justification='center')],        
+        
+        [sg.Button('Change Settings', font = ('Times New Roman', 15), size = (60, 1))],        
+                        
+        [sg.Button('Run', size = (25), button_color = '#95D49B'), sg.Button('Help', size = (15), button_color = '#F7CC7C'), sg.Button('Close', size = (25), button_color = '#E48671')],
+        
+        # Progress of the running job, its latest stage, and a button that stops it at the next chunk
+        [sg.ProgressBar(100, orientation = 'h', size = (30, 12), key = 'progress'), sg.Button('Cancel', size = (10), button_color = '#E48671')],
+        [sg.Text('', size = (60, 1), font = ('Times New Roman', 12), key = 'status')]
+            ]
+
+    #Generates the window based off the layouts above
+    return sg.Window('ExoRANK', layout, size = (450, 600), grab_anywhere=False, finalize=True, enable_close_attempted_event = True)
+# ------------------------------------------------------------- #
+
+
+
+# ExoRANK GUI Events
+# ------------------------------------------------------------- #
+def change_settings(window, values, user_options, user_types, user_scalings):
+    try:
+        # Attempt to convert the number of options to an integer
+        num_options = int(values['nop'])
+    except:
+        # Notify the user if there's an error in input and keep the current settings
+        print('#------------------------------------------------#')
+        print('#   Please Enter a Correct Output!  #')
+        print('#------------------------------------------------#')
+        return user_options, user_types, user_scalings
+    
+    # Initialize lists for column options, types, and scalings
+    col_option = [sg.Text('Column Name: ', font=('Times New Roman', 22), size=(16, 1), justification='center')]
+    col_type = [sg.Text('Column Type: ', font=('Times New Roman', 22), size=(16, 1), justification='center')]
+    col_scaling = [sg.Text('Column Scaling: ', font=('Times New Roman', 22), size=(16, 1), justification='center')]
+    
+    # Generate input fields for each option based on the number of options
+    for i in range(num_options):
+        col_option.append(sg.InputText(size=(18), font=('Times New Roman', 15), key=f'option_{i}'))
+        col_type.append(sg.Combo(transform_names(), size=(16), font=('Times New Roman', 15), key=f'type_{i}'))
+        col_scaling.append(sg.InputText(size=(18), font=('Times New Roman', 15), key=f'scaling_{i}'))
+    
+    # Settings window layout
+    settings_layout = [
+        col_option,
+        col_type,
+        col_scaling,
+        [sg.Button("Save"), sg.Button("Cancel")],
+    ]
+    
+    # Create the settings window
+    settings_window = sg.Window("Settings", settings_layout, modal=True)
+    
+    # Hide the main window
+    window.hide()
+    
+    # Infinite loop until the user cancels or saves settings
+    while True:
+        # Initialize lists to store user options, types, and scalings
+        user_options = []
+        user_types = []
+        user_scalings = []
+        
+        # Read settings from the settings window
+        settings_event, settings_values = settings_window.read()
+        
+        # Break the loop if the settings window is closed or canceled
+        if settings_event == sg.WINDOW_CLOSED or settings_event == "Cancel":
+            break
+        
+        # Check if the user clicked the "Save" button
+        if settings_event == "Save":
+            # Iterate over each option
+            for i in range(num_options):
+                # Check if the scaling value is between 0 and 1 and if the type is valid
+                if settings_values[f'scaling_{i}']  == '' and  settings_values[f'type_{i}'] == '' and settings_values[f'option_{i}'] == '': 
+                    print('#------------------------------------------------#')
+                    print('#         Please Input Correct Settings!         #')
+                    print('#------------------------------------------------#')
+                else: 
+                    if 0 <= float(settings_values[f'scaling_{i}']) <= 1 and settings_values[f'type_{i}'] in transform_names():
+                        # If valid, append user options, types, and scalings
+                        user_options.append(settings_values[f'option_{i}'])
+                        user_types.append(settings_values[f'type_{i}'])
+                        user_scalings.append(settings_values[f'scaling_{i}'])
+                    else:
+                        # If settings are incorrect, notify the user
+                        print('#------------------------------------------------#')
+                        print('#         Please Input Correct Settings!         #')
+                        print('#------------------------------------------------#')
+            # Check if all lists have the correct length
+            if len(user_scalings) == num_options and len(user_options) == num_options and len(user_types) == num_options:
+                # Break the loop if settings are valid
+                break
+            
+    settings_window.close()
+    
+    # Show the main window again
+    window.un_hide()
+    
+    # Return the saved settings
+    return user_options, user_types, user_scalings
+
+def check_inputs(values, user_options, user_types, user_scalings):
+    if values['file'] == '': 
+        print('#------------------------------------------------#')
+        print('#             Please Enter a File!               #')
+        print('#------------------------------------------------#')
+        return False
+    
+    if values['type'] not in filetype_list: 
+        print('#------------------------------------------------#')
+        print('#        Please Enter a Correct Filetype!        #')
+        print('#------------------------------------------------#')
+        return False
+    
+    if len(user_options) == 0 or len(user_types) == 0 or len(user_scalings) == 0: 
+        print('#------------------------------------------------#')
+        print('#             Please Set Settings                #')
+        print('#------------------------------------------------#')
+        return False
+    return True
+
+def run_ranking(values, user_options, user_types, user_scalings):
+    # Runs on the job worker thread; returns whether the subject sets were saved
+    output = values['output2']
+    
+    print('#----------------------------------------------------#')
+    print('#           ExoRANK Has Started Running!             #')
+    print('# Please Wait While Calculations Are Being Performed #')
+    print('#----------------------------------------------------#')
+    
+    chunk_size = int(values['chunk'])
+    true_positive_perc = float(values['additional_perc'])
+    true_negative_perc = float(values['bad_perc'])
+    
+    try:
+        # The control tables and the transformed ranking columns are cached, so re-running with new scalings is fast
+        additional_table = load_table(values['tp_file'], values['type'])
+        bad_table = load_table(values['tn_file'], values['type'])
+        ranked_table = rank_file(values['file'], values['type'], user_options, user_types, user_scalings)
+    except JobCancelled:
+        raise
+    except ValueError:
+        print('#------------------------------------------------#')
+        print('#   Please Enter a Correct RA/DEC Column Names!  #')
+        print('#------------------------------------------------#')
+        return False
+    except KeyError:
+        print('#------------------------------------------------#')
+        print('#        Please Enter a Correct Setting!         #')
+        print('#------------------------------------------------#')
+        return False
+    except Exception:
+        print('#------------------------------------------------#')
+        print('#         Please Enter a Correct Table!          #')
+        print('#------------------------------------------------#')
+        return False
+    
+    rank_table_save(ranked_table, additional_table, output, chunk_size, true_positive_perc, true_negative_perc, bad_table)
+    print('#----------------------------------------------------#')
+    print('#           ExoRANK Has Finished Running!            #')
+    print('# Output Table Was Saved to "Output" File Directory  #')
+    print('#----------------------------------------------------#')
+    return True
+
+def show_job_event(window, event):
+    # Job events arrive from the worker thread through window.write_event_value; the library's
+    # messages are printed as they were before the job queue
+    if event['event'] == 'message':
+        print(event['text'])
+        return
+    if event['event'] == 'progress' and event['total']:
+        window['progress'].update(current_count = int(100 * event['done'] / event['total']))
+    if event['event'] == 'job_start':
+        window['progress'].update(current_count = 0)
+        status = f"Job {event['job']} running, {event['queued']} queued"
+    elif event['event'] == 'job_done':
+        window['progress'].update(current_count = 100 if event['result'] else 0)
+        status = f"Job {event['job']} finished, {event['queued']} queued"
+    elif event['event'] == 'job_cancelled':
+        print('#------------------------------------------------#')
+        print(f"#            Job {event['job']} Was Cancelled!              #")
+        print('#------------------------------------------------#')
+        status = f"Job {event['job']} cancelled, {event['queued']} queued"
+    elif event['event'] == 'job_failed':
+        print('#------------------------------------------------#')
+        print(f"#   ExoRANK Failed: {event['error']}")
+        print('#------------------------------------------------#')
+        status = f"Job {event['job']} failed, {event['queued']} queued"
+    elif event['event'] == 'job_queued':
+        status = f"Job {event['job']} queued"
+    else:
+        status = event_summary(event)
+    if status is not None:
+        window['status'].update(status)
+# ------------------------------------------------------------- #
+
+
+
+# Running ExoRANK GUI
+# ------------------------------------------------------------- #
+def main():
+    window = build_window()
+    user_options = []
+    user_scalings = []
+    user_types = []
+    
+    # Ranking jobs run one after another on a worker thread, which posts its events back to the window
+    jobs = JobQueue(lambda job_event: window.write_event_value('-JOB-', job_event))
+    
+    while True:
+        #Reads all of the events and values, then reads which tab is currently in
+        event, values = window.read()
+        
+        if event == "Change Settings":
+            user_options, user_types, user_scalings = change_settings(window, values, user_options, user_types, user_scalings)
+        
+        # Each Run queues a job with a copy of the current settings, so the window can change while it waits
+        if event == 'Run' and check_inputs(values, user_options, user_types, user_scalings):
+            jobs.submit(run_ranking, dict(values), list(user_options), list(user_types), list(user_scalings))
+        
+        if event == 'Cancel':
+            jobs.cancel()
+        
+        if event == '-JOB-':
+            show_job_event(window, values['-JOB-'])
+                   
+        #Provides the user with the authors information if the 'Help' button is pressed
+        if event in (None, 'Help'):
+            print('#------------------------------------------------#')
+            print('#       Thank you for using ExoRANK!             #')
+            print('#      Authors Contact: hcb98@nau.edu            #')
+            print('#------------------------------------------------#')
+
+        #Closes WRAP if the 'Close WRAP' button is pressed
+        if event in (None, 'Close'):
+            print('#------------------------------------------------#')
+            print('               Closing ExoRANK                       ')
+            print('#------------------------------------------------#')
+            break
+
+    #Stops the running job at its next chunk, then closes the window
+    jobs.close(timeout = 30)
+    window.close()
+# ------------------------------------------------------------- #
@@ -0,0 +1,196 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Instrumentation
+#
+# Purpose: Time every pipeline stage, report progress and profile runs
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import sys
+import json
+import time
+import contextlib
+# ------------------------------------------------------------- #
+
+
+# Instrumentation State
+# ------------------------------------------------------------- #
+# Functions called with every event dict; nothing is reported when the list is empty
+event_handlers = []
+
+# Functions called at every progress() call, before throttling; one that raises stops the run there
+cancel_checks = []
+
+# Progress events of one stage are sent at most once per interval, in seconds
+progress_settings = {'interval': 0.5}
+progress_times = {}
+# ------------------------------------------------------------- #
+
+
+
+# Memory Reporting Functions
+# ------------------------------------------------------------- #
+def peak_rss_mb():
+    # The resource module is not available on Windows
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # ru_maxrss is reported in bytes on MacOS and in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak / 1024**2
+    return peak / 1024
+
+def current_rss_mb():
+    # Resident memory right now; only Linux reports it without extra packages
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+@contextlib.contextmanager
+def memory_limit(max_rss_mb):
+    # Check the memory of this process at every progress call and every stage event, and stop
+    # the run with a MemoryError once it is over the limit; this is a check between steps, not a
+    # hard cap, so one step (a chunk, a sort, a subject set) can still go over. The peak RSS only
+    # counts once it has grown since the limit was entered, so an earlier, larger run in the same
+    # process (the GUI, or a library caller) does not fail every later run
+    if max_rss_mb is None:
+        yield
+        return
+    start_peak = peak_rss_mb()
+    def check(event=None):
+        usage = current_rss_mb()
+        peak = peak_rss_mb()
+        if peak is not None and start_peak is not None and peak > start_peak:
+            usage = peak if usage is None else max(usage, peak)
+        if usage is not None and usage > max_rss_mb:
+            where = '' if event is None else f" in the {event.get('stage')} stage"
+            raise MemoryError(f'Memory use of {usage:.0f} MB went over the {max_rss_mb} MB limit{where}')
+    cancel_checks.append(check)
+    add_event_handler(check)
+    try:
+        yield
+    finally:
+        cancel_checks.remove(check)
+        remove_event_handler(check)
+# ------------------------------------------------------------- #
+
+
+
+# Event Functions
+# ------------------------------------------------------------- #
+def add_event_handler(handler):
+    # Handlers get every event dict; one that raises stops the stage that sent the event
+    event_handlers.append(handler)
+    return handler
+
+def remove_event_handler(handler):
+    if handler in event_handlers:
+        event_handlers.remove(handler)
+
+def emit(event, **fields):
+    # Send an event to every handler
+    if not event_handlers:
+        return None
+    event = dict(event=event, time=time.time(), **fields)
+    for handler in list(event_handlers):
+        handler(event)
+    return event
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    # Time one stage; the caller fills in rows, bytes_read and bytes_written on the yielded record
+    record = dict(stage=name, rows=None, bytes_read=None, bytes_written=None)
+    record.update(fields)
+    emit('stage_start', stage=name)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as error:
+        emit('stage_failed', stage=name, seconds=time.perf_counter() - start, error=repr(error))
+        raise
+    record['seconds'] = time.perf_counter() - start
+    record['peak_rss_mb'] = peak_rss_mb()
+    progress_times.pop(name, None)
+    emit('stage', **record)
+
+def progress(name, done, total=None, unit='rows'):
+    # Throttled, so calling this once per chunk costs nothing measurable
+    for check in cancel_checks:
+        check()
+    if not event_handlers:
+        return
+    now = time.perf_counter()
+    if now - progress_times.get(name, 0) < progress_settings['interval'] and done != total:
+        return
+    progress_times[name] = now
+    emit('progress', stage=name, done=done, total=total, unit=unit)
+
+def message(text):
+    # Banners and notes of the library are events too, so they are only printed by a console handler
+    emit('message', text=text)
+# ------------------------------------------------------------- #
+
+
+
+# Event Handlers
+# ------------------------------------------------------------- #
+def json_lines_handler(stream):
+    # Write every event as one JSON line, e.g. to a log file
+    def handler(event):
+        stream.write(json.dumps(event, default=str) + '\n')
+        stream.flush()
+    return handler
+
+def event_summary(event):
+    # One-line summary of a finished stage or a progress event, or None for other events
+    if event['event'] == 'stage':
+        parts = [f"{event['seconds']:.2f} s"]
+        if event['rows'] is not None:
+            parts.append(f"{event['rows']} rows")
+            if event['seconds'] > 0:
+                parts.append(f"{event['rows'] / event['seconds']:.0f} rows/s")
+        if event['bytes_read'] is not None:
+            parts.append(f"{event['bytes_read'] / 1024**2:.1f} MB read")
+        if event['bytes_written'] is not None:
+            parts.append(f"{event['bytes_written'] / 1024**2:.1f} MB written")
+        if event['peak_rss_mb'] is not None:
+            parts.append(f"peak RSS {event['peak_rss_mb']:.0f} MB")
+        return f"Stage {event['stage']}: {', '.join(parts)}"
+    if event['event'] == 'progress':
+        total = '' if event['total'] is None else f" of {event['total']}"
+        return f"{event['stage']}: {event['done']}{total} {event['unit']}"
+    return None
+
+def console_handler(event):
+    # Print every message, finished stage and the throttled progress
+    if event['event'] == 'message':
+        print(event['text'])
+        return
+    summary = event_summary(event)
+    if summary is not None:
+        print(f'#   {summary}')
+# ------------------------------------------------------------- #
+
+
+
+# Profiling Functions
+# ------------------------------------------------------------- #
+def profile_call(path, function, *args, **kwargs):
+    # Run the function under cProfile, save the stats for snakeviz/pstats and print the top entries
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        print(f'#   Profile saved to {path}; the slowest calls were:')
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+# ------------------------------------------------------------- #
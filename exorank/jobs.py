@@ -0,0 +1,125 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Background Jobs
+#
+# Purpose: Run ranking jobs one after another on a worker thread, so the
+#          GUI stays responsive and a running job can be cancelled
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import queue
+import itertools
+import threading
+from .instrument import add_event_handler, remove_event_handler, cancel_checks
+# ------------------------------------------------------------- #
+
+
+
+# Job Queue
+# ------------------------------------------------------------- #
+class JobCancelled(Exception):
+    # Raised inside a job at its next stage or progress event after cancel() was called
+    pass
+
+
+class JobQueue:
+    def __init__(self, on_event):
+        # on_event gets every job and stage event dict, tagged with the job id; it is called
+        # from the worker thread, so a GUI should hand it to window.write_event_value
+        self.on_event = on_event
+        self.jobs = queue.Queue()
+        self.job_ids = itertools.count(1)
+        self.pending = set()
+        self.running = None
+        self.cancelled = set()
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self.work, name='exorank-jobs', daemon=True)
+        self.worker.start()
+        add_event_handler(self.forward)
+        cancel_checks.append(self.check)
+
+    def submit(self, function, *args, **kwargs):
+        # Queue a job behind the ones already waiting and return its id
+        job_id = next(self.job_ids)
+        with self.lock:
+            self.pending.add(job_id)
+        self.jobs.put((job_id, function, args, kwargs))
+        self.on_event({'event': 'job_queued', 'job': job_id, 'queued': self.queued()})
+        return job_id
+
+    def queued(self):
+        # Number of jobs waiting behind the running one
+        with self.lock:
+            return len(self.pending)
+
+    def cancel(self, job_id=None):
+        # Cancel one job, or the running job if no id is given; waiting jobs are skipped when they come up
+        with self.lock:
+            if job_id is None:
+                job_id = self.running
+            if job_id is not None:
+                self.cancelled.add(job_id)
+        return job_id
+
+    def cancel_all(self):
+        with self.lock:
+            self.cancelled.update(self.pending)
+            if self.running is not None:
+                self.cancelled.add(self.running)
+
+    def close(self, timeout=None):
+        # Cancel everything, stop the worker and wait for it to finish the current chunk
+        self.cancel_all()
+        self.jobs.put(None)
+        self.worker.join(timeout)
+        remove_event_handler(self.forward)
+        if self.check in cancel_checks:
+            cancel_checks.remove(self.check)
+
+    def check(self):
+        # Called at every chunk; raises in the worker once the running job is cancelled
+        if threading.current_thread() is not self.worker:
+            return
+        with self.lock:
+            job_id = self.running
+            cancelled = job_id in self.cancelled
+        if cancelled:
+            raise JobCancelled(f'Job {job_id} was cancelled')
+
+    def forward(self, event):
+        # Pass the running job's stage and progress events on, and stop it here once it is cancelled
+        if threading.current_thread() is not self.worker:
+            return
+        self.check()
+        self.on_event(dict(event, job=self.running))
+
+    def work(self):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                return
+            job_id, function, args, kwargs = item
+            with self.lock:
+                self.pending.discard(job_id)
+                skip = job_id in self.cancelled
+                self.running = None if skip else job_id
+            if skip:
+                self.on_event({'event': 'job_cancelled', 'job': job_id, 'queued': self.queued()})
+                continue
+
+            # Report how the job ended; errors are passed to on_event instead of killing the worker
+            self.on_event({'event': 'job_start', 'job': job_id, 'queued': self.queued()})
+            try:
+                result = function(*args, **kwargs)
+                event = {'event': 'job_done', 'job': job_id, 'result': result}
+            except JobCancelled:
+                event = {'event': 'job_cancelled', 'job': job_id}
+            except Exception as error:
+                event = {'event': 'job_failed', 'job': job_id, 'error': error}
+            with self.lock:
+                self.running = None
+                self.cancelled.discard(job_id)
+            event['queued'] = self.queued()
+            self.on_event(event)
+# ------------------------------------------------------------- #
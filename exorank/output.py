@@ -0,0 +1,241 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Output Writing
+#
+# Purpose: Split the ranked table into subject sets and save them
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .tables import table_frame
+from .controls import plan_controls, save_control_manifest
+from .instrument import stage, progress, message
+from .tablecache import file_hash
+from .stream import is_ranked_plan, plan_columns, plan_tables
+from .checkpoint import checkpoint_dir, export_journal_path, save_plan, load_plan, read_export_journal, verified_records, open_export_journal, journal_subject_set
+# ------------------------------------------------------------- #
+
+
+
+# Subject Set Functions
+# ------------------------------------------------------------- #
+def subject_set_rows(start, stop, n_positive_rows, positive, negative, seed):
+    # Row numbers into the stacked [ranked rows start:stop, true-positive, true-negative] tables for one chunk
+    n_ranked = stop - start
+    rows = np.concatenate([np.arange(n_ranked), n_ranked + positive, n_ranked + n_positive_rows + negative])
+    
+    # Shuffle with a generator seeded by the run seed and the chunk start, so every chunk is reproducible on its own
+    return rows[np.random.default_rng([seed, start]).permutation(len(rows))]
+
+def build_subject_set(tables, rows, start):
+    # The rows number the [ranked, true-positive, true-negative] tables as if they were stacked;
+    # each table gives its own rows, so no stacked copy of the tables is made
+    offsets = np.cumsum([0] + [len(table) for table in tables])
+    parts = []
+    positions = []
+    for table, low, high in zip(tables, offsets[:-1], offsets[1:]):
+        inside = (rows >= low) & (rows < high)
+        parts.append(table.take(rows[inside] - low))
+        positions.append(np.flatnonzero(inside))
+    
+    # Put the gathered rows back in the chunk's shuffled order
+    chunk = pd.concat(parts, ignore_index=True)
+    chunk = chunk.take(np.argsort(np.concatenate(positions), kind='stable')).reset_index(drop=True)
+    
+    target_ids = list(range(start, (start + len(chunk))))
+    chunk['#Target ID'] = target_ids
+    
+    # Return the finished subject set
+    return chunk
+
+def write_subject_set(chunk, path, checksum=False):
+    # Save one subject set to a CSV file; this runs inside the writer pool, which also
+    # hashes the file for the export journal when asked to
+    chunk.to_csv(path, index=False)
+    return path, file_hash(path) if checksum else None
+
+def table_digest(table):
+    # Content hash of a DataFrame, used to tell whether a journaled export came from the same tables
+    return hashlib.sha1(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes()).hexdigest()
+
+def ranking_digest(ranked_table):
+    # A streamed ranking plan is hashed by its file version, its rows and ranks, and its top-k cut
+    if not is_ranked_plan(ranked_table):
+        return table_digest(ranked_table)
+    stat = os.stat(ranked_table['file'])
+    plan = pd.DataFrame({key: ranked_table[key] for key in ('rows', 'ranks')})
+    return f"{table_digest(plan)}-{ranked_table['top_k']}-{stat.st_size}-{stat.st_mtime_ns}"
+# ------------------------------------------------------------- #
+
+
+
+# Save Final Table Function
+# ------------------------------------------------------------- #
+def rank_table_save(ranked_table, additional_table, output, chunk_size, true_positive_perc, true_negative_perc, bad_table, output_dir='Output', seed=1, workers=1, output_format='csv', controls_replace=True, checkpoint=False, resume=False):
+    # Print a message indicating that the table is being saved
+    message('')
+    message('#           Table Is Being Saved!             #')
+    message('')
+    
+    # Convert the ranked table and additional table to pandas DataFrames
+    with stage('sort') as record:
+        if is_ranked_plan(ranked_table):
+            # A streamed ranking is already in rank order, and its rows are read from the file
+            # one batch of subject sets at a time while they are written
+            df = None
+            n_ranked = len(ranked_table['rows'])
+            columns = plan_columns(ranked_table) + ['#BITMASK']
+        else:
+            df = pd.DataFrame(ranked_table)
+            
+            # Top-k tables are already in rank order, so they skip the sort; ties keep their table order
+            if not df['#Target ID'].is_monotonic_increasing:
+                df = df.sort_values(by='#Target ID', kind='stable')
+            df['#BITMASK'] = 1 
+            n_ranked = len(df)
+            columns = df.columns
+        record['rows'] = n_ranked
+    
+    additional_df = table_frame(additional_table)
+    additional_df = additional_df.reindex(columns=columns, fill_value=np.nan)
+    
+    bad_df = table_frame(bad_table)
+    bad_df = bad_df.reindex(columns=columns, fill_value=np.nan)
+    
+    # Everything that decides the content of the subject sets; a resumed export only reuses
+    # the control plan and the journaled subject sets of an export with the same settings
+    checkpoint = checkpoint or resume
+    if checkpoint:
+        with stage('fingerprint', rows=n_ranked):
+            settings = {
+                'ranking': ranking_digest(ranked_table if df is None else df),
+                'true_positive': table_digest(additional_df),
+                'true_negative': table_digest(bad_df),
+                'chunk_size': chunk_size,
+                'true_positive_perc': true_positive_perc,
+                'true_negative_perc': true_negative_perc,
+                'seed': seed,
+                'controls_replace': controls_replace,
+                'output_format': output_format,
+            }
+    
+    # Determine the number of additional rows to add
+    num_random_rows = int(true_positive_perc * chunk_size)
+    num_random_rows = min(num_random_rows, len(additional_df))
+    
+    bad_num_random_rows = int(true_negative_perc * chunk_size)
+    bad_num_random_rows = min(bad_num_random_rows, len(bad_df))
+    
+    chunk_size = chunk_size - bad_num_random_rows - num_random_rows
+    if chunk_size <= 0:
+        raise ValueError('The true-positive and true-negative rows fill the whole chunk; lower the percentages or raise the chunk size')
+    
+    # Draw the control rows of every chunk up front from one seeded generator
+    with stage('sample') as record:
+        starts = range(0, n_ranked, chunk_size)
+        plan = load_plan(checkpoint_dir(output_dir, output), settings) if resume else None
+        if plan is None:
+            plan = plan_controls(len(starts), len(additional_df), num_random_rows, len(bad_df), bad_num_random_rows, seed, replace=controls_replace)
+            if checkpoint:
+                save_plan(checkpoint_dir(output_dir, output), settings, plan)
+        record['rows'] = n_ranked + len(additional_df) + len(bad_df)
+    def subject_set(chunk, ranked_rows):
+        # One subject set from its ranked rows and its planned control rows
+        start = starts[chunk]
+        rows = subject_set_rows(start, start + len(ranked_rows), len(additional_df), plan['true_positive'][chunk], plan['true_negative'][chunk], seed)
+        return build_subject_set([ranked_rows, additional_df, bad_df], rows, start)
+    def subject_sets(chunks):
+        # The subject sets of the given chunks, in order; a streamed ranking gathers their ranked rows
+        # from the file in batches, a ranked table is sliced
+        ranges = [(starts[chunk], min(starts[chunk] + chunk_size, n_ranked)) for chunk in chunks]
+        if df is None:
+            for chunk, ranked_rows in zip(chunks, plan_tables(ranked_table, ranges)):
+                ranked_rows['#BITMASK'] = 1
+                yield chunk, subject_set(chunk, ranked_rows)
+        else:
+            for chunk, (start, stop) in zip(chunks, ranges):
+                yield chunk, subject_set(chunk, df.iloc[start:stop])
+    
+    # Writing is timed as one stage, with progress after every subject set
+    with stage('write', output_dir=output_dir) as record:
+        # Make sure the output directory exists
+        os.makedirs(output_dir, exist_ok=True)
+        if output_format == 'parquet':
+            files = [f'{output}_subjectsets.parquet'] * len(starts)
+        else:
+            files = [f'{output}_subjectset_{i}.csv' for i in starts]
+        
+        # A checkpointed export journals every finished subject set with its checksum; resuming
+        # skips the journaled ones whose file is still on disk unchanged
+        done, journal = {}, None
+        if checkpoint:
+            journal_path = export_journal_path(output_dir, output)
+            if resume:
+                done = verified_records(output_dir, read_export_journal(journal_path, settings))
+            journal = open_export_journal(journal_path, settings, done)
+        todo = [chunk for chunk in range(len(starts)) if files[chunk] not in done]
+        def finished(chunk, digest, rows):
+            if journal is not None:
+                journal_subject_set(journal, files[chunk], digest, os.path.getsize(os.path.join(output_dir, files[chunk])), rows)
+        def set_rows(chunk):
+            return min(starts[chunk] + chunk_size, n_ranked) - starts[chunk] + num_random_rows + bad_num_random_rows
+        
+        try:
+            if output_format == 'parquet':
+                # Stream every subject set into one Parquet file as its own row group, tagged with the chunk
+                # start it would have as a CSV; a file has one writer, so the writer pool is not used here
+                if todo:
+                    try:
+                        # pyarrow is optional, so it is only imported when Parquet output is asked for
+                        import pyarrow as pa
+                        import pyarrow.parquet as pq
+                    except ImportError:
+                        raise ValueError('Writing Parquet subject sets requires pyarrow (pip install pyarrow), or use the CSV format')
+                    writer = None
+                    try:
+                        for chunk, part in subject_sets(range(len(starts))):
+                            part.insert(0, '#Subject Set', starts[chunk])
+                            part = pa.Table.from_pandas(part, schema=None if writer is None else writer.schema, preserve_index=False)
+                            if writer is None:
+                                writer = pq.ParquetWriter(os.path.join(output_dir, files[0]), part.schema)
+                            writer.write_table(part)
+                            progress('write', chunk + 1, len(starts), unit='subject sets')
+                    finally:
+                        if writer is not None:
+                            writer.close()
+                    finished(0, file_hash(os.path.join(output_dir, files[0])) if checkpoint else None, sum(map(set_rows, range(len(starts)))))
+                
+            elif workers <= 1:
+                # Loop over the DataFrame in chunks of the specified size
+                for n, (chunk, part) in enumerate(subject_sets(todo)):
+                    path, digest = write_subject_set(part, os.path.join(output_dir, files[chunk]), checksum=checkpoint)
+                    finished(chunk, digest, set_rows(chunk))
+                    progress('write', len(done) + n + 1, len(starts), unit='subject sets')
+                
+            else:
+                # Gather each chunk here and save it in a process pool, keeping only a few chunks in flight at a time
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = []
+                    for n, (chunk, part) in enumerate(subject_sets(todo)):
+                        pending.append((chunk, pool.submit(write_subject_set, part, os.path.join(output_dir, files[chunk]), checksum=checkpoint)))
+                        if len(pending) >= 2 * workers:
+                            written, future = pending.pop(0)
+                            finished(written, future.result()[1], set_rows(written))
+                            progress('write', len(done) + n + 1 - len(pending), len(starts), unit='subject sets')
+                    for written, future in pending:
+                        finished(written, future.result()[1], set_rows(written))
+                    progress('write', len(starts), len(starts), unit='subject sets')
+        finally:
+            if journal is not None:
+                journal.close()
+        
+        # Save which controls went into each subject set, for later validation
+        save_control_manifest(plan, starts, files, os.path.join(output_dir, f'{output}_controls.json'))
+        written = set(files[chunk] for chunk in todo)
+        record.update(rows=sum(map(set_rows, todo)), bytes_written=sum(os.path.getsize(os.path.join(output_dir, name)) for name in written), skipped=len(starts) - len(todo))
+# ------------------------------------------------------------- #
@@ -0,0 +1,233 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Pipeline
+#
+# Purpose: Library entry points that run ExoRANK without the GUI
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import numpy as np
+from .tables import read_table, read_fits_columns, table_frame, column_read, native_column
+from .ranking import parm_metrix, ranking_mult, rank_keys, rank_table
+from .output import rank_table_save
+from .spec import validate_spec, spec_columns
+from .stream import stream_rank, is_ranked_plan
+from .shards import is_sharded, rank_shards
+from .transforms import spec_transforms, transform_key
+from .cache import file_key, cache_get, cache_put, cache_info
+from .tablecache import cached_filetype_list, read_cached_columns, store_table_columns
+from .instrument import stage, memory_limit, message
+from .sky import default_cell_deg, build_sky_index, region_rows, top_per_cell_rows
+from .columns import compact_column, column_store, take_rows
+from .checkpoint import checkpoint_dir, ranking_fingerprint, save_ranking, load_ranking
+from .sweep import default_sweep_top_k, sweep_weights, weight_sweep, sweep_table, stable_targets
+# ------------------------------------------------------------- #
+
+
+
+# Library Entry Points
+# ------------------------------------------------------------- #
+def rank(table, columns, types, scalings, top_k=None):
+    # The RA and DEC columns are carried through to the ranked table
+    try:
+        ra_list = native_column(table['RA'])
+        dec_list = native_column(table['DEC'])
+    except KeyError:
+        raise ValueError('The ranking table needs columns named "RA" and "DEC"')
+    
+    # Read, transform and score the ranking columns
+    with stage('transform', rows=len(ra_list)):
+        column_space = column_read(table, columns, types)
+        parameter_matrix = parm_metrix(column_space, types)
+    with stage('score', rows=len(ra_list)):
+        ranked_list = ranking_mult(parameter_matrix, scalings)
+    
+    # Return the ranked table as a DataFrame, keeping only the best top_k rows if given
+    with stage('rank', rows=len(ra_list)):
+        return rank_table(table, ranked_list, ra_list, dec_list, columns, column_space, top_k=top_k)
+
+def load_columns(file, filetype, columns, table_cache=True, cache_verify='mtime'):
+    with stage('read', file=file) as record:
+        table = read_columns(file, filetype, columns, table_cache=table_cache, cache_verify=cache_verify)
+        
+        # Memory-mapped columns only read the bytes they hold; parsed tables read the whole file
+        first = table[next(iter(table))]
+        record['rows'] = len(first)
+        if filetype == 'FITS' or isinstance(first, np.memmap):
+            record['bytes_read'] = sum(column.nbytes for column in table.values())
+        else:
+            record['bytes_read'] = os.path.getsize(file)
+    return table
+
+def read_columns(file, filetype, columns, table_cache=True, cache_verify='mtime'):
+    # FITS tables are memory-mapped directly, and only the needed columns are mapped
+    if filetype == 'FITS':
+        return read_fits_columns(file, columns)
+    if not table_cache or filetype not in cached_filetype_list:
+        table = read_table(file, filetype)
+        return {column: native_column(table[column]) for column in dict.fromkeys(columns)}
+    
+    # Other formats are parsed once and their columns kept on disk for the next run
+    cached = read_cached_columns(file, filetype, columns, verify=cache_verify)
+    if cached is not None:
+        message(f'#   Table cache hit for {file}, memory-mapping the cached columns')
+        return cached
+    message(f'#   Table cache miss for {file}, parsing the table and caching its columns')
+    table = read_table(file, filetype)
+    return store_table_columns(file, filetype, {column: native_column(table[column]) for column in dict.fromkeys(columns)}, verify=cache_verify)
+
+def load_parameters(file, filetype, user_options, user_types, table_cache=True, cache_verify='mtime', precision='float64'):
+    # The transformed columns only depend on the file and the column/type choices (each type's
+    # expression or function, domain and invalid policy), not on the scalings; spec transforms are
+    # keyed by their expression, so they hit again in the next run that declares them
+    transforms = tuple(transform_key(current_type) for current_type in user_types)
+    key = ('parameters',) + file_key(file) + (filetype, tuple(user_options), tuple(user_types), transforms, precision)
+    entry = cache_get(key)
+    if entry is not None:
+        message(f"#   Parameter cache hit for {file} ({cache_info()['hits']} hits, {cache_info()['misses']} misses)")
+        return entry
+    message(f"#   Parameter cache miss for {file}, reading and transforming the table")
+    
+    # Read only the needed columns where the format allows it
+    try:
+        table = load_columns(file, filetype, ['RA', 'DEC'] + list(user_options), table_cache=table_cache, cache_verify=cache_verify)
+    except KeyError as error:
+        if error.args and error.args[0] in ('RA', 'DEC'):
+            raise ValueError('The ranking table needs columns named "RA" and "DEC"')
+        raise
+    
+    # Columns are copied out of a parsed table so the cache does not keep the whole table alive,
+    # while columns mapped from the table cache or already converted by native_column are kept as they are
+    with stage('transform', rows=len(table['RA'])):
+        column_space = [compact_column(column) for column in column_read(table, user_options, user_types)]
+        entry = column_store(compact_column(table['RA']), compact_column(table['DEC']), column_space, parm_metrix(column_space, user_types, dtype=np.dtype(precision)))
+    return cache_put(key, entry)
+
+def load_table(file, filetype):
+    # Control tables are cached as DataFrames until the file changes
+    key = ('table',) + file_key(file) + (filetype,)
+    table = cache_get(key)
+    if table is None:
+        with stage('read', file=file) as record:
+            table = cache_put(key, table_frame(read_table(file, filetype)))
+            record.update(rows=len(table), bytes_read=os.path.getsize(file))
+    return table
+
+def load_sky_index(file, filetype, entry, cell_deg=default_cell_deg):
+    # The sky index of a file is built once per cell size and kept with the parameter cache
+    key = ('sky',) + file_key(file) + (filetype, cell_deg)
+    index = cache_get(key)
+    if index is None:
+        with stage('index', rows=len(entry['ra'])):
+            index = cache_put(key, build_sky_index(entry['ra'], entry['dec'], cell_deg))
+    return index
+
+def rank_file(file, filetype, user_options, user_types, user_scalings, top_k=None, table_cache=True, cache_verify='mtime', region=None, top_per_cell=None, sky_cell_deg=default_cell_deg, precision='float64'):
+    # Re-ranking with new scalings reuses the cached column store and only redoes the weighted sum
+    store = load_parameters(file, filetype, user_options, user_types, table_cache=table_cache, cache_verify=cache_verify, precision=precision)
+    
+    # A sky region is looked up in the sky index before scoring, so only the selected rows are scored
+    if region is not None or top_per_cell is not None:
+        index = load_sky_index(file, filetype, store, sky_cell_deg)
+    if region is not None:
+        with stage('select', rows=len(store['ra'])) as record:
+            store = take_rows(store, region_rows(index, store['ra'], store['dec'], region))
+            record['selected'] = len(store['ra'])
+    with stage('score', rows=len(store['ra'])):
+        ranked_list = ranking_mult(store['parameter_matrix'], user_scalings)
+    
+    # Optionally keep only the best rows of every sky cell, so targets are spread over the sky
+    if top_per_cell is not None:
+        with stage('top_per_cell', rows=len(ranked_list)) as record:
+            keep = top_per_cell_rows(index['cells'][store['row_id']], rank_keys(ranked_list), top_per_cell)
+            store = take_rows(store, keep)
+            ranked_list = ranked_list[keep]
+            record['selected'] = len(keep)
+    
+    with stage('rank', rows=len(ranked_list)):
+        return rank_table(None, ranked_list, store['ra'], store['dec'], user_options, store['column_space'], top_k=top_k)
+
+def run(spec):
+    # Check the spec before reading anything
+    spec = validate_spec(spec)
+    user_options, user_types, user_scalings = spec_columns(spec)
+    
+    # The spec's custom column types are available to the transforms for this run only
+    with spec_transforms(spec['transforms']):
+        # Read the tables and rank them, streaming the ranking table in chunks if asked to
+        additional_table = load_table(spec['tp_file'], spec['type'])
+        bad_table = load_table(spec['tn_file'], spec['type'])
+        
+        # A memory limit covers the ranking and the export, and is checked at every stage and progress step
+        with memory_limit(spec['max_rss_mb']):
+            # A checkpointed run keeps the ranked table next to its output, and reuses it while the
+            # ranking files and the ranking settings are unchanged, whatever the export settings
+            ranked_table = None
+            if spec['checkpoint']:
+                fingerprint = ranking_fingerprint(spec)
+                with stage('load_checkpoint') as record:
+                    ranked_table = load_ranking(checkpoint_dir(spec['output_dir'], spec['output']), fingerprint)
+                    record['reused'] = ranked_table is not None
+            reused = ranked_table is not None
+            if reused:
+                message('#   Reusing the checkpointed ranking')
+            elif is_sharded(spec['file']):
+                # A directory or glob of ranking files is scored shard by shard on several cores
+                ranked_table = rank_shards(spec['file'], spec['type'], user_options, user_types, user_scalings, workers=spec['shard_workers'], top_k=spec['top_k'], table_cache=spec['table_cache'], cache_verify=spec['cache_verify'], transforms=spec['transforms'], region=spec['region'], top_per_cell=spec['top_per_cell'], sky_cell_deg=spec['sky_cell_deg'], precision=spec['precision'])
+            elif spec['stream']:
+                ranked_table, report = stream_rank(spec['file'], spec['type'], user_options, user_types, user_scalings, chunk_memory_mb=spec['chunk_memory_mb'], top_k=spec['top_k'], table_cache=spec['table_cache'], cache_verify=spec['cache_verify'], region=spec['region'], precision=spec['precision'])
+            else:
+                ranked_table = rank_file(spec['file'], spec['type'], user_options, user_types, user_scalings, top_k=spec['top_k'], table_cache=spec['table_cache'], cache_verify=spec['cache_verify'], region=spec['region'], top_per_cell=spec['top_per_cell'], sky_cell_deg=spec['sky_cell_deg'], precision=spec['precision'])
+            if spec['checkpoint'] and not reused:
+                with stage('save_checkpoint', rows=len(ranked_table['rows']) if is_ranked_plan(ranked_table) else len(ranked_table)):
+                    save_ranking(ranked_table, checkpoint_dir(spec['output_dir'], spec['output']), fingerprint)
+        
+            # Save the subject sets
+            rank_table_save(ranked_table, additional_table, spec['output'], spec['chunk_size'], spec['true_positive_perc'], spec['true_negative_perc'], bad_table, output_dir=spec['output_dir'], seed=spec['seed'], workers=spec['workers'], output_format=spec['output_format'], controls_replace=spec['controls_replace'], checkpoint=spec['checkpoint'], resume=spec['resume'])
+        
+        # Return the ranked table, or the ranking plan of a streamed run
+        return ranked_table
+
+def sweep(spec, steps=None, samples=None, top_k=None):
+    # Check the spec before reading anything; its scalings are the reference of the sweep
+    spec = validate_spec(spec)
+    user_options, user_types, user_scalings = spec_columns(spec)
+    if is_sharded(spec['file']):
+        raise ValueError('A weight sweep needs one ranking file, not a directory or glob of shards')
+    if top_k is None:
+        top_k = spec['top_k'] or default_sweep_top_k
+    elif top_k <= 0:
+        raise ValueError('The sweep top_k must be a positive integer')
+    
+    # The spec's custom column types are available to the transforms for this sweep only
+    with spec_transforms(spec['transforms']):
+        # The transformed columns are read once (or taken from the cache), and the sky region applied
+        store = load_parameters(spec['file'], spec['type'], user_options, user_types, table_cache=spec['table_cache'], cache_verify=spec['cache_verify'], precision=spec['precision'])
+        if spec['region'] is not None:
+            index = load_sky_index(spec['file'], spec['type'], store, spec['sky_cell_deg'])
+            with stage('select', rows=len(store['ra'])) as record:
+                store = take_rows(store, region_rows(index, store['ra'], store['dec'], spec['region']))
+                record['selected'] = len(store['ra'])
+        
+        # The true-positive targets are transformed the same way, so they can be scored alongside
+        try:
+            tp_matrix = parm_metrix(column_read(load_table(spec['tp_file'], spec['type']), user_options, user_types), user_types, verbose=False)
+        except KeyError as error:
+            raise ValueError(f'The true-positive table has no column {error.args[0]!r}')
+        
+        # Every scaling vector is scored in one pass over the parameter matrix
+        weights = sweep_weights(user_scalings, steps=steps, samples=samples, seed=spec['seed'])
+        with stage('sweep', rows=len(store['ra']), vectors=len(weights)):
+            report = weight_sweep(store['parameter_matrix'], weights, top_k, tp_matrix)
+        
+        # Save one row per scaling vector, and the targets that made the top-k most often
+        with stage('write', output_dir=spec['output_dir']) as record:
+            os.makedirs(spec['output_dir'], exist_ok=True)
+            report['files'] = [os.path.join(spec['output_dir'], f"{spec['output']}_sweep.csv"), os.path.join(spec['output_dir'], f"{spec['output']}_sweep_targets.csv")]
+            sweep_table(report, user_options).to_csv(report['files'][0], index=False)
+            stable_targets(report, store['ra'], store['dec'], store['row_id']).to_csv(report['files'][1], index=False)
+            record['bytes_written'] = sum(os.path.getsize(file) for file in report['files'])
+        return report
+# ------------------------------------------------------------- #
@@ -0,0 +1,174 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Ranking Engine
+#
+# Purpose: Transform the ranking columns and score every row
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from .transforms import apply_transform, get_transform, transform_domain, invalid_policy
+from .instrument import message, progress
+# ------------------------------------------------------------- #
+
+
+# Ranking Settings
+# ------------------------------------------------------------- #
+# Rows scored at a time, so the scaled copy of the parameter matrix stays small
+score_block_rows = 65536
+# ------------------------------------------------------------- #
+
+
+# Matrix Creation Functions
+# ------------------------------------------------------------- #
+def parm_transform(column, current_type):
+    # Apply the registered transform of this column type to the whole column
+    return apply_transform(column, current_type)[0]
+
+def parm_metrix(column_space, user_types, verbose=True, invalid_counts=None, dtype=np.float64):
+    # Print a message indicating that the parameter space is being read
+    if verbose:
+        message('')
+        message('#           Parameter Space is Being Read!             #')
+    
+    # Each transformed column is written straight into its column of one (rows, parameters) matrix,
+    # which is float64 unless a smaller dtype is asked for
+    total_parm_space = np.empty((len(column_space[0]), len(user_types)), dtype=dtype)
+    
+    # Apply one transform per column, looking up the type once instead of once per cell
+    for j in range(len(user_types)):
+        temp_value, n_invalid = apply_transform(column_space[j], user_types[j])
+        with np.errstate(over='ignore'):
+            total_parm_space[:, j] = temp_value
+        
+        # A score beyond the float32 range would become inf and tie with every other such score,
+        # so from that column on the matrix is kept as float64
+        if total_parm_space.dtype != np.float64 and (np.isinf(total_parm_space[:, j]) & np.isfinite(temp_value)).any():
+            total_parm_space = total_parm_space.astype(np.float64)
+            total_parm_space[:, j] = temp_value
+            if verbose:
+                message(f'#   Parameter {j + 1} ({user_types[j]}) has scores beyond the {np.dtype(dtype).name} range, so the parameters are kept as float64')
+        
+        # Invalid values follow the type's invalid policy, so say how many there were
+        if invalid_counts is not None:
+            invalid_counts[j] = invalid_counts.get(j, 0) + n_invalid
+        if verbose and n_invalid:
+            transform = get_transform(user_types[j])
+            message(f'#   Parameter {j + 1} ({user_types[j]}): {n_invalid} values outside {transform_domain(transform)} or without a finite score were set to {invalid_policy(transform)}')
+        
+        # A whole table reports each finished column, which also lets a cancelled job stop here
+        if verbose:
+            progress('transform', j + 1, len(user_types), unit='columns')
+    
+    # Print a message indicating that the parameter space has been read
+    if verbose:
+        message('#           Parameter Space Has Been Read!             #')
+        message('')
+    
+    # Return the total parameter space matrix
+    return total_parm_space
+# ------------------------------------------------------------- #
+
+
+
+# Matrix Ranking Functions
+# ------------------------------------------------------------- #
+def ranking_mult(parameter_matrix, user_scalings, verbose=True):
+    # Print a message indicating that the table is being ranked
+    if verbose:
+        message('')
+        message('#           Table Is Being Ranked!             #')
+    
+    # Float matrices are used as they are (float32 ones are widened block by block); anything else becomes float64
+    parameter_matrix = np.asarray(parameter_matrix)
+    if parameter_matrix.dtype.kind != 'f':
+        parameter_matrix = parameter_matrix.astype(np.float64)
+    user_scalings = np.asarray([float(scaling) for scaling in user_scalings], dtype=np.float64)
+    
+    # Scale the parameter columns and sum each row ignoring NaNs, one block of rows at a time
+    total_rank_list = np.empty(len(parameter_matrix), dtype=np.float64)
+    for start in range(0, len(parameter_matrix), score_block_rows):
+        block = parameter_matrix[start:start + score_block_rows].astype(np.float64, copy=False)
+        total_rank_list[start:start + score_block_rows] = np.nansum(block * user_scalings, axis=1)
+        if verbose:
+            progress('score', min(start + score_block_rows, len(parameter_matrix)), len(parameter_matrix))
+        
+    # Print a message indicating that the table has been ranked
+    if verbose:
+        message('#           Table Has Been Ranked!             #')
+        message('')
+    
+    # Return the total rank array
+    return total_rank_list
+
+def rank_keys(ranked_list):
+    # Sort keys for best-first ordering; numpy sorts NaN after every number, so NaN ranks go last
+    return -np.asarray(ranked_list, dtype=np.float64)
+
+def top_rows(ranked_list, top_k):
+    # Ranks are ordered best first, with NaN ranks sorted last
+    keys = rank_keys(ranked_list)
+    
+    # Find the k-th best rank in linear time instead of sorting every row
+    threshold = np.partition(keys, top_k - 1)[top_k - 1]
+    
+    # Keep every row better than the threshold, then fill up with tied rows in table order
+    if np.isnan(threshold):
+        better = np.flatnonzero(~np.isnan(keys))
+        tied = np.flatnonzero(np.isnan(keys))[:top_k - len(better)]
+    else:
+        better = np.flatnonzero(keys < threshold)
+        tied = np.flatnonzero(keys == threshold)[:top_k - len(better)]
+    
+    # Return the selected row indices in table order
+    return np.sort(np.concatenate([better, tied]))
+
+def rank_order(ranked_list, top_k=None):
+    # Ranks are ordered best first, with NaN ranks sorted last and ties kept in table order
+    keys = rank_keys(ranked_list)
+    
+    # Sort every row when no top-k cut is asked for
+    if top_k is None or top_k >= len(keys):
+        return np.argsort(keys, kind='stable')
+    
+    # Otherwise only the selected top-k rows are sorted
+    selected = top_rows(ranked_list, top_k)
+    return selected[np.argsort(keys[selected], kind='stable')]
+
+def rank_table(table, ranked_list, ra_list, dec_list, user_options, column_space, top_k=None):
+    # Print a message indicating that ranks are being added to the table
+    message('#      Ranks Are Being Added to Table!         #')
+    message('')
+    
+    # With a top-k cut, only the best rows are gathered, already in rank order
+    if top_k is not None:
+        order = rank_order(ranked_list, top_k)
+        df = pd.DataFrame({
+        'RA': np.asarray(ra_list)[order],
+        'DEC': np.asarray(dec_list)[order],
+        '#RANK': np.asarray(ranked_list)[order],
+        '#Target ID': np.arange(1, len(order) + 1, dtype=np.float64),
+                        })
+        
+        for i in range(len(user_options)): 
+            df[f'#{user_options[i]}'] = np.asarray(column_space[i])[order]
+        
+        # Return the top-k table
+        return df
+
+    df = pd.DataFrame({
+    'RA': ra_list,
+    'DEC': dec_list,
+    '#RANK': ranked_list, 
+                    })
+    
+    df['#Target ID'] = df['#RANK'].rank(ascending=False)
+
+    for i in range(len(user_options)): 
+        df[f'#{user_options[i]}'] = column_space[i]
+    
+    # Return the updated table
+    return df
+# ------------------------------------------------------------- #
@@ -0,0 +1,154 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Sharded Ranking
+#
+# Purpose: Score many ranking files on several cores and merge them into
+#          one ranking, identical to ranking their concatenation
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .tables import column_read, native_column
+from .ranking import parm_metrix, ranking_mult, rank_keys, rank_order
+from .transforms import register_spec_transforms
+from .instrument import stage, progress, message
+from .sky import default_cell_deg, region_mask, sky_cells, top_per_cell_rows
+# ------------------------------------------------------------- #
+
+
+# Shard File Settings
+# ------------------------------------------------------------- #
+# File extensions picked up when a directory of shards is given
+shard_extensions = {
+    'CSV': ('.csv',),
+    'FITS': ('.fits', '.fit', '.fits.gz'),
+    'ASCII': ('.txt', '.dat', '.ascii'),
+    'IPAC': ('.tbl', '.ipac', '.txt'),
+}
+# ------------------------------------------------------------- #
+
+
+
+# Shard Finding Functions
+# ------------------------------------------------------------- #
+def is_sharded(file):
+    # A directory or a glob pattern names several shards; a plain path is a single table
+    return os.path.isdir(file) or glob.has_magic(file)
+
+def shard_files(file, filetype):
+    # Shards are ranked in sorted file name order, which is the order of the equivalent single file
+    if os.path.isdir(file):
+        files = [os.path.join(file, name) for name in os.listdir(file) if name.lower().endswith(shard_extensions[filetype])]
+    else:
+        files = glob.glob(file)
+    files = sorted(path for path in files if os.path.isfile(path))
+    if len(files) == 0:
+        raise ValueError(f'No {filetype} ranking files found in {file!r}')
+    return files
+# ------------------------------------------------------------- #
+
+
+
+# Shard Scoring Functions
+# ------------------------------------------------------------- #
+def score_shard(file, filetype, user_options, user_types, user_scalings, top_k=None, table_cache=True, cache_verify='mtime', region=None, precision='float64'):
+    # Imported here so worker processes only load the reader they need
+    from .pipeline import load_columns
+
+    # Read, transform and score one shard, exactly as a single-file run would
+    table = load_columns(file, filetype, ['RA', 'DEC'] + list(user_options), table_cache=table_cache, cache_verify=cache_verify)
+    if region is not None:
+        inside = region_mask(native_column(table['RA']), native_column(table['DEC']), region)
+        table = {column: native_column(values)[inside] for column, values in table.items()}
+    column_space = column_read(table, user_options, user_types)
+    ranked_list = ranking_mult(parm_metrix(column_space, user_types, verbose=False, dtype=np.dtype(precision)), user_scalings, verbose=False)
+
+    # Return the shard already sorted best first (only its top_k rows if given), with its row count
+    order = rank_order(ranked_list, top_k)
+    shard = {'#RANK': ranked_list[order], 'RA': native_column(table['RA'])[order], 'DEC': native_column(table['DEC'])[order]}
+    for i in range(len(user_options)):
+        shard[f'#{user_options[i]}'] = native_column(column_space[i])[order]
+    return shard, len(ranked_list)
+
+def merge_two_runs(first, second):
+    # Merge two best-first runs in linear passes; on ties the first run (earlier rows) comes first
+    first_keys = rank_keys(first['#RANK'])
+    second_keys = rank_keys(second['#RANK'])
+    first_positions = np.arange(len(first_keys)) + np.searchsorted(second_keys, first_keys, side='left')
+    second_positions = np.arange(len(second_keys)) + np.searchsorted(first_keys, second_keys, side='right')
+
+    # Scatter both runs into their merged positions
+    merged = {}
+    for column in first:
+        values = np.empty(len(first_keys) + len(second_keys), dtype=np.result_type(first[column], second[column]))
+        values[first_positions] = first[column]
+        values[second_positions] = second[column]
+        merged[column] = values
+    return merged
+
+def merge_runs(runs):
+    # K-way merge as a tree of two-way merges of neighbouring runs, so ties stay in shard order
+    while len(runs) > 1:
+        runs = [merge_two_runs(runs[i], runs[i + 1]) if i + 1 < len(runs) else runs[i] for i in range(0, len(runs), 2)]
+    return runs[0]
+# ------------------------------------------------------------- #
+
+
+
+# Sharded Ranking Functions
+# ------------------------------------------------------------- #
+def rank_shards(file, filetype, user_options, user_types, user_scalings, workers=None, top_k=None, table_cache=True, cache_verify='mtime', transforms=None, region=None, top_per_cell=None, sky_cell_deg=default_cell_deg, precision='float64'):
+    files = shard_files(file, filetype)
+
+    # Print a message indicating that the shards are being ranked
+    message('')
+    message(f'#           Ranking {len(files)} Shards!             #')
+
+    # The best rows per sky cell can come from anywhere in a shard, so shards are only cut to top_k without it
+    shard_top_k = top_k if top_per_cell is None else None
+    
+    # Score every shard in a process pool; spec transforms are registered in each worker
+    with stage('shards', file=file, shards=len(files)) as record:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=register_spec_transforms, initargs=(transforms,)) as pool:
+            for result in pool.map(score_shard, files, [filetype] * len(files), [user_options] * len(files), [user_types] * len(files), [user_scalings] * len(files), [shard_top_k] * len(files), [table_cache] * len(files), [cache_verify] * len(files), [region] * len(files), [precision] * len(files)):
+                results.append(result)
+                progress('shards', len(results), len(files), unit='shards')
+        n_rows = sum(rows for _, rows in results)
+        record.update(rows=n_rows, bytes_read=sum(os.path.getsize(path) for path in files))
+
+    # Merge the sorted shards into one best-first ranking
+    with stage('merge', rows=n_rows):
+        merged = merge_runs([shard for shard, _ in results])
+        
+        # The merged ranking is best first, so the best rows of each cell keep their order
+        if top_per_cell is not None:
+            keep = top_per_cell_rows(sky_cells(merged['RA'], merged['DEC'], sky_cell_deg), rank_keys(merged['#RANK']), top_per_cell)
+            merged = {column: values[keep] for column, values in merged.items()}
+        if top_k is not None:
+            merged = {column: values[:top_k] for column, values in merged.items()}
+
+    # Build the ranked table in the same layout as rank_table
+    df = pd.DataFrame({
+    'RA': merged['RA'],
+    'DEC': merged['DEC'],
+    '#RANK': merged['#RANK'],
+                    })
+    if top_k is not None:
+        df['#Target ID'] = np.arange(1, len(df) + 1, dtype=np.float64)
+    else:
+        df['#Target ID'] = df['#RANK'].rank(ascending=False)
+    for i in range(len(user_options)):
+        df[f'#{user_options[i]}'] = merged[f'#{user_options[i]}']
+
+    message(f'#   Merged {n_rows} rows from {len(files)} shards')
+    message('')
+
+    # Return the ranked table, already in rank order
+    return df
+# ------------------------------------------------------------- #
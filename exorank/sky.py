@@ -0,0 +1,156 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Sky Index
+#
+# Purpose: Declination-zone/RA-bin grid over the ranking table, for cone
+#          and box selections and for ranking the best targets per sky cell
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+# ------------------------------------------------------------- #
+
+
+# Sky Index Settings
+# ------------------------------------------------------------- #
+# Default height of a declination zone, and rough width of an RA bin, in degrees
+default_cell_deg = 1.0
+
+# Shapes a sky region can have
+region_shape_list = ['cone', 'box']
+# ------------------------------------------------------------- #
+
+
+
+# Sky Region Functions
+# ------------------------------------------------------------- #
+def check_region(region):
+    # A region is {"cone": [ra, dec, radius]} or {"box": [ra_min, ra_max, dec_min, dec_max]}, in degrees
+    if region is None:
+        return None
+    if not isinstance(region, dict) or len(region) != 1 or next(iter(region)) not in region_shape_list:
+        raise ValueError('A sky region must be {"cone": [ra, dec, radius]} or {"box": [ra_min, ra_max, dec_min, dec_max]}')
+    shape, values = next(iter(region.items()))
+    values = [float(value) for value in values]
+    if shape == 'cone':
+        if len(values) != 3 or not 0 < values[2] <= 180 or not -90 <= values[1] <= 90:
+            raise ValueError('A cone needs [ra, dec, radius] with -90 <= dec <= 90 and 0 < radius <= 180')
+        return {'cone': [values[0] % 360, values[1], values[2]]}
+    if len(values) != 4 or not -90 <= values[2] <= values[3] <= 90:
+        raise ValueError('A box needs [ra_min, ra_max, dec_min, dec_max] with -90 <= dec_min <= dec_max <= 90')
+
+    # ra_min > ra_max wraps through RA = 0; a 360 degree wide box keeps every RA
+    if values[1] - values[0] >= 360:
+        return {'box': [0.0, 360.0, values[2], values[3]]}
+    return {'box': [values[0] % 360, values[1] % 360, values[2], values[3]]}
+
+def region_mask(ra_list, dec_list, region):
+    # Exact test of every row, used on the candidate rows of an index query and on streamed chunks
+    ra_list = np.asarray(ra_list, dtype=np.float64) % 360
+    dec_list = np.asarray(dec_list, dtype=np.float64)
+    if 'cone' in region:
+        ra, dec, radius = np.radians(region['cone'])
+        ra_rad, dec_rad = np.radians(ra_list), np.radians(dec_list)
+
+        # Haversine distance, which stays accurate for small cones
+        hav = np.sin((dec_rad - dec) / 2)**2 + np.cos(dec_rad) * np.cos(dec) * np.sin((ra_rad - ra) / 2)**2
+        return hav <= np.sin(radius / 2)**2
+    ra_min, ra_max, dec_min, dec_max = region['box']
+    in_dec = (dec_list >= dec_min) & (dec_list <= dec_max) & np.isfinite(ra_list)
+    if ra_max == 360:
+        return in_dec
+    if ra_min <= ra_max:
+        return in_dec & (ra_list >= ra_min) & (ra_list <= ra_max)
+    return in_dec & ((ra_list >= ra_min) | (ra_list <= ra_max))
+# ------------------------------------------------------------- #
+
+
+
+# Sky Index Functions
+# ------------------------------------------------------------- #
+def zone_bins(cell_deg):
+    # Number of RA bins in each declination zone, fewer towards the poles so cells keep a similar area
+    n_zones = int(np.ceil(180 / cell_deg))
+    edges = -90 + cell_deg * np.arange(n_zones + 1)
+    widest = np.cos(np.radians(np.clip(np.where(edges[:-1] * edges[1:] <= 0, 0, np.minimum(np.abs(edges[:-1]), np.abs(edges[1:]))), 0, 90)))
+    return np.maximum(1, np.floor(360 * widest / cell_deg)).astype(np.int64)
+
+def sky_cells(ra_list, dec_list, cell_deg=default_cell_deg):
+    # Cell number of every row; rows without a finite RA/DEC go into one extra cell after the grid
+    bins = zone_bins(cell_deg)
+    offsets = np.concatenate([[0], np.cumsum(bins)])
+    ra_list = np.asarray(ra_list, dtype=np.float64)
+    dec_list = np.asarray(dec_list, dtype=np.float64)
+    finite = np.isfinite(ra_list) & np.isfinite(dec_list)
+    with np.errstate(invalid='ignore'):
+        zone = np.clip(np.floor((np.clip(dec_list, -90, 90) + 90) / cell_deg), 0, len(bins) - 1)
+    zone = np.where(finite, zone, 0).astype(np.int64)
+    ra_bin = np.floor(np.where(finite, ra_list % 360, 0) / 360 * bins[zone]).astype(np.int64)
+    cells = offsets[zone] + np.minimum(ra_bin, bins[zone] - 1)
+    return np.where(finite, cells, offsets[-1])
+
+def build_sky_index(ra_list, dec_list, cell_deg=default_cell_deg):
+    # Sort the row numbers by cell once; each cell's rows are then one slice of the order
+    cells = sky_cells(ra_list, dec_list, cell_deg)
+    bins = zone_bins(cell_deg)
+    n_cells = int(bins.sum()) + 1
+    order = np.argsort(cells, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=n_cells))])
+    return {
+        'cell_deg': cell_deg,
+        'bins': bins,
+        'offsets': np.concatenate([[0], np.cumsum(bins)]),
+        'cells': cells,
+        'order': order,
+        'starts': starts,
+    }
+
+def zone_range(index, dec_min, dec_max):
+    # Declination zones overlapping [dec_min, dec_max]
+    last = len(index['bins']) - 1
+    first_zone = int(np.clip(np.floor((dec_min + 90) / index['cell_deg']), 0, last))
+    last_zone = int(np.clip(np.floor((dec_max + 90) / index['cell_deg']), 0, last))
+    return range(first_zone, last_zone + 1)
+
+def ra_bins(n_bins, ra_min, ra_max):
+    # RA bins of a zone overlapping [ra_min, ra_max], where ra_min > ra_max wraps through RA = 0
+    if ra_max - ra_min >= 360:
+        return np.arange(n_bins)
+    first = int(np.floor((ra_min % 360) / 360 * n_bins))
+    last = int(np.floor((ra_max % 360) / 360 * n_bins))
+    if (ra_min % 360) <= (ra_max % 360):
+        return np.arange(first, min(last, n_bins - 1) + 1)
+    return np.concatenate([np.arange(first, n_bins), np.arange(0, min(last, n_bins - 1) + 1)])
+
+def region_cells(index, region):
+    # Grid cells that can hold rows of the region, found without looking at any row
+    if 'cone' in region:
+        ra, dec, radius = region['cone']
+        dec_min, dec_max = dec - radius, dec + radius
+        if dec_max >= 90 or dec_min <= -90:
+            # A cone over a pole covers every RA
+            ra_min, ra_max = 0.0, 360.0
+        else:
+            half_width = np.degrees(np.arcsin(min(1.0, np.sin(np.radians(radius)) / np.cos(np.radians(dec)))))
+            ra_min, ra_max = ra - half_width, ra + half_width
+    else:
+        ra_min, ra_max, dec_min, dec_max = region['box']
+    cells = [index['offsets'][zone] + ra_bins(index['bins'][zone], ra_min, ra_max) for zone in zone_range(index, max(dec_min, -90), min(dec_max, 90))]
+    return np.unique(np.concatenate(cells)) if cells else np.empty(0, dtype=np.int64)
+
+def region_rows(index, ra_list, dec_list, region):
+    # Row numbers inside the region, in table order; only rows of the overlapping cells are tested
+    cells = region_cells(index, region)
+    candidates = np.concatenate([index['order'][index['starts'][cell]:index['starts'][cell + 1]] for cell in cells]) if len(cells) else np.empty(0, dtype=np.int64)
+    candidates = np.sort(candidates)
+    return candidates[region_mask(np.asarray(ra_list)[candidates], np.asarray(dec_list)[candidates], region)]
+
+def top_per_cell_rows(cells, keys, n_per_cell):
+    # The best n rows of every cell (ties in table order), given best-first sort keys, in table order
+    order = np.lexsort((keys, cells))
+    sorted_cells = cells[order]
+    group_start = np.flatnonzero(np.concatenate([[True], sorted_cells[1:] != sorted_cells[:-1]]))
+    position = np.arange(len(order)) - np.repeat(group_start, np.diff(np.concatenate([group_start, [len(order)]])))
+    return np.sort(order[position < n_per_cell])
+# ------------------------------------------------------------- #
@@ -0,0 +1,185 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Ranking Specification
+#
+# Purpose: Load and check the JSON/YAML spec used by headless runs
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import json
+from .tables import filetype_list
+from .transforms import transform_names
+from .tablecache import cache_verify_list
+from .sky import check_region, default_cell_deg
+from .columns import precision_list
+# ------------------------------------------------------------- #
+
+
+# Default Spec Settings
+# ------------------------------------------------------------- #
+spec_defaults = {
+    'chunk_size': 1000,
+    'true_positive_perc': 0.0,
+    'true_negative_perc': 0.0,
+    'output_dir': 'Output',
+    'stream': False,
+    'chunk_memory_mb': 64,
+    'max_rss_mb': None,
+    'top_k': None,
+    'seed': 1,
+    'workers': 1,
+    'output_format': 'csv',
+    'controls_replace': True,
+    'table_cache': True,
+    'cache_verify': 'mtime',
+    'shard_workers': None,
+    'region': None,
+    'top_per_cell': None,
+    'sky_cell_deg': default_cell_deg,
+    'precision': 'float64',
+    'checkpoint': False,
+    'resume': False,
+}
+
+# Formats the subject sets can be written in
+output_format_list = ['csv', 'parquet']
+# ------------------------------------------------------------- #
+
+
+
+# Spec Loading Functions
+# ------------------------------------------------------------- #
+def load_spec(path):
+    # Read the raw spec, using YAML for .yaml/.yml files and JSON otherwise
+    with open(path) as spec_file:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            try:
+                # PyYAML is optional, so it is only imported when a YAML spec is given
+                import yaml
+            except ImportError:
+                raise ValueError('Reading a YAML spec requires PyYAML (pip install pyyaml), or use a JSON spec')
+            spec = yaml.safe_load(spec_file)
+        else:
+            spec = json.load(spec_file)
+    
+    # Check the spec and fill in the defaults
+    return validate_spec(spec)
+
+def spec_number(value, name, kind):
+    # Convert a spec setting to int or float, naming the setting if it is not a number
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a{"n integer" if kind is int else " number"}, not {value!r}')
+
+def validate_spec(spec):
+    # Start from the defaults and overlay the given spec
+    if not isinstance(spec, dict):
+        raise ValueError('The ranking spec must be a mapping')
+    checked = dict(spec_defaults)
+    checked.update(spec)
+    
+    # The ranking, true-positive and true-negative files are all required
+    for key in ('file', 'tp_file', 'tn_file', 'output'):
+        if not checked.get(key):
+            raise ValueError(f'The ranking spec is missing {key!r}')
+    if checked.get('type') not in filetype_list:
+        raise ValueError(f'The spec type must be one of {filetype_list}')
+    
+    # Custom transforms declared in the spec count as known column types
+    if not isinstance(checked.get('transforms') or {}, dict):
+        raise ValueError('"transforms" must map each custom type name to its options')
+    checked['transforms'] = dict(checked.get('transforms') or {})
+    for name, options in checked['transforms'].items():
+        if not isinstance(options, dict) or not ('expression' in options or 'function' in options):
+            raise ValueError(f'Custom transform {name!r} needs an "expression" or a "function"')
+    known_types = transform_names() + list(checked['transforms'])
+    
+    # Every column needs a name, a known type and a scaling between 0 and 1
+    if not checked.get('columns'):
+        raise ValueError('The ranking spec needs at least one entry in "columns"')
+    columns = []
+    for column in checked['columns']:
+        if not isinstance(column, dict) or not column.get('name'):
+            raise ValueError(f'Column {column!r} must be a mapping with a "name", "type" and "scaling"')
+        if column.get('type') not in known_types:
+            raise ValueError(f'Column {column["name"]!r} must have a type in {known_types}')
+        scaling = spec_number(column.get('scaling', 1.0), f"the scaling of column {column['name']!r}", float)
+        if not 0 <= scaling <= 1:
+            raise ValueError(f'Column {column["name"]!r} must have a scaling between 0 and 1')
+        columns.append({'name': column['name'], 'type': column['type'], 'scaling': scaling})
+    checked['columns'] = columns
+    
+    # Check the subject set settings
+    checked['chunk_size'] = spec_number(checked['chunk_size'], 'chunk_size', int)
+    checked['true_positive_perc'] = spec_number(checked['true_positive_perc'], 'true_positive_perc', float)
+    checked['true_negative_perc'] = spec_number(checked['true_negative_perc'], 'true_negative_perc', float)
+    if checked['chunk_size'] <= 0:
+        raise ValueError('The chunk size must be a positive integer')
+    
+    # Check the streaming settings
+    checked['stream'] = bool(checked['stream'])
+    checked['chunk_memory_mb'] = spec_number(checked['chunk_memory_mb'], 'chunk_memory_mb', float)
+    if checked['chunk_memory_mb'] <= 0:
+        raise ValueError('The chunk memory must be a positive number of megabytes')
+    if checked['max_rss_mb'] is not None:
+        checked['max_rss_mb'] = spec_number(checked['max_rss_mb'], 'max_rss_mb', float)
+    
+    # Check the top-k cut
+    if checked['top_k'] is not None:
+        checked['top_k'] = spec_number(checked['top_k'], 'top_k', int)
+        if checked['top_k'] <= 0:
+            raise ValueError('top_k must be a positive integer')
+    
+    # Check the writer settings
+    checked['seed'] = spec_number(checked['seed'], 'seed', int)
+    checked['workers'] = spec_number(checked['workers'], 'workers', int)
+    if checked['workers'] <= 0:
+        raise ValueError('workers must be a positive integer')
+    checked['controls_replace'] = bool(checked['controls_replace'])
+    if checked['output_format'] not in output_format_list:
+        raise ValueError(f'output_format must be one of {output_format_list}')
+    
+    # Check the number of processes scoring shards; None uses every core
+    if checked['shard_workers'] is not None:
+        checked['shard_workers'] = spec_number(checked['shard_workers'], 'shard_workers', int)
+        if checked['shard_workers'] <= 0:
+            raise ValueError('shard_workers must be a positive integer')
+    
+    # Check the sky selection; the best-per-cell cut needs the whole table in memory
+    checked['region'] = check_region(checked['region'])
+    checked['sky_cell_deg'] = spec_number(checked['sky_cell_deg'], 'sky_cell_deg', float)
+    if not 0 < checked['sky_cell_deg'] <= 180:
+        raise ValueError('sky_cell_deg must be between 0 and 180 degrees')
+    if checked['top_per_cell'] is not None:
+        checked['top_per_cell'] = spec_number(checked['top_per_cell'], 'top_per_cell', int)
+        if checked['top_per_cell'] <= 0:
+            raise ValueError('top_per_cell must be a positive integer')
+        if checked['stream']:
+            raise ValueError('top_per_cell cannot be used with streaming')
+    
+    # Check the precision of the transformed parameter matrix
+    if checked['precision'] not in precision_list:
+        raise ValueError(f'precision must be one of {precision_list}')
+    
+    # Check the checkpoint settings; resuming an export needs its checkpoint
+    checked['resume'] = bool(checked['resume'])
+    checked['checkpoint'] = bool(checked['checkpoint']) or checked['resume']
+    
+    # Check the table cache settings
+    checked['table_cache'] = bool(checked['table_cache'])
+    if checked['cache_verify'] not in cache_verify_list:
+        raise ValueError(f'cache_verify must be one of {cache_verify_list}')
+    
+    # Return the checked spec
+    return checked
+
+def spec_columns(spec):
+    # Split the spec columns into the user_options, user_types and user_scalings lists
+    user_options = [column['name'] for column in spec['columns']]
+    user_types = [column['type'] for column in spec['columns']]
+    user_scalings = [column['scaling'] for column in spec['columns']]
+    return user_options, user_types, user_scalings
+# ------------------------------------------------------------- #
@@ -0,0 +1,302 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Streaming
+#
+# Purpose: Rank tables larger than memory by scoring them in row chunks
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import numpy as np
+import pandas as pd
+from astropy.io import fits
+from .tables import read_table, native_column
+from .ranking import parm_metrix, ranking_mult, rank_order, top_rows
+from .tablecache import cached_filetype_list, read_cached_columns, cache_chunks
+from .instrument import peak_rss_mb, memory_limit, stage, progress, message
+from .sky import region_mask
+from .transforms import get_transform, invalid_policy
+# ------------------------------------------------------------- #
+
+
+# Default Streaming Settings
+# ------------------------------------------------------------- #
+# Memory budget for one chunk of parsed input, in megabytes
+default_chunk_memory_mb = 64
+
+# Rough bytes held per parsed cell while a chunk is being read and scored
+bytes_per_cell = 32
+
+# Bytes held per cell of the rows gathered for a batch of subject sets, which are already parsed
+gathered_bytes_per_cell = 8
+# ------------------------------------------------------------- #
+
+
+
+# Chunk Size Functions
+# ------------------------------------------------------------- #
+def chunk_rows_for(chunk_memory_mb, n_columns):
+    # Number of rows whose parsed columns fit inside the chunk memory budget
+    return max(1, int(chunk_memory_mb * 1024**2 // (bytes_per_cell * max(1, n_columns))))
+# ------------------------------------------------------------- #
+
+
+
+# Chunked Table Reading Functions
+# ------------------------------------------------------------- #
+def iter_table_chunks(file, filetype, columns, chunk_rows, table_cache=False, cache_verify='mtime'):
+    if table_cache and filetype in cached_filetype_list:
+        cached = read_cached_columns(file, filetype, columns, verify=cache_verify)
+        if cached is not None:
+            # Slice the memory-mapped cached columns instead of parsing the file again
+            message(f'#   Table cache hit for {file}, streaming the cached columns')
+            for start in range(0, len(cached[columns[0]]), chunk_rows):
+                yield {column: np.array(cached[column][start:start + chunk_rows]) for column in columns}
+            return
+        
+        # Parse the file as usual and write its columns to the cache on the way through
+        message(f'#   Table cache miss for {file}, caching its columns while streaming')
+        yield from cache_chunks(file, filetype, columns, iter_table_chunks(file, filetype, columns, chunk_rows), verify=cache_verify)
+        return
+    
+    if filetype == 'CSV':
+        # Pandas parses the CSV chunk by chunk, keeping only the needed columns
+        for chunk in pd.read_csv(file, usecols=columns, chunksize=chunk_rows):
+            yield {column: native_column(chunk[column]) for column in columns}
+        return
+
+    if filetype == 'FITS':
+        # Memory-map the FITS table so each row slice only pages in its own rows
+        with fits.open(file, memmap=True) as fits_table:
+            data = fits_table[1].data
+            for start in range(0, len(data), chunk_rows):
+                yield {column: native_column(data[column][start:start + chunk_rows]) for column in columns}
+        return
+
+    # Astropy cannot read ASCII/IPAC tables in pieces, so they are parsed once and scored in chunks
+    table = read_table(file, filetype)
+    for start in range(0, len(table), chunk_rows):
+        yield {column: native_column(table[column][start:start + chunk_rows]) for column in columns}
+# ------------------------------------------------------------- #
+
+
+
+# Streaming Ranking Functions
+# ------------------------------------------------------------- #
+def stream_rank(file, filetype, user_options, user_types, user_scalings, chunk_memory_mb=default_chunk_memory_mb, chunk_rows=None, max_rss_mb=None, top_k=None, table_cache=False, cache_verify='mtime', region=None, precision='float64'):
+    # Only RA, DEC and the ranking columns are read from the file
+    columns = list(dict.fromkeys(['RA', 'DEC'] + list(user_options)))
+    if chunk_rows is None:
+        chunk_rows = chunk_rows_for(chunk_memory_mb, len(columns))
+
+    # Print a message indicating that the table is being streamed
+    message('')
+    message('#           Table Is Being Streamed!             #')
+
+    # A memory limit is checked after every chunk and at the start and end of every stage
+    with memory_limit(max_rss_mb):
+        # The whole read-transform-score loop is timed as one stage, with progress after every chunk
+        with stage('stream', file=file) as record:
+            # Each chunk keeps only its scores, and the file row number of every score when rows are
+            # dropped; the columns are read again, one batch of subject sets at a time, when the
+            # subject sets are written
+            rank_chunks = []
+            row_chunks = [] if region is not None or top_k is not None else None
+            dtypes = {}
+            invalid_counts = {}
+            n_rows = 0
+            n_read = 0
+            n_chunks = 0
+            for chunk in iter_table_chunks(file, filetype, columns, chunk_rows, table_cache=table_cache, cache_verify=cache_verify):
+                rows = np.arange(n_read, n_read + len(chunk['RA']))
+                n_read = n_read + len(chunk['RA'])
+                for column in columns:
+                    dtypes[column] = np.result_type(dtypes.get(column, np.asarray(chunk[column]).dtype), np.asarray(chunk[column]).dtype)
+                
+                # Rows outside the sky region are dropped before they are scored
+                if region is not None:
+                    inside = region_mask(chunk['RA'], chunk['DEC'], region)
+                    chunk = {column: np.asarray(chunk[column])[inside] for column in columns}
+                    rows = rows[inside]
+                column_space = [chunk[option] for option in user_options]
+                parameter_matrix = parm_metrix(column_space, user_types, verbose=False, invalid_counts=invalid_counts, dtype=np.dtype(precision))
+                rank_chunks.append(ranking_mult(parameter_matrix, user_scalings, verbose=False))
+                if row_chunks is not None:
+                    row_chunks.append(rows)
+                n_rows = n_rows + len(rows)
+                n_chunks = n_chunks + 1
+            
+                # With a top-k cut, only the best k rows seen so far are carried to the next chunk
+                if top_k is not None:
+                    best_ranks = np.concatenate(rank_chunks)
+                    if len(best_ranks) > top_k:
+                        best = top_rows(best_ranks, top_k)
+                        rank_chunks = [best_ranks[best]]
+                        row_chunks = [np.concatenate(row_chunks)[best]]
+                    else:
+                        rank_chunks = [best_ranks]
+                progress('stream', n_read)
+
+            # Join the per-chunk pieces into single arrays, in file row order
+            if n_rows == 0:
+                raise ValueError(f'The ranking table {file!r} has no rows' + ('' if region is None else ' inside the sky region'))
+            ranked_list = np.concatenate(rank_chunks)
+            del rank_chunks
+            ranked_rows = None if row_chunks is None else np.concatenate(row_chunks)
+            del row_chunks
+            record.update(rows=n_read, selected=n_rows, chunks=n_chunks, bytes_read=os.path.getsize(file))
+
+        # Order the scores best first; the ranked table is only the plan of which file rows go where,
+        # and the target IDs are worked out from the sorted ranks when the rows are gathered
+        with stage('rank') as record:
+            order = rank_order(ranked_list, top_k)
+            ranks = ranked_list[order]
+            del ranked_list
+            ranked_plan = {
+                'kind': 'stream',
+                'file': file,
+                'filetype': filetype,
+                'columns': columns,
+                'dtypes': dtypes,
+                'user_options': list(user_options),
+                'chunk_rows': chunk_rows,
+                'table_cache': table_cache,
+                'cache_verify': cache_verify,
+                'top_k': top_k is not None,
+                'rows': order if ranked_rows is None else ranked_rows[order],
+                'ranks': ranks,
+            }
+            del ranked_rows, order
+            record['rows'] = len(ranks)
+
+    # Report how the table was streamed
+    report = {
+        'rows': n_read,
+        'selected': n_rows,
+        'chunks': n_chunks,
+        'chunk_rows': chunk_rows,
+        'peak_rss_mb': peak_rss_mb(),
+        'invalid': {user_options[j]: n_invalid for j, n_invalid in invalid_counts.items()},
+    }
+    for j, n_invalid in invalid_counts.items():
+        if n_invalid:
+            message(f'#   Column {user_options[j]} ({user_types[j]}): {n_invalid} invalid values were set to {invalid_policy(get_transform(user_types[j]))}')
+    message(f"#   Streamed {report['rows']} rows in {report['chunks']} chunks of up to {report['chunk_rows']} rows")
+    if region is not None:
+        message(f"#   {report['selected']} rows were inside the sky region")
+    if report['peak_rss_mb'] is not None:
+        message(f"#   Peak memory (RSS): {report['peak_rss_mb']:.1f} MB")
+    message('')
+
+    # Return the ranking plan and the streaming report
+    return ranked_plan, report
+# ------------------------------------------------------------- #
+
+
+
+# Ranking Plan Functions
+# ------------------------------------------------------------- #
+def is_ranked_plan(ranked_table):
+    # A streamed ranking is a plan of file rows in rank order instead of a DataFrame
+    return isinstance(ranked_table, dict) and ranked_table.get('kind') == 'stream'
+
+def plan_columns(ranked_plan):
+    # Columns of the ranked table the plan stands for, in the layout of rank_table
+    return ['RA', 'DEC', '#RANK', '#Target ID'] + [f'#{option}' for option in ranked_plan['user_options']]
+
+def tie_bounds(ranks, first, last):
+    # Where the run of ranks equal to ranks[first] starts, and where the run equal to ranks[last]
+    # stops, in ranks sorted best first; binary searches, as the runs can reach past [first, last]
+    value = ranks[first]
+    low, high = 0, first
+    while low < high:
+        middle = (low + high) // 2
+        if ranks[middle] > value:
+            low = middle + 1
+        else:
+            high = middle
+    start = low
+    value = ranks[last]
+    low, high = last + 1, len(ranks)
+    while low < high:
+        middle = (low + high) // 2
+        if ranks[middle] == value:
+            low = middle + 1
+        else:
+            high = middle
+    return start, low
+
+def plan_target_ids(ranked_plan, start, stop):
+    # Target IDs of one range: 1, 2, 3, ... for a top-k plan, and otherwise the average rank
+    # of every run of tied ranks, as DataFrame.rank(ascending=False) gives for the full table
+    if ranked_plan['top_k']:
+        return np.arange(start + 1, stop + 1, dtype=np.float64)
+    ranks = ranked_plan['ranks'][start:stop]
+    if len(ranks) == 0:
+        return np.empty(0)
+    run_starts = np.flatnonzero(np.concatenate([[True], ranks[1:] != ranks[:-1]]))
+    run_stops = np.append(run_starts[1:], len(ranks))
+    first = start + run_starts
+    after = start + run_stops
+    first[0], after[-1] = tie_bounds(ranked_plan['ranks'], start, stop - 1)
+    target_ids = np.repeat((first + 1 + after) / 2, run_stops - run_starts)
+    target_ids[np.isnan(ranks)] = np.nan
+    return target_ids
+
+def plan_frame(ranked_plan, values, start, stop, offset):
+    # One range of the ranked table, from the gathered column values of its batch
+    piece = slice(offset, offset + stop - start)
+    frame = pd.DataFrame({
+    'RA': values['RA'][piece],
+    'DEC': values['DEC'][piece],
+    '#RANK': ranked_plan['ranks'][start:stop],
+    '#Target ID': plan_target_ids(ranked_plan, start, stop),
+                    })
+    for option in ranked_plan['user_options']:
+        frame[f'#{option}'] = values[option][piece]
+    return frame
+
+def plan_tables(ranked_plan, ranges, batch_rows=None):
+    # Yield the ranked table rows of every (start, stop) range in rank order, in the order given;
+    # consecutive ranges are grouped into batches of about batch_rows rows (by default as much
+    # as one chunk's memory holds), and each batch is gathered in one chunked pass over the file,
+    # so only one batch of columns is held at a time
+    if batch_rows is None:
+        batch_rows = ranked_plan['chunk_rows'] * bytes_per_cell // gathered_bytes_per_cell
+    columns = ranked_plan['columns']
+    
+    # A cached table is sliced from the cache; a file that is not cached is parsed again without caching it
+    table_cache = ranked_plan['table_cache'] and ranked_plan['filetype'] in cached_filetype_list and read_cached_columns(ranked_plan['file'], ranked_plan['filetype'], columns, verify=ranked_plan['cache_verify']) is not None
+    
+    batches = []
+    for start, stop in ranges:
+        if batches and sum(high - low for low, high in batches[-1]) + stop - start <= batch_rows:
+            batches[-1].append((start, stop))
+        else:
+            batches.append([(start, stop)])
+    for batch in batches:
+        # File rows of the batch, sorted so every chunk finds its rows with two binary searches
+        positions = np.concatenate([np.arange(start, stop) for start, stop in batch])
+        file_rows = ranked_plan['rows'][positions]
+        order = np.argsort(file_rows, kind='stable')
+        sorted_rows = file_rows[order]
+        values = {column: np.empty(len(positions), dtype=ranked_plan['dtypes'][column]) for column in columns}
+        
+        # Read chunks until the last row of the batch has been passed
+        n_read = 0
+        for chunk in iter_table_chunks(ranked_plan['file'], ranked_plan['filetype'], columns, ranked_plan['chunk_rows'], table_cache=table_cache, cache_verify=ranked_plan['cache_verify']):
+            n_chunk = len(chunk[columns[0]])
+            low, high = np.searchsorted(sorted_rows, [n_read, n_read + n_chunk])
+            for column in columns:
+                values[column][order[low:high]] = np.asarray(chunk[column])[sorted_rows[low:high] - n_read]
+            n_read = n_read + n_chunk
+            progress('gather', n_read)
+            if high == len(sorted_rows):
+                break
+        
+        offset = 0
+        for start, stop in batch:
+            yield plan_frame(ranked_plan, values, start, stop, offset)
+            offset = offset + stop - start
+# ------------------------------------------------------------- #
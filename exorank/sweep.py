@@ -0,0 +1,382 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Weight Sweeps
+#
+# Purpose: Score many scaling vectors in one pass over the parameter matrix,
+#          and measure how much the top targets depend on the scalings
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import itertools
+import numpy as np
+import pandas as pd
+from .instrument import progress
+# ------------------------------------------------------------- #
+
+
+# Sweep Settings
+# ------------------------------------------------------------- #
+# Memory for one block of scores (rows x weight vectors), in bytes
+sweep_block_bytes = 64 * 1024**2
+
+# Number of top targets compared between scalings when no top_k is given
+default_sweep_top_k = 100
+
+# Largest grid of scaling vectors a sweep will build
+max_sweep_vectors = 100000
+
+# Groups of similar scaling vectors that share one score bound when rows are pruned
+sweep_groups = 64
+# ------------------------------------------------------------- #
+
+
+
+# Scaling Vector Functions
+# ------------------------------------------------------------- #
+def sweep_weights(user_scalings, steps=None, samples=None, seed=1):
+    # The spec's own scalings come first and are the reference every other vector is compared to;
+    # all-zero scalings tie every target, so there is no ranking to compare against
+    n_columns = len(user_scalings)
+    if not np.any(user_scalings):
+        raise ValueError('The spec scalings are all zero, which ties every target; give at least one column a scaling above 0 to sweep around')
+    if (steps is None) == (samples is None):
+        raise ValueError('A sweep needs either a grid of steps per column or a number of random samples')
+    if steps is not None:
+        if steps < 2:
+            raise ValueError('A grid sweep needs at least 2 steps per column')
+        if steps**n_columns > max_sweep_vectors:
+            raise ValueError(f'A grid of {steps} steps over {n_columns} columns has {steps**n_columns} vectors; use fewer steps or random samples')
+        weights = np.array(list(itertools.product(np.linspace(0, 1, steps), repeat=n_columns)), dtype=np.float64)
+    else:
+        if not 0 < samples <= max_sweep_vectors:
+            raise ValueError(f'A random sweep needs between 1 and {max_sweep_vectors} samples')
+        weights = np.random.default_rng(seed).random((samples, n_columns))
+    
+    # Scalings that are all zero score every target the same, so they are left out
+    weights = weights[weights.any(axis=1)]
+    return np.vstack([np.asarray(user_scalings, dtype=np.float64), weights])
+# ------------------------------------------------------------- #
+
+
+
+# Batched Scoring Functions
+# ------------------------------------------------------------- #
+def filled_block(parameter_matrix):
+    # Rows of the parameter matrix as float64, with NaN parameters counted as 0, as in ranking_mult
+    block = np.asarray(parameter_matrix, dtype=np.float64)
+    return np.where(np.isnan(block), 0.0, block)
+
+def pairwise_sum(terms, first, n_terms):
+    # Sum terms(first) .. terms(first + n_terms - 1) in numpy's pairwise summation order
+    if n_terms < 8:
+        total = terms(first)
+        for j in range(first + 1, first + n_terms):
+            total += terms(j)
+        return total
+    if n_terms <= 128:
+        sums = [terms(first + j) for j in range(8)]
+        for j in range(8, n_terms - n_terms % 8):
+            sums[j % 8] += terms(first + j)
+        total = ((sums[0] + sums[1]) + (sums[2] + sums[3])) + ((sums[4] + sums[5]) + (sums[6] + sums[7]))
+        for j in range(n_terms - n_terms % 8, n_terms):
+            total += terms(first + j)
+        return total
+    half = n_terms // 2
+    half -= half % 8
+    return pairwise_sum(terms, first, half) + pairwise_sum(terms, first + half, n_terms - half)
+
+def score_block(parameter_matrix, weights):
+    # Scores of every row under every weight vector, added up in the same order as the np.nansum
+    # in ranking_mult, so every score, and so every tie, is exactly the one the ranking sees
+    block = filled_block(parameter_matrix)
+    return pairwise_sum(lambda j: block[:, j, None] * weights[:, j], 0, block.shape[1])
+
+def score_pairs(block, weights, rows, vectors):
+    # Exact scores of single (row, vector) pairs of a filled block, in the same order as score_block
+    return pairwise_sum(lambda j: block[rows, j] * weights[vectors, j], 0, block.shape[1])
+
+def sweep_top(parameter_matrix, weights, top_k, show_progress=True):
+    # Best top_k rows of every weight vector, found block by block so only one block of scores
+    # is ever held; returns (top_k, vectors) arrays of rows and scores, best first
+    n_vectors = len(weights)
+    best_rows = np.full((top_k, n_vectors), -1, dtype=np.int64)
+    best_scores = np.full((top_k, n_vectors), -np.inf)
+    threshold = np.full(n_vectors, -np.inf)
+    block_rows = max(1024, sweep_block_bytes // (8 * n_vectors))
+    for start in range(0, len(parameter_matrix), block_rows):
+        block = filled_block(parameter_matrix[start:start + block_rows])
+        
+        # One matrix product scores the block quickly but may round differently from ranking_mult,
+        # so it only picks the candidates, with a slack far above any rounding difference
+        scores = block @ weights.T
+        slack = 1e-9 * np.abs(block).max(initial=0) * weights.sum(axis=1).max()
+        passing = scores >= threshold - slack
+        
+        # Until a vector has top_k rows, rows below the block's own k-th best can be left out as well
+        if len(scores) >= top_k and np.isneginf(threshold).any():
+            passing &= scores >= -np.partition(-scores, top_k - 1, axis=0)[top_k - 1] - slack
+        vector, row = np.nonzero(passing.T)
+        
+        # The candidates are scored exactly; only rows beating a vector's current k-th best score are
+        # merged in, and a row tied with it loses to the earlier row, keeping ties in table order
+        exact = score_pairs(block, weights, row, vector)
+        beating = exact > threshold[vector]
+        vector, row, exact = vector[beating], row[beating], exact[beating]
+        if len(row):
+            counts = np.bincount(vector, minlength=n_vectors)
+            merged = np.flatnonzero(counts)
+            group_start = np.concatenate([[0], np.cumsum(counts[merged])])
+            slot = np.arange(len(row)) - np.repeat(group_start[:-1], counts[merged])
+            column = np.repeat(np.arange(len(merged)), counts[merged])
+            
+            # Candidates of every merged vector, padded with -inf, stacked under its current best rows
+            candidate_rows = np.full((counts.max(), len(merged)), -1, dtype=np.int64)
+            candidate_scores = np.full((counts.max(), len(merged)), -np.inf)
+            candidate_rows[slot, column] = start + row
+            candidate_scores[slot, column] = exact
+            candidate_rows = np.vstack([best_rows[:, merged], candidate_rows])
+            candidate_scores = np.vstack([best_scores[:, merged], candidate_scores])
+            
+            # Keep the best top_k of each, preferring the earlier row among equal scores
+            keep = np.lexsort((candidate_rows, -candidate_scores), axis=0)[:top_k]
+            best_rows[:, merged] = np.take_along_axis(candidate_rows, keep, axis=0)
+            best_scores[:, merged] = np.take_along_axis(candidate_scores, keep, axis=0)
+            threshold[merged] = best_scores[-1, merged]
+        if show_progress:
+            progress('sweep', min(start + block_rows, len(parameter_matrix)), len(parameter_matrix))
+    return best_rows, best_scores
+
+def group_weights(weights, n_groups=sweep_groups, iterations=10):
+    # Group the scaling vectors by direction with a few rounds of k-means; the length of a vector
+    # does not change its ranking, so every vector is scaled to sum to 1 first
+    unit = weights / weights.sum(axis=1, keepdims=True)
+    centers = unit[np.linspace(0, len(unit) - 1, min(n_groups, len(unit))).astype(np.int64)]
+    for _ in range(iterations):
+        labels = ((unit[:, None, :] - centers[None, :, :])**2).sum(axis=2).argmin(axis=1)
+        for group in np.unique(labels):
+            centers[group] = unit[labels == group].mean(axis=0)
+    
+    # Number the groups that ended up with vectors 0, 1, 2, ...
+    return unit, np.unique(labels, return_inverse=True)[1]
+
+def pruned_sweep_top(parameter_matrix, weights, top_k):
+    # Same result as sweep_top, but only rows that can reach some vector's top-k are scored
+    # against every vector, so the (rows x vectors) scores are never all computed
+    unit, labels = group_weights(weights)
+    groups = [np.flatnonzero(labels == group) for group in range(labels.max() + 1)]
+    
+    # Any set of rows gives a lower bound on every vector's k-th best score; the best rows under
+    # each group's mean direction give a tight one
+    centers = np.array([unit[members].mean(axis=0) for members in groups])
+    seed_rows = np.unique(sweep_top(parameter_matrix, centers, top_k)[0])
+    seed_rows = seed_rows[seed_rows >= 0]
+    seed_scores = score_block(np.asarray(parameter_matrix)[seed_rows], weights)
+    if len(seed_rows) >= top_k:
+        bound = -np.partition(-seed_scores, top_k - 1, axis=0)[top_k - 1] / weights.sum(axis=1)
+    else:
+        bound = np.full(len(weights), -np.inf)
+    group_bound = np.array([bound[members].min() for members in groups])
+    
+    # A row's score under any unit vector of a group is at most its score under the group's
+    # highest weights for positive values and lowest weights for negative ones
+    high = np.array([unit[members].max(axis=0) for members in groups])
+    low = np.array([unit[members].min(axis=0) for members in groups])
+    candidates = [[] for _ in groups]
+    block_rows = max(1024, sweep_block_bytes // (8 * len(groups)))
+    for start in range(0, len(parameter_matrix), block_rows):
+        block = filled_block(parameter_matrix[start:start + block_rows])
+        
+        # The small slack covers rounding, so a row is never dropped for being a hair below a bound
+        slack = 1e-9 * np.abs(block).max(axis=1, initial=0)
+        lowest = group_bound.min() - 1e-9 * abs(group_bound.min())
+        
+        # Rows that stay below the lowest bound even with every group's extreme weights are dropped
+        # first, so the bound of each group is only worked out for the few rows left
+        reach = np.flatnonzero(np.maximum(block, 0) @ high.max(axis=0) + np.minimum(block, 0) @ low.min(axis=0) + slack >= lowest)
+        block, slack = block[reach], slack[reach]
+        upper = np.maximum(block, 0) @ high.T + np.minimum(block, 0) @ low.T
+        group, row = np.nonzero((upper + slack[:, None] >= group_bound - 1e-9 * np.abs(group_bound)).T)
+        for index, rows in zip(np.unique(group), np.split(start + reach[row], np.flatnonzero(np.diff(group)) + 1)):
+            candidates[index].append(rows)
+        progress('bound', min(start + block_rows, len(parameter_matrix)), len(parameter_matrix))
+    
+    # Every group is finished on its candidate rows only, which are kept in table order
+    best_rows = np.full((top_k, len(weights)), -1, dtype=np.int64)
+    best_scores = np.full((top_k, len(weights)), -np.inf)
+    for index, (members, rows) in enumerate(zip(groups, candidates)):
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        if len(rows):
+            group_rows, group_scores = sweep_top(np.asarray(parameter_matrix)[rows], weights[members], min(top_k, len(rows)), show_progress=False)
+            best_rows[:len(group_rows), members] = np.where(group_rows >= 0, rows[group_rows], -1)
+            best_scores[:len(group_rows), members] = group_scores
+        progress('groups', index + 1, len(groups), unit='groups')
+    return best_rows, best_scores
+# ------------------------------------------------------------- #
+
+
+
+# Rank Comparison Functions
+# ------------------------------------------------------------- #
+def ranks_within(scores):
+    # Best-first rank (0 = best) of every row within each column, ties in row order
+    order = np.lexsort((np.broadcast_to(np.arange(len(scores))[:, None], scores.shape), -scores), axis=0)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(len(scores))[:, None], axis=0)
+    return ranks
+
+def count_inversions(ranks):
+    # Pairs out of order in every column of a (rows, columns) array of permutations of 0..rows-1,
+    # counted with one Fenwick tree per column, all walked together
+    n_rows, n_columns = ranks.shape
+    tree = np.zeros((n_rows + 1, n_columns), dtype=np.int64)
+    columns = np.arange(n_columns)
+    inversions = np.zeros(n_columns, dtype=np.int64)
+    for seen, rank in enumerate(ranks):
+        # Earlier rows with a lower rank are in order; the rest are inversions
+        position, lower = rank.copy(), np.zeros(n_columns, dtype=np.int64)
+        while position.any():
+            lower += tree[position, columns]
+            position -= position & -position
+        inversions += seen - lower
+        position = rank + 1
+        while (position <= n_rows).any():
+            inside = position <= n_rows
+            tree[position[inside], columns[inside]] += 1
+            position[inside] += position[inside] & -position[inside]
+            position[~inside] = n_rows + 1
+    return inversions
+
+def paired_correlations(first, second):
+    # Spearman and Kendall correlation of the order of every column of first with the same column of second
+    n_rows = len(first)
+    if n_rows < 2:
+        return np.ones(first.shape[1]), np.ones(first.shape[1])
+    
+    # Put the rows of every column in the first order, so the first ranks are simply 0..n-1
+    ranks = np.take_along_axis(ranks_within(second), np.argsort(ranks_within(first), axis=0), axis=0)
+    spearman = 1 - 6 * ((ranks - np.arange(n_rows)[:, None])**2).sum(axis=0) / (n_rows * (n_rows**2 - 1))
+    kendall = 1 - 4 * count_inversions(ranks) / (n_rows * (n_rows - 1))
+    return spearman, kendall
+
+def rank_correlations(scores):
+    # Spearman and Kendall correlation of every column's order with column 0's, over the rows given
+    return paired_correlations(np.repeat(scores[:, :1], scores.shape[1], axis=1), scores)
+
+def neighbour_vectors(weights):
+    # The closest other scaling vector to every vector, by direction; vectors that only differ in
+    # length rank the targets the same, so they are passed over, and a vector with none left is its own
+    unit = weights / weights.sum(axis=1, keepdims=True)
+    squared = (unit**2).sum(axis=1)
+    neighbours = np.arange(len(unit))
+    block_vectors = max(1, sweep_block_bytes // (8 * len(unit)))
+    for start in range(0, len(unit), block_vectors):
+        distance = squared[start:start + block_vectors, None] + squared - 2 * unit[start:start + block_vectors] @ unit.T
+        distance[distance <= 1e-12] = np.inf
+        closest = distance.argmin(axis=1)
+        found = np.isfinite(distance[np.arange(len(distance)), closest])
+        neighbours[start:start + len(distance)][found] = closest[found]
+    return neighbours
+
+def neighbour_correlations(parameter_matrix, weights, best_rows, neighbours):
+    # Spearman and Kendall correlation of every vector's top-k order with the order its neighbour gives
+    # the same rows, worked out for one block of vectors at a time
+    top_k, n_columns = best_rows.shape[0], weights.shape[1]
+    spearman, kendall = np.ones(len(weights)), np.ones(len(weights))
+    block_vectors = max(1, sweep_block_bytes // (8 * top_k * n_columns))
+    for start in range(0, len(weights), block_vectors):
+        rows = best_rows[:, start:start + block_vectors]
+        own, other = weights[start:start + block_vectors], weights[neighbours[start:start + block_vectors]]
+        values = filled_block(np.asarray(parameter_matrix)[np.maximum(rows, 0)])
+        
+        # Scored in the same order as score_block; empty (-1) places score -inf under both vectors,
+        # so they sit at the bottom of both orders
+        own_scores = pairwise_sum(lambda j: values[:, :, j] * own[:, j], 0, n_columns)
+        other_scores = pairwise_sum(lambda j: values[:, :, j] * other[:, j], 0, n_columns)
+        own_scores[rows < 0] = other_scores[rows < 0] = -np.inf
+        spearman[start:start + len(own)], kendall[start:start + len(own)] = paired_correlations(own_scores, other_scores)
+    return spearman, kendall
+# ------------------------------------------------------------- #
+
+
+
+# Sweep Report Functions
+# ------------------------------------------------------------- #
+def weight_sweep(parameter_matrix, weights, top_k, tp_matrix=None):
+    # Top-k rows of every weight vector, compared with the first (reference) vector and with its closest vector
+    if len(parameter_matrix) == 0:
+        raise ValueError('There are no targets to sweep; check the ranking file and the sky region')
+    if top_k < 1:
+        raise ValueError('The sweep top_k must be a positive integer')
+    if not np.all(np.any(weights, axis=1)):
+        raise ValueError('A sweep cannot score all-zero scalings, which tie every target')
+    top_k = min(top_k, len(parameter_matrix))
+    if len(weights) > sweep_groups:
+        best_rows, best_scores = pruned_sweep_top(parameter_matrix, weights, top_k)
+    else:
+        best_rows, best_scores = sweep_top(parameter_matrix, weights, top_k)
+    
+    # Rows whose scores are NaN never make a top-k, which can leave empty (-1) places
+    filled = best_rows >= 0
+    reference_rows = best_rows[filled[:, 0], 0]
+    
+    # Share of the reference top-k each vector keeps, and how often every row makes a top-k
+    in_reference = np.zeros(len(parameter_matrix), dtype=bool)
+    in_reference[reference_rows] = True
+    overlap = (in_reference[best_rows] & filled).sum(axis=0) / top_k
+    frequency = np.bincount(best_rows[filled], minlength=len(parameter_matrix)) / len(weights)
+    
+    # Rank correlations over the reference top-k targets, rescored with every vector
+    spearman, kendall = rank_correlations(score_block(np.asarray(parameter_matrix)[reference_rows], weights))
+    
+    # The reference alone says nothing about how fast the order changes between nearby scalings,
+    # so every vector's top-k is also rescored with its closest vector
+    neighbours = neighbour_vectors(weights)
+    neighbour_spearman, neighbour_kendall = neighbour_correlations(parameter_matrix, weights, best_rows, neighbours)
+    report = {
+        'weights': weights,
+        'top_k': top_k,
+        'top_rows': best_rows,
+        'overlap': overlap,
+        'spearman': spearman,
+        'kendall': kendall,
+        'neighbour': neighbours,
+        'neighbour_spearman': neighbour_spearman,
+        'neighbour_kendall': neighbour_kendall,
+        'frequency': frequency,
+    }
+    
+    # A true-positive target counts as recovered if its score would put it inside the top-k
+    if tp_matrix is not None and len(tp_matrix):
+        report['tp_recovery'] = (score_block(tp_matrix, weights) > best_scores[-1]).mean(axis=0)
+    return report
+
+def sweep_table(report, user_options):
+    # One row per scaling vector, the reference first
+    table = pd.DataFrame(report['weights'], columns=[f'#{name}' for name in user_options])
+    table.insert(0, '#Vector', np.arange(len(table)))
+    table['#TopK Overlap'] = report['overlap']
+    table['#Spearman'] = report['spearman']
+    table['#Kendall'] = report['kendall']
+    table['#Neighbour'] = report['neighbour']
+    table['#Neighbour Spearman'] = report['neighbour_spearman']
+    table['#Neighbour Kendall'] = report['neighbour_kendall']
+    if 'tp_recovery' in report:
+        table['#TP Recovery'] = report['tp_recovery']
+    return table
+
+def stable_targets(report, ra_list, dec_list, row_id):
+    # Rows that made the top-k under any scaling, most often first, with their reference rank
+    rows = np.flatnonzero(report['frequency'])
+    reference_rank = np.zeros(len(report['frequency']), dtype=np.int64)
+    reference_rows = report['top_rows'][:, 0]
+    reference_rank[reference_rows[reference_rows >= 0]] = np.arange(1, (reference_rows >= 0).sum() + 1)
+    rows = rows[np.lexsort((rows, -report['frequency'][rows]))]
+    return pd.DataFrame({
+        'RA': np.asarray(ra_list)[rows],
+        'DEC': np.asarray(dec_list)[rows],
+        '#Row': np.asarray(row_id)[rows],
+        '#TopK Fraction': report['frequency'][rows],
+        '#Reference Rank': np.where(reference_rank[rows] > 0, reference_rank[rows], np.nan),
+    })
+# ------------------------------------------------------------- #
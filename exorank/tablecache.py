@@ -0,0 +1,212 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Table Cache
+#
+# Purpose: Keep parsed table columns on disk as raw binary files, so slow
+#          ASCII/IPAC/CSV parses only happen once per file version
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+# ------------------------------------------------------------- #
+
+
+# Table Cache Settings
+# ------------------------------------------------------------- #
+# File types worth caching; FITS is already binary and memory-mapped directly
+cached_filetype_list = ['CSV', 'ASCII', 'IPAC']
+
+# How a cache entry is checked against its source file
+cache_verify_list = ['mtime', 'hash']
+# ------------------------------------------------------------- #
+
+
+
+# Cache Location Functions
+# ------------------------------------------------------------- #
+def table_cache_dir():
+    # The cache lives in EXORANK_CACHE_DIR, or ~/.cache/exorank by default
+    return os.environ.get('EXORANK_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'exorank'))
+
+def cache_entry_dir(file):
+    # Each source file gets its own folder, named from its absolute path
+    return os.path.join(table_cache_dir(), hashlib.sha1(os.path.abspath(file).encode()).hexdigest()[:20])
+
+def file_hash(file):
+    # SHA-256 of the file contents, read in 1 MB blocks
+    digest = hashlib.sha256()
+    with open(file, 'rb') as source:
+        for block in iter(lambda: source.read(1024**2), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_meta(entry_dir):
+    # The meta file describes the source version and the cached columns
+    try:
+        with open(os.path.join(entry_dir, 'meta.json')) as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+def write_meta(entry_dir, meta):
+    # Write the meta file last and atomically, so a half-written entry never looks valid
+    temp_path = os.path.join(entry_dir, 'meta.json.tmp')
+    with open(temp_path, 'w') as meta_file:
+        json.dump(meta, meta_file, indent=1)
+    os.replace(temp_path, os.path.join(entry_dir, 'meta.json'))
+# ------------------------------------------------------------- #
+
+
+
+# Cache Checking Functions
+# ------------------------------------------------------------- #
+def source_version(file, filetype, verify):
+    # Size and modification time always, plus a content hash in 'hash' mode
+    stat = os.stat(file)
+    version = {'source': os.path.abspath(file), 'filetype': filetype, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if verify == 'hash':
+        version['sha256'] = file_hash(file)
+    return version
+
+def entry_is_current(meta, version, verify):
+    # An entry is only usable for the same file, filetype and size
+    if meta is None or any(meta.get(key) != version[key] for key in ('source', 'filetype', 'size')):
+        return False
+
+    # In 'hash' mode a touched but unchanged file still matches; otherwise the mtime must match
+    if verify == 'hash':
+        return meta.get('sha256') == version['sha256']
+    return meta.get('mtime_ns') == version['mtime_ns']
+
+def read_cached_columns(file, filetype, columns, verify='mtime'):
+    # Return memory-mapped arrays of the columns, or None if any of them is not cached for this file version
+    entry_dir = cache_entry_dir(file)
+    meta = read_meta(entry_dir)
+    if not entry_is_current(meta, source_version(file, filetype, verify), verify):
+        return None
+    if any(column not in meta['columns'] for column in columns):
+        return None
+
+    # Each column is a raw binary file mapped straight into memory
+    cached = {}
+    for column in dict.fromkeys(columns):
+        info = meta['columns'][column]
+        if meta['rows'] == 0:
+            cached[column] = np.empty(0, dtype=np.dtype(info['dtype']))
+        else:
+            cached[column] = np.memmap(os.path.join(entry_dir, info['file']), dtype=np.dtype(info['dtype']), mode='r', shape=(meta['rows'],))
+    return cached
+# ------------------------------------------------------------- #
+
+
+
+# Cache Writing Functions
+# ------------------------------------------------------------- #
+def cache_chunks(file, filetype, columns, chunks, verify='mtime'):
+    # Pass chunks (dicts of column arrays) through while appending their columns to the cache;
+    # the new columns only become valid once every chunk has been written
+    version = source_version(file, filetype, verify)
+    entry_dir = cache_entry_dir(file)
+    meta = read_meta(entry_dir)
+
+    # Keep the columns already cached for this file version, and start over if the file changed
+    if entry_is_current(meta, version, verify):
+        meta.update(version)
+    else:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        meta = dict(version, columns={}, rows=None)
+    os.makedirs(entry_dir, exist_ok=True)
+
+    # New columns are numbered after the existing ones
+    columns = [column for column in dict.fromkeys(columns) if column not in meta['columns']]
+    files = {column: f'column_{len(meta["columns"]) + j}.bin' for j, column in enumerate(columns)}
+    handles = {column: open(os.path.join(entry_dir, files[column]), 'wb') for column in columns}
+    dtypes = {}
+    rows = 0
+    complete = True
+    try:
+        for chunk in chunks:
+            for column in columns if complete else []:
+                # Columns are stored as plain numbers so they can be memory-mapped back
+                values = np.asarray(chunk[column])
+                if values.dtype.kind == 'O':
+                    values = values.astype(np.float64)
+                if column not in dtypes:
+                    dtypes[column] = values.dtype
+                
+                # A later chunk that needs a wider type (e.g. ints that gain a NaN) cannot be appended
+                if not np.can_cast(values.dtype, dtypes[column], casting='safe'):
+                    complete = False
+                    break
+                values.astype(dtypes[column], copy=False).tofile(handles[column])
+            rows = rows + len(next(iter(chunk.values())))
+            yield chunk
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    # Record the new columns only if the whole file was written and matches the cached row count
+    if not complete or (meta['rows'] is not None and meta['rows'] != rows):
+        return
+    meta['rows'] = rows
+    for column in columns:
+        meta['columns'][column] = {'file': files[column], 'dtype': dtypes.get(column, np.dtype(np.float64)).str}
+    write_meta(entry_dir, meta)
+
+def store_table_columns(file, filetype, table, verify='mtime'):
+    # Cache the given columns of an already parsed table
+    for _ in cache_chunks(file, filetype, list(table), [table], verify=verify):
+        pass
+    return read_cached_columns(file, filetype, list(table), verify=verify)
+# ------------------------------------------------------------- #
+
+
+
+# Cache Management Functions
+# ------------------------------------------------------------- #
+def list_table_cache():
+    # Describe every cache entry, including whether its source file has changed since
+    entries = []
+    cache_dir = table_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return entries
+    for name in sorted(os.listdir(cache_dir)):
+        entry_dir = os.path.join(cache_dir, name)
+        meta = read_meta(entry_dir)
+        if meta is None:
+            continue
+        size = sum(os.path.getsize(os.path.join(entry_dir, cached)) for cached in os.listdir(entry_dir))
+        try:
+            current = entry_is_current(meta, source_version(meta['source'], meta['filetype'], 'mtime'), 'mtime')
+        except OSError:
+            current = False
+        entries.append({
+            'source': meta['source'],
+            'filetype': meta['filetype'],
+            'rows': meta['rows'],
+            'columns': list(meta['columns']),
+            'bytes': size,
+            'current': current,
+            'path': entry_dir,
+        })
+    return entries
+
+def clear_table_cache(files=None):
+    # Remove the entries of the given source files, or the whole cache
+    if files is None:
+        removed = len(list_table_cache())
+        shutil.rmtree(table_cache_dir(), ignore_errors=True)
+        return removed
+    removed = 0
+    for file in files:
+        entry_dir = cache_entry_dir(file)
+        if os.path.isdir(entry_dir):
+            shutil.rmtree(entry_dir)
+            removed = removed + 1
+    return removed
+# ------------------------------------------------------------- #
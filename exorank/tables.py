@@ -0,0 +1,98 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Table Reading
+#
+# Purpose: Read the ranking, true-positive and true-negative tables
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+from astropy.io import fits
+from astropy.io import ascii
+from astropy.table import Table
+import pandas as pd
+# ------------------------------------------------------------- #
+
+
+# Supported File Types
+# ------------------------------------------------------------- #
+filetype_list = ['CSV', 'FITS', 'ASCII', 'IPAC']
+# ------------------------------------------------------------- #
+
+
+
+# Table Reading Functions
+# ------------------------------------------------------------- #
+def read_table(file, filetype):
+    # Reads in the file depending on the filetype
+    if filetype == 'CSV':
+        # If the file is a CSV, read it using pandas
+        return pd.read_csv(file)
+    if filetype == 'FITS':
+        # If the file is a FITS, memory-map the first extension using astropy; the file is closed
+        # again at once, while the memory map stays open for as long as the table is in use
+        with fits.open(file, memmap=True) as fits_table:
+            return fits_table[1].data
+    if filetype == 'ASCII':
+        # If the file is an ASCII file, read it using astropy's ascii module
+        return ascii.read(file)
+    if filetype == 'IPAC':
+        # If the file is an IPAC table, read it using astropy's ascii module with IPAC format
+        return ascii.read(file, format='ipac')
+    
+    # Any other filetype is not supported
+    raise ValueError(f'Unsupported filetype {filetype!r}, expected one of {filetype_list}')
+
+def read_fits_columns(file, columns):
+    # Memory-map the FITS table so nothing is read until a column is used
+    with fits.open(file, memmap=True) as fits_table:
+        data = fits_table[1].data
+        
+        # Name the first missing column, like a DataFrame would
+        for column in columns:
+            if column not in data.columns.names:
+                raise KeyError(column)
+        
+        # Each requested column is a view into the memory map in the file's big-endian byte order;
+        # native_column copies a column into native byte order once it is used
+        return {column: data[column] for column in dict.fromkeys(columns)}
+
+def native_column(column):
+    # Masked entries (e.g. IPAC nulls) become NaN, promoting integer columns to float when needed
+    if np.ma.isMaskedArray(column):
+        if column.dtype.kind in 'fc':
+            column = column.filled(np.nan)
+        elif column.dtype.kind in 'iub' and np.ma.getmaskarray(column).any():
+            column = column.astype(np.float64).filled(np.nan)
+        else:
+            column = column.filled()
+    
+    # Return the column as an array in native byte order, since FITS columns are stored big-endian
+    column = np.asarray(column)
+    if not column.dtype.isnative:
+        column = column.astype(column.dtype.newbyteorder('='))
+    return column
+
+def table_frame(table):
+    # Convert a CSV, FITS or ASCII/IPAC table to a pandas DataFrame
+    if isinstance(table, pd.DataFrame):
+        return table
+    if isinstance(table, fits.FITS_rec):
+        table = Table(table)
+    if isinstance(table, Table):
+        return table.to_pandas()
+    return pd.DataFrame(table)
+
+def column_read(table, user_options, user_types):
+    # Initialize an empty list to hold the column data
+    total_column = []
+    
+    # Iterate over the list of user-specified columns
+    for i in range(len(user_options)):
+        # Append the data from the specified column to the total_column list as an array
+        total_column.append(native_column(table[user_options[i]]))
+    
+    # Return the list of columns
+    return total_column
+# ------------------------------------------------------------- #
@@ -0,0 +1,203 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Column Transforms
+#
+# Purpose: Registry of the column types and the transform each one applies
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import importlib
+import contextlib
+import numpy as np
+# ------------------------------------------------------------- #
+
+
+# Transform Registry
+# ------------------------------------------------------------- #
+# Maps each column type to its transform function and metadata
+transform_registry = {}
+# ------------------------------------------------------------- #
+
+
+
+# Transform Registry Functions
+# ------------------------------------------------------------- #
+def register_transform(name, function, units='', low=None, high=None, low_inclusive=True, high_inclusive=True, description='', invalid='nan', overwrite=False, source=None):
+    # Refuse to silently replace an existing type unless asked to
+    if name in transform_registry and not overwrite:
+        raise ValueError(f'A transform named {name!r} is already registered')
+    
+    # Invalid values become NaN (left out of the rank), are clipped to the nearest bound of the
+    # domain before the transform, or become a fixed fill value of the transformed column
+    if invalid == 'clip' and low is None and high is None:
+        raise ValueError(f'The invalid policy of {name!r} can only be "clip" with a "low" or "high" bound')
+    if invalid not in ('nan', 'clip'):
+        try:
+            invalid = float(invalid)
+        except (TypeError, ValueError):
+            raise ValueError(f'The invalid policy of {name!r} must be "nan", "clip" or a number, not {invalid!r}')
+
+    # Each transform takes a float64 array and returns an array of the same length
+    transform_registry[name] = {
+        'name': name,
+        'function': function,
+        'units': units,
+        'low': low,
+        'high': high,
+        'low_inclusive': low_inclusive,
+        'high_inclusive': high_inclusive,
+        'description': description,
+        'invalid': invalid,
+        'source': source,
+    }
+    return transform_registry[name]
+
+def get_transform(name):
+    # Look up a transform, listing the known types if it does not exist
+    try:
+        return transform_registry[name]
+    except KeyError:
+        raise ValueError(f'Unknown column type {name!r}, expected one of {transform_names()}')
+
+def transform_key(name):
+    # What a transformed column depends on: the type's expression or import path (its function
+    # object when it was registered from Python), its domain and its invalid policy
+    transform = get_transform(name)
+    return (name, transform['source'] or transform['function']) + tuple(transform[field] for field in ('low', 'high', 'low_inclusive', 'high_inclusive', 'invalid'))
+
+def transform_names():
+    # The registered column types, in registration order
+    return list(transform_registry)
+
+def transform_domain(transform):
+    # Human readable valid domain, e.g. "0 < x <= 1"
+    low = '' if transform['low'] is None else f"{transform['low']} {'<=' if transform['low_inclusive'] else '<'} "
+    high = '' if transform['high'] is None else f" {'<=' if transform['high_inclusive'] else '<'} {transform['high']}"
+    return f'{low}x{high}' if low or high else 'any finite x'
+
+def invalid_policy(transform):
+    # Human readable invalid policy, e.g. "NaN", "nearest bound" or "-499.0"
+    if transform['invalid'] == 'clip':
+        return 'nearest bound'
+    return 'NaN' if transform['invalid'] == 'nan' else str(transform['invalid'])
+
+def valid_mask(transform, column):
+    # Finite values inside the transform's domain
+    valid = np.isfinite(column)
+    if transform['low'] is not None:
+        valid &= (column >= transform['low']) if transform['low_inclusive'] else (column > transform['low'])
+    if transform['high'] is not None:
+        valid &= (column <= transform['high']) if transform['high_inclusive'] else (column < transform['high'])
+    return valid
+
+def apply_transform(column, name):
+    # Convert the column to a float64 array so the transform runs once over the whole column
+    transform = get_transform(name)
+    column = np.asarray(column, dtype=np.float64)
+
+    # Values outside the domain (e.g. plx = 0 or distance < 0), and values the transform cannot
+    # score (e.g. mag = 0), follow the type's invalid policy instead of turning into inf, and are counted
+    invalid = ~valid_mask(transform, column) & ~np.isnan(column)
+    if transform['invalid'] == 'clip':
+        # Finite values outside the domain are scored at its nearest bound; infinities get no score
+        column = np.where(invalid & np.isfinite(column), np.clip(column, transform['low'], transform['high']), column)
+    with np.errstate(all='ignore'):
+        values = np.asarray(transform['function'](column), dtype=np.float64)
+    invalid |= ~np.isfinite(values) & ~np.isnan(column)
+    n_invalid = int(np.count_nonzero(invalid))
+    if n_invalid and transform['invalid'] == 'clip':
+        # Clipped values keep their score; only values still without a finite score become NaN
+        values = np.where(np.isfinite(values), values, np.nan)
+    elif n_invalid:
+        values = np.where(invalid, np.nan if transform['invalid'] == 'nan' else transform['invalid'], values)
+
+    # Return the transformed column and the number of invalid values
+    return values, n_invalid
+# ------------------------------------------------------------- #
+
+
+
+# Custom Transform Functions
+# ------------------------------------------------------------- #
+def expression_function(expression):
+    # Compile a numpy expression of x once, e.g. "-5 * np.log10(x) + 10"
+    code = compile(expression, f'<transform {expression!r}>', 'eval')
+    def function(x):
+        return eval(code, {'__builtins__': {}, 'np': np}, {'x': x})
+    return function
+
+def import_function(path):
+    # Import a callable given as "module:function"
+    module_name, _, function_name = path.partition(':')
+    if not function_name:
+        raise ValueError(f'Transform function {path!r} must look like "module:function"')
+    return getattr(importlib.import_module(module_name), function_name)
+
+def register_spec_transforms(transforms):
+    # Register the custom transforms of a ranking spec, keyed by their type name; an already
+    # registered type (e.g. a built-in) is only replaced when the transform sets "overwrite": true.
+    # Return the entries they replaced (None for new types), so restore_transforms can undo them
+    replaced = {}
+    try:
+        for name, options in (transforms or {}).items():
+            if name in transform_registry and not options.get('overwrite', False):
+                raise ValueError(f'Custom transform {name!r} would replace the registered type of that name; add "overwrite": true to replace it')
+            if 'expression' in options:
+                function = expression_function(options['expression'])
+                source = f"expression {options['expression']}"
+            elif 'function' in options:
+                function = import_function(options['function'])
+                source = f"function {options['function']}"
+            else:
+                raise ValueError(f'Custom transform {name!r} needs an "expression" or a "function"')
+            replaced.setdefault(name, transform_registry.get(name))
+            register_transform(name, function, units=options.get('units', ''), low=options.get('low'), high=options.get('high'), low_inclusive=options.get('low_inclusive', True), high_inclusive=options.get('high_inclusive', True), description=options.get('description', ''), invalid=options.get('invalid', 'nan'), overwrite=True, source=source)
+    except BaseException:
+        restore_transforms(replaced)
+        raise
+    return replaced
+
+def restore_transforms(replaced):
+    # Put back the entries returned by register_spec_transforms, and drop the types it added
+    for name, transform in replaced.items():
+        if transform is None:
+            transform_registry.pop(name, None)
+        else:
+            transform_registry[name] = transform
+
+@contextlib.contextmanager
+def spec_transforms(transforms):
+    # The custom types of a spec only exist for the run that declared them
+    replaced = register_spec_transforms(transforms)
+    try:
+        yield
+    finally:
+        restore_transforms(replaced)
+# ------------------------------------------------------------- #
+
+
+
+# Built-in Transforms
+# ------------------------------------------------------------- #
+# Probability of white dwarf (assumed to be milliparsecs)
+# A probability outside [0, 1] (e.g. rounding to 1.0000001) is scored at the nearest of 0 and 1 rather than dropped
+register_transform('pwd', lambda x: np.exp(x*7.5) - 500, units='probability', low=0, high=1, description='Probability of White Dwarf', invalid='clip')
+
+# Magnitude of a particular band
+# Negative magnitudes (bright targets) are valid; only x = 0 has no score
+register_transform('mag', lambda x: 10000/x, units='mag', description='Magnitude')
+
+# Parallax (assumed to be in milliarcseconds)
+register_transform('plx', lambda x: -1*np.sqrt(1000/x) + 100, units='mas', low=0, low_inclusive=False, description='Parallax')
+
+# Distance in parsecs
+register_transform('distance', lambda x: -1*np.sqrt(x) + 100, units='pc', low=0, description='Distance')
+
+# Effective temperature (assumed to be in units of 10,000 K)
+register_transform('teff', lambda x: x / 100, units='K', low=0, description='Effective Temperature')
+
+# Proper motion (assumed to be in milliarcseconds/year)
+# float_power keeps the libm pow() rounding of the scalar x**(1/2) used originally
+register_transform('pm', lambda x: (-50 * np.float_power(x, 1/2)) + 500, units='mas/yr', low=0, description='Proper Motion')
+# ------------------------------------------------------------- #
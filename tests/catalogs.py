@@ -0,0 +1,63 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Test Catalogs
+#
+# Purpose: Small random catalogs and control tables shared by the tests
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import numpy as np
+import pandas as pd
+from exorank.output import rank_table_save
+# ------------------------------------------------------------- #
+
+
+# Test Settings
+# ------------------------------------------------------------- #
+user_options = ['pwd', 'plx', 'pm']
+user_types = ['pwd', 'plx', 'pm']
+user_scalings = [1.0, 0.5, 0.25]
+# ------------------------------------------------------------- #
+
+
+
+# Catalog Functions
+# ------------------------------------------------------------- #
+def catalog_frame(rng, n_rows):
+    # Random targets with missing values, out-of-domain values and tied scores
+    frame = pd.DataFrame({
+        'RA': rng.uniform(0, 360, n_rows),
+        'DEC': np.degrees(np.arcsin(rng.uniform(-1, 1, n_rows))),
+        'pwd': rng.uniform(0, 1, n_rows),
+        'plx': rng.uniform(0.1, 50, n_rows),
+        'pm': rng.uniform(0, 500, n_rows),
+    })
+    for column in user_options:
+        frame.loc[rng.random(n_rows) < 0.05, column] = np.nan
+    frame.loc[rng.random(n_rows) < 0.01, 'plx'] = 0.0
+    frame.loc[:200, 'pwd'] = 0.5
+    return frame
+
+def write_tables(folder):
+    # One catalog written as a single CSV and as three shards, plus the control tables
+    rng = np.random.default_rng(7)
+    catalog = catalog_frame(rng, 6000)
+    catalog.to_csv(folder / 'catalog.csv', index=False)
+    os.makedirs(folder / 'shards')
+    for n, start in enumerate(range(0, len(catalog), 2500)):
+        catalog.iloc[start:start + 2500].to_csv(folder / 'shards' / f'part_{n}.csv', index=False)
+    catalog_frame(rng, 40).to_csv(folder / 'tp.csv', index=False)
+    catalog_frame(rng, 30).to_csv(folder / 'tn.csv', index=False)
+    return folder
+
+def subject_sets(ranked_table, tables, output_dir, workers=1):
+    # Save the subject sets and return every file's bytes, keyed by file name
+    rank_table_save(ranked_table, pd.read_csv(tables / 'tp.csv'), 'run', 500, 0.1, 0.1, pd.read_csv(tables / 'tn.csv'), output_dir=str(output_dir), seed=3, workers=workers)
+    return {name: open(os.path.join(output_dir, name), 'rb').read() for name in sorted(os.listdir(output_dir))}
+
+def subject_set_files(output_dir):
+    # Every subject set file's bytes, keyed by file name
+    return {name: open(os.path.join(output_dir, name), 'rb').read() for name in sorted(os.listdir(output_dir)) if '_subjectset_' in name}
+# ------------------------------------------------------------- #
@@ -0,0 +1,23 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Test Fixtures
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import pytest
+from exorank.cache import clear_cache
+from .catalogs import write_tables
+# ------------------------------------------------------------- #
+
+
+
+# Shared Fixtures
+# ------------------------------------------------------------- #
+@pytest.fixture(scope='session')
+def tables(tmp_path_factory):
+    # The catalog, its shards and the control tables, written once per test session
+    folder = write_tables(tmp_path_factory.mktemp('tables'))
+    clear_cache()
+    return folder
+# ------------------------------------------------------------- #
@@ -0,0 +1,66 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Cache Tests
+#
+# Purpose: Check which entries the in-memory cache keeps and drops
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import numpy as np
+import pandas as pd
+from exorank.cache import cache_info, clear_cache
+from exorank.pipeline import load_parameters
+from exorank.transforms import spec_transforms
+# ------------------------------------------------------------- #
+
+
+
+# Cache Tests
+# ------------------------------------------------------------- #
+def write_catalog(path, n_rows, seed):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({'RA': rng.uniform(0, 360, n_rows), 'DEC': rng.uniform(-90, 90, n_rows), 'pwd': rng.uniform(0, 1, n_rows), 'plx': rng.uniform(0.1, 50, n_rows)}).to_csv(path, index=False)
+
+def test_alternating_settings_hit(tmp_path):
+    # Two precisions and two column choices of the same file all stay cached side by side
+    write_catalog(tmp_path / 'catalog.csv', 500, 1)
+    clear_cache()
+    settings = [(['pwd'], ['pwd'], 'float64'), (['pwd'], ['pwd'], 'float32'), (['pwd', 'plx'], ['pwd', 'plx'], 'float64')]
+    for _ in range(3):
+        for user_options, user_types, precision in settings:
+            load_parameters(str(tmp_path / 'catalog.csv'), 'CSV', user_options, user_types, table_cache=False, precision=precision)
+    info = cache_info()
+    assert info['misses'] == len(settings)
+    assert info['hits'] == 2 * len(settings)
+    assert info['entries'] == len(settings)
+
+def test_changed_file_drops_old_versions(tmp_path):
+    # Once the file changes, every entry of its old version is dropped on the next insert
+    path = tmp_path / 'catalog.csv'
+    write_catalog(path, 500, 1)
+    clear_cache()
+    load_parameters(str(path), 'CSV', ['pwd'], ['pwd'], table_cache=False)
+    load_parameters(str(path), 'CSV', ['pwd'], ['pwd'], table_cache=False, precision='float32')
+    write_catalog(path, 700, 2)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    store = load_parameters(str(path), 'CSV', ['pwd'], ['pwd'], table_cache=False)
+    assert len(store['ra']) == 700
+    assert cache_info()['entries'] == 1
+
+def test_spec_transforms_hit_in_the_next_run(tmp_path):
+    # Each run compiles its spec expressions again, but the same expression is the same entry
+    write_catalog(tmp_path / 'catalog.csv', 500, 1)
+    clear_cache()
+    for expression in ['np.log10(x)', 'np.log10(x)', '2 * np.log10(x)']:
+        with spec_transforms({'test_log': {'expression': expression, 'low': 0, 'low_inclusive': False}}):
+            store = load_parameters(str(tmp_path / 'catalog.csv'), 'CSV', ['plx'], ['test_log'], table_cache=False)
+    assert cache_info()['hits'] == 1 and cache_info()['misses'] == 2
+    assert np.allclose(store['parameter_matrix'][:, 0], 2 * np.log10(store['column_space'][0]))
+    
+    # A new domain is a new entry too
+    with spec_transforms({'test_log': {'expression': 'np.log10(x)', 'low': 1, 'low_inclusive': False}}):
+        load_parameters(str(tmp_path / 'catalog.csv'), 'CSV', ['plx'], ['test_log'], table_cache=False)
+    assert cache_info()['misses'] == 3
+# ------------------------------------------------------------- #
@@ -0,0 +1,131 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Checkpoint Tests
+#
+# Purpose: Check that resumed exports only rewrite missing or changed subject
+#          sets, and when a checkpointed ranking is reused
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import shutil
+import pytest
+from exorank.pipeline import run
+from exorank.instrument import add_event_handler, remove_event_handler
+from .catalogs import user_options, user_types, user_scalings, subject_set_files
+# ------------------------------------------------------------- #
+
+
+
+# Test Helpers
+# ------------------------------------------------------------- #
+def checkpoint_spec(tables, output_dir, **settings):
+    spec = {
+        'file': str(tables / 'catalog.csv'),
+        'type': 'CSV',
+        'tp_file': str(tables / 'tp.csv'),
+        'tn_file': str(tables / 'tn.csv'),
+        'output': 'run',
+        'output_dir': str(output_dir),
+        'columns': [{'name': name, 'type': kind, 'scaling': scaling} for name, kind, scaling in zip(user_options, user_types, user_scalings)],
+        'chunk_size': 500,
+        'true_positive_perc': 0.1,
+        'true_negative_perc': 0.1,
+        'table_cache': False,
+        'checkpoint': True,
+    }
+    spec.update(settings)
+    return spec
+
+def run_stages(spec):
+    # Run the spec and return its finished stage records, keyed by stage name
+    stages = {}
+    def handler(event):
+        if event['event'] == 'stage':
+            stages[event['stage']] = event
+    add_event_handler(handler)
+    try:
+        run(spec)
+    finally:
+        remove_event_handler(handler)
+    return stages
+# ------------------------------------------------------------- #
+
+
+
+# Resume Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('stream', [False, True])
+def test_resume_rewrites_only_missing_and_corrupted_sets(tables, tmp_path, stream):
+    spec = checkpoint_spec(tables, tmp_path / 'out', stream=stream, chunk_memory_mb=0.05)
+    run_stages(spec)
+    expected = subject_set_files(spec['output_dir'])
+    names = sorted(expected)
+    assert len(names) > 5
+    
+    # Mark every file with an old modification time, so a rewrite shows up
+    for name in names:
+        os.utime(os.path.join(spec['output_dir'], name), ns=(10**9, 10**9))
+    os.remove(os.path.join(spec['output_dir'], names[1]))
+    with open(os.path.join(spec['output_dir'], names[2]), 'ab') as corrupted:
+        corrupted.write(b'0')
+    
+    # Cut the journal as a crash would: the last two records are lost and one line is half written
+    journal_path = os.path.join(spec['output_dir'], 'run_export.jsonl')
+    lines = open(journal_path).read().splitlines(True)
+    lost = lines[-2:]
+    with open(journal_path, 'w') as journal:
+        journal.write(''.join(lines[:-2]) + lost[0][:len(lost[0]) // 2])
+    
+    stages = run_stages(dict(spec, resume=True))
+    assert stages['load_checkpoint']['reused']
+    assert subject_set_files(spec['output_dir']) == expected
+    rewritten = [name for name in names if os.stat(os.path.join(spec['output_dir'], name)).st_mtime_ns != 10**9]
+    assert len(rewritten) == 4 and names[1] in rewritten and names[2] in rewritten
+    assert stages['write']['skipped'] == len(names) - 4
+
+def test_resume_with_other_settings_rewrites_everything(tables, tmp_path):
+    spec = checkpoint_spec(tables, tmp_path / 'out')
+    run_stages(spec)
+    stages = run_stages(dict(spec, resume=True, seed=2))
+    assert stages['write']['skipped'] == 0
+    fresh = checkpoint_spec(tables, tmp_path / 'fresh', seed=2, checkpoint=False)
+    run_stages(fresh)
+    assert subject_set_files(spec['output_dir']) == subject_set_files(fresh['output_dir'])
+# ------------------------------------------------------------- #
+
+
+
+# Ranking Reuse Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('stream', [False, True])
+def test_changed_chunk_size_reuses_ranking(tables, tmp_path, stream):
+    spec = checkpoint_spec(tables, tmp_path / 'out', stream=stream, chunk_memory_mb=0.05)
+    assert not run_stages(spec)['load_checkpoint']['reused']
+    stages = run_stages(dict(spec, chunk_size=400))
+    assert stages['load_checkpoint']['reused'] and 'save_checkpoint' not in stages
+    
+    # The reused ranking writes the same subject sets as a run from scratch (the 500 row sets are left behind)
+    fresh = checkpoint_spec(tables, tmp_path / 'fresh', chunk_size=400, checkpoint=False)
+    run_stages(fresh)
+    written = subject_set_files(fresh['output_dir'])
+    assert {name: subject_set_files(spec['output_dir'])[name] for name in written} == written
+
+def test_changed_spec_or_table_is_ranked_again(tables, tmp_path):
+    shutil.copy(tables / 'catalog.csv', tmp_path / 'catalog.csv')
+    spec = checkpoint_spec(tables, tmp_path / 'out', file=str(tmp_path / 'catalog.csv'))
+    run_stages(spec)
+    
+    # New scalings change the ranking
+    rescaled = dict(spec, columns=[dict(column, scaling=0.5) for column in spec['columns']])
+    assert not run_stages(rescaled)['load_checkpoint']['reused']
+    assert run_stages(rescaled)['load_checkpoint']['reused']
+    
+    # So does a ranking table with new content
+    lines = open(tmp_path / 'catalog.csv').read().splitlines(True)
+    with open(tmp_path / 'catalog.csv', 'w') as catalog:
+        catalog.write(''.join(lines[:-100]))
+    stages = run_stages(rescaled)
+    assert not stages['load_checkpoint']['reused'] and stages['rank']['rows'] == len(lines) - 101
+# ------------------------------------------------------------- #
@@ -0,0 +1,34 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Control Tests
+#
+# Purpose: Check the control rows planned for every subject set
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pytest
+from exorank.controls import draw_controls
+# ------------------------------------------------------------- #
+
+
+
+# Control Draw Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('replace', [True, False])
+@pytest.mark.parametrize('n_rows, n_draws, n_chunks', [(5, 3, 200), (7, 7, 20), (10, 4, 1), (40, 6, 333)])
+def test_no_row_twice_in_one_chunk(replace, n_rows, n_draws, n_chunks):
+    picks = draw_controls(np.random.default_rng(1), n_chunks, n_rows, n_draws, replace)
+    assert picks.shape == (n_chunks, n_draws)
+    assert all(len(set(chunk)) == n_draws for chunk in picks.tolist())
+    assert picks.min() >= 0 and picks.max() < n_rows
+
+@pytest.mark.parametrize('n_rows, n_draws, n_chunks', [(5, 3, 200), (40, 6, 333), (12, 4, 30)])
+def test_without_replacement_uses_every_row_per_pass(n_rows, n_draws, n_chunks):
+    # Carrying skipped rows over keeps every row's use count within one of every other row's
+    flat = draw_controls(np.random.default_rng(2), n_chunks, n_rows, n_draws, False).ravel()
+    for end in range(n_rows, len(flat) + 1, n_rows):
+        counts = np.bincount(flat[:end], minlength=n_rows)
+        assert counts.max() - counts.min() <= 1
+# ------------------------------------------------------------- #
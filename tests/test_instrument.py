@@ -0,0 +1,125 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Instrumentation Tests
+#
+# Purpose: Check the stage and progress events, their handlers, and that a
+#          run without a console handler prints nothing
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import json
+import pandas as pd
+import pytest
+from exorank.__main__ import main
+from exorank.instrument import add_event_handler, remove_event_handler, event_handlers, stage, progress, progress_settings, message, console_handler
+from exorank.pipeline import rank
+from .catalogs import user_options, user_types, user_scalings
+# ------------------------------------------------------------- #
+
+
+
+# Test Helpers
+# ------------------------------------------------------------- #
+@pytest.fixture
+def events():
+    # Every event sent while the test runs
+    caught = []
+    add_event_handler(caught.append)
+    yield caught
+    remove_event_handler(caught.append)
+
+def spec_file(tables, tmp_path):
+    spec = {
+        'file': str(tables / 'catalog.csv'),
+        'type': 'CSV',
+        'tp_file': str(tables / 'tp.csv'),
+        'tn_file': str(tables / 'tn.csv'),
+        'output': 'run',
+        'output_dir': str(tmp_path / 'out'),
+        'columns': [{'name': name, 'type': kind, 'scaling': scaling} for name, kind, scaling in zip(user_options, user_types, user_scalings)],
+        'chunk_size': 1000,
+        'true_positive_perc': 0.1,
+        'true_negative_perc': 0.1,
+        'table_cache': False,
+    }
+    with open(tmp_path / 'spec.json', 'w') as spec_json:
+        json.dump(spec, spec_json)
+    return str(tmp_path / 'spec.json')
+# ------------------------------------------------------------- #
+
+
+
+# Event Tests
+# ------------------------------------------------------------- #
+def test_stage_sends_start_and_end_events(events):
+    with stage('outer', file='catalog.csv') as record:
+        with stage('inner'):
+            pass
+        record['rows'] = 12
+    assert [(event['event'], event['stage']) for event in events] == [('stage_start', 'outer'), ('stage_start', 'inner'), ('stage', 'inner'), ('stage', 'outer')]
+    assert events[-1]['rows'] == 12 and events[-1]['file'] == 'catalog.csv' and events[-1]['seconds'] >= 0
+    
+    # A failing stage reports the error instead of a record, and the error is raised as usual
+    with pytest.raises(KeyError):
+        with stage('failing'):
+            raise KeyError('RA')
+    assert events[-1]['event'] == 'stage_failed' and events[-1]['stage'] == 'failing' and 'RA' in events[-1]['error']
+
+def test_progress_is_throttled(events, monkeypatch):
+    monkeypatch.setitem(progress_settings, 'interval', 3600)
+    for done in range(1, 101):
+        progress('throttled', done, total=100)
+    
+    # Only the first call and the last one, which completes the stage, get through
+    assert [event['done'] for event in events] == [1, 100]
+    
+    # A finished stage starts the next one's throttling afresh
+    with stage('throttled'):
+        pass
+    progress('throttled', 1, total=100)
+    assert [event['done'] for event in events if event['event'] == 'progress'] == [1, 100, 1]
+    
+    monkeypatch.setitem(progress_settings, 'interval', 0)
+    for done in range(2, 6):
+        progress('throttled', done)
+    assert len([event for event in events if event['event'] == 'progress']) == 7
+
+def test_removed_handler_gets_no_events():
+    caught = []
+    add_event_handler(caught.append)
+    message('before')
+    remove_event_handler(caught.append)
+    remove_event_handler(caught.append)
+    message('after')
+    with stage('after'):
+        progress('after', 1, 1)
+    assert [event['text'] for event in caught] == ['before']
+    assert caught.append not in event_handlers
+# ------------------------------------------------------------- #
+
+
+
+# Quiet Run Tests
+# ------------------------------------------------------------- #
+def test_library_calls_print_nothing(tables, capsys):
+    catalog = pd.read_csv(tables / 'catalog.csv')
+    rank(catalog, user_options, user_types, user_scalings)
+    assert capsys.readouterr().out == ''
+    
+    # The same messages are printed once a console handler is added
+    add_event_handler(console_handler)
+    try:
+        ranked = rank(catalog, user_options, user_types, user_scalings)
+    finally:
+        remove_event_handler(console_handler)
+    out = capsys.readouterr().out
+    assert 'Table Is Being Ranked!' in out and 'Stage score' in out and len(ranked) == len(catalog)
+
+def test_quiet_command_line_prints_nothing(tables, tmp_path, capsys):
+    assert main(['run', spec_file(tables, tmp_path), '--quiet']) == 0
+    assert capsys.readouterr().out == ''
+    assert main(['run', spec_file(tables, tmp_path), '--output', 'loud']) == 0
+    out = capsys.readouterr().out
+    assert 'ExoRANK Has Finished Running!' in out and 'Table Is Being Saved!' in out and 'Stage write' in out
+# ------------------------------------------------------------- #
@@ -0,0 +1,144 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Job Queue Tests
+#
+# Purpose: Check that queued jobs can be cancelled or skipped, that their
+#          failures are reported, and that ranking jobs report progress
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import queue
+import threading
+import pytest
+import exorank.ranking
+from exorank.jobs import JobQueue
+from exorank.instrument import progress, progress_settings
+from exorank.cache import clear_cache
+from exorank.pipeline import rank_file
+from .catalogs import user_options, user_types, user_scalings
+# ------------------------------------------------------------- #
+
+
+
+# Test Helpers
+# ------------------------------------------------------------- #
+@pytest.fixture
+def job_queue(monkeypatch):
+    # A job queue whose events are collected in a thread-safe queue; progress is not throttled
+    monkeypatch.setitem(progress_settings, 'interval', 0)
+    events = queue.Queue()
+    jobs = JobQueue(events.put)
+    yield jobs, events
+    jobs.close(timeout=10)
+
+def next_event(events, name, job=None):
+    # Wait for the next event of this kind (and job), returning the events skipped on the way
+    seen = []
+    while True:
+        event = events.get(timeout=10)
+        seen.append(event)
+        if event['event'] == name and (job is None or event.get('job') == job):
+            return event, seen
+
+def stub_job(started, release, steps=100):
+    # Report progress until released, like a ranking job working through its chunks
+    started.set()
+    for step in range(steps):
+        progress('stub', step + 1, steps)
+        if release.wait(0.01):
+            break
+    return 'finished'
+# ------------------------------------------------------------- #
+
+
+
+# Job Queue Tests
+# ------------------------------------------------------------- #
+def test_running_job_is_cancelled_at_its_next_progress_call(job_queue):
+    jobs, events = job_queue
+    started, release = threading.Event(), threading.Event()
+    first = jobs.submit(stub_job, started, release, steps=10**6)
+    started.wait(10)
+    event, seen = next_event(events, 'progress', first)
+    assert event['stage'] == 'stub'
+    assert jobs.cancel() == first
+    event, seen = next_event(events, 'job_cancelled', first)
+    assert not [event for event in seen if event['event'] == 'job_done']
+    
+    # The worker carries on with the next job
+    second = jobs.submit(stub_job, threading.Event(), threading.Event(), steps=3)
+    event, seen = next_event(events, 'job_done', second)
+    assert event['result'] == 'finished'
+    assert [event['done'] for event in seen if event['event'] == 'progress'] == [1, 2, 3]
+
+def test_cancelled_waiting_job_is_skipped(job_queue):
+    jobs, events = job_queue
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    first = jobs.submit(stub_job, started, release, steps=10**6)
+    second = jobs.submit(calls.append, 'ran')
+    third = jobs.submit(calls.append, 'ran too')
+    started.wait(10)
+    assert jobs.queued() == 2
+    jobs.cancel(second)
+    release.set()
+    
+    # The skipped job never starts, and the one behind it still runs
+    event, seen = next_event(events, 'job_done', third)
+    assert ('job_start', second) not in [(event['event'], event['job']) for event in seen]
+    assert ('job_cancelled', second) in [(event['event'], event['job']) for event in seen]
+    assert calls == ['ran too'] and jobs.queued() == 0
+
+def test_failed_job_is_reported_and_the_worker_carries_on(job_queue):
+    jobs, events = job_queue
+    def failing_job():
+        progress('stub', 1, 2)
+        raise ValueError('The ranking table needs columns named "RA" and "DEC"')
+    first = jobs.submit(failing_job)
+    event, seen = next_event(events, 'job_failed', first)
+    assert isinstance(event['error'], ValueError) and 'RA' in str(event['error'])
+    assert [event['event'] for event in seen].count('progress') == 1
+    second = jobs.submit(lambda: 42)
+    assert next_event(events, 'job_done', second)[0]['result'] == 42
+
+def test_events_of_other_threads_are_not_forwarded(job_queue):
+    jobs, events = job_queue
+    progress('main', 1, 1)
+    job = jobs.submit(lambda: progress('stub', 1, 1))
+    event, seen = next_event(events, 'job_done', job)
+    assert [event['stage'] for event in seen if event['event'] == 'progress'] == ['stub']
+# ------------------------------------------------------------- #
+
+
+
+# Ranking Job Tests
+# ------------------------------------------------------------- #
+def test_rank_file_reports_progress(job_queue, tables, monkeypatch):
+    jobs, events = job_queue
+    # Small score blocks, so the catalog is scored in several steps
+    monkeypatch.setattr(exorank.ranking, 'score_block_rows', 1000)
+    clear_cache()
+    job = jobs.submit(rank_file, str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+    event, seen = next_event(events, 'job_done', job)
+    steps = [(event['stage'], event['done'], event['total']) for event in seen if event['event'] == 'progress']
+    assert steps == [('transform', j, 3) for j in (1, 2, 3)] + [('score', done, 6000) for done in range(1000, 7000, 1000)]
+
+def test_rank_file_is_cancelled_while_scoring(tables, monkeypatch):
+    # The job is cancelled from its first scored block, and stops before the next one
+    monkeypatch.setattr(exorank.ranking, 'score_block_rows', 1000)
+    monkeypatch.setitem(progress_settings, 'interval', 0)
+    events = queue.Queue()
+    def on_event(event):
+        if event['event'] == 'progress' and event['stage'] == 'score':
+            job_queue.cancel(event['job'])
+        events.put(event)
+    job_queue = JobQueue(on_event)
+    try:
+        job = job_queue.submit(rank_file, str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+        event, seen = next_event(events, 'job_cancelled', job)
+    finally:
+        job_queue.close(timeout=10)
+    assert [event['done'] for event in seen if event['event'] == 'progress' and event['stage'] == 'score'] == [1000]
+    assert not [event for event in seen if event['event'] == 'stage' and event['stage'] in ('score', 'rank')]
+# ------------------------------------------------------------- #
@@ -0,0 +1,54 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Output Tests
+#
+# Purpose: Check how subject sets are gathered and written
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from exorank.pipeline import rank_file
+from exorank.output import build_subject_set, rank_table_save
+from .catalogs import user_options, user_types, user_scalings, subject_sets
+# ------------------------------------------------------------- #
+
+
+
+# Subject Set Tests
+# ------------------------------------------------------------- #
+def test_subject_set_gather_matches_stacked_take(tables):
+    ranked_table = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+    tp = pd.read_csv(tables / 'tp.csv').assign(name='tp')
+    tn = pd.read_csv(tables / 'tn.csv').drop(columns=['pm'])
+    parts = [ranked_table, tp.reindex(columns=ranked_table.columns), tn.reindex(columns=ranked_table.columns)]
+    rows = np.random.default_rng(5).permutation(len(ranked_table) + len(tp) + len(tn))[:900]
+    expected = pd.concat(parts, ignore_index=True).take(rows).reset_index(drop=True)
+    expected['#Target ID'] = list(range(100, 1000))
+    pd.testing.assert_frame_equal(build_subject_set(parts, rows, 100), expected)
+
+def test_writer_pool_matches_serial(tables, tmp_path):
+    ranked_table = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+    serial = subject_sets(ranked_table, tables, tmp_path / 'serial')
+    assert 'run_controls.json' in serial and len(serial) > 10
+    assert subject_sets(ranked_table, tables, tmp_path / 'pool', workers=3) == serial
+
+def test_parquet_row_groups_match_csv_sets(tables, tmp_path):
+    # Each subject set is one row group of the Parquet file, with the same rows as its CSV file
+    parquet = pytest.importorskip('pyarrow.parquet')
+    ranked_table = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+    csv_sets = subject_sets(ranked_table, tables, tmp_path / 'csv')
+    rank_table_save(ranked_table, pd.read_csv(tables / 'tp.csv'), 'run', 500, 0.1, 0.1, pd.read_csv(tables / 'tn.csv'), output_dir=str(tmp_path / 'parquet'), seed=3, output_format='parquet')
+    
+    path = tmp_path / 'parquet' / 'run_subjectsets.parquet'
+    names = [name for name in csv_sets if '_subjectset_' in name]
+    assert parquet.ParquetFile(path).num_row_groups == len(names)
+    frame = pd.read_parquet(path)
+    assert sorted(frame['#Subject Set'].unique()) == sorted(int(name[len('run_subjectset_'):-len('.csv')]) for name in names)
+    for start, part in frame.groupby('#Subject Set'):
+        expected = pd.read_csv(io.BytesIO(csv_sets[f'run_subjectset_{start}.csv']))
+        pd.testing.assert_frame_equal(part.drop(columns='#Subject Set').reset_index(drop=True), expected)
+# ------------------------------------------------------------- #
@@ -0,0 +1,131 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Ranking Tests
+#
+# Purpose: Check the vectorized transforms and weighted sum against the
+#          original row-by-row loops
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pytest
+from exorank.ranking import parm_metrix, ranking_mult, rank_order
+# ------------------------------------------------------------- #
+
+
+# Test Settings
+# ------------------------------------------------------------- #
+# Valid value range drawn for every built-in column type
+type_ranges = {
+    'pwd': (0, 1),
+    'mag': (-5, 25),
+    'plx': (0.1, 50),
+    'distance': (1, 1000),
+    'teff': (2000, 30000),
+    'pm': (0, 500),
+}
+# ------------------------------------------------------------- #
+
+
+
+# Reference Functions
+# ------------------------------------------------------------- #
+def reference_value(value, current_type):
+    # The per-cell formulas of the original ExoRANK.py parm_metrix
+    if current_type == 'pwd':
+        return (np.exp((value)*7.5)) - 500
+    if current_type == 'mag':
+        return 10000/(value)
+    if current_type == 'plx':
+        return -1*np.sqrt(1000/value) + 100
+    if current_type == 'distance':
+        return -1*np.sqrt(value) + 100
+    if current_type == 'teff':
+        return (value) / 100
+    if current_type == 'pm':
+        return (-50 * ((value)**(1/2))) + 500
+
+def reference_parm_metrix(column_space, user_types):
+    # Row by row, cell by cell, as the original loop did
+    return [[reference_value(column_space[j][i], user_types[j]) for j in range(len(user_types))] for i in range(len(column_space[0]))]
+
+def reference_ranking_mult(parameter_matrix, user_scalings):
+    # Scale each cell as a Python float and nansum the row, as the original loop did
+    return [np.nansum([float(row[j]) * float(user_scalings[j]) for j in range(len(row))]) for row in parameter_matrix]
+
+def random_columns(rng, user_types, n_rows, nan_fraction=0.05):
+    # One column per type with values in its valid range and some missing values
+    column_space = []
+    for current_type in user_types:
+        low, high = type_ranges[current_type]
+        column = rng.uniform(low, high, n_rows)
+        column[rng.random(n_rows) < nan_fraction] = np.nan
+        column_space.append(column)
+    return column_space
+# ------------------------------------------------------------- #
+
+
+
+# Ranking Tests
+# ------------------------------------------------------------- #
+def test_parm_metrix_matches_row_loop():
+    rng = np.random.default_rng(1)
+    user_types = list(type_ranges)
+    column_space = random_columns(rng, user_types, 20000)
+    
+    matrix = parm_metrix(column_space, user_types, verbose=False)
+    reference = np.array(reference_parm_metrix(column_space, user_types), dtype=np.float64)
+    assert matrix.shape == reference.shape
+    assert np.array_equal(matrix, reference, equal_nan=True)
+
+def test_ranking_mult_matches_row_loop():
+    rng = np.random.default_rng(2)
+    user_types = list(type_ranges) + ['plx', 'pwd']
+    user_scalings = list(rng.uniform(0, 1, len(user_types)))
+    column_space = random_columns(rng, user_types, 20000)
+    
+    matrix = parm_metrix(column_space, user_types, verbose=False)
+    reference = reference_ranking_mult(reference_parm_metrix(column_space, user_types), user_scalings)
+    assert np.array_equal(ranking_mult(matrix, user_scalings, verbose=False), np.array(reference))
+
+@pytest.mark.parametrize('n_columns', [1, 3, 7, 8, 9, 17])
+def test_ranking_mult_blocks_match_one_nansum(n_columns):
+    # Scoring block by block gives the same bits as one nansum over the whole matrix
+    rng = np.random.default_rng(n_columns)
+    matrix = rng.normal(size=(70000, n_columns)) * rng.uniform(0.1, 100, n_columns)
+    matrix[rng.random(matrix.shape) < 0.1] = np.nan
+    user_scalings = rng.uniform(0, 1, n_columns)
+    assert np.array_equal(ranking_mult(matrix, user_scalings, verbose=False), np.nansum(matrix * user_scalings, axis=1))
+# ------------------------------------------------------------- #
+
+
+
+# Precision Tests
+# ------------------------------------------------------------- #
+def test_float32_order_matches_float64():
+    # Only rows whose float64 scores are within float32 rounding of each other may swap places
+    rng = np.random.default_rng(4)
+    user_types = list(type_ranges)
+    user_scalings = list(rng.uniform(0, 1, len(user_types)))
+    column_space = random_columns(rng, user_types, 50000)
+    scores = ranking_mult(parm_metrix(column_space, user_types, verbose=False), user_scalings, verbose=False)
+    scores32 = ranking_mult(parm_metrix(column_space, user_types, verbose=False, dtype=np.float32), user_scalings, verbose=False)
+    
+    in_order = scores[rank_order(scores32)]
+    tolerance = 1e-6 * np.nanmax(np.abs(scores))
+    assert np.all(np.diff(in_order[~np.isnan(in_order)]) <= tolerance)
+    assert np.array_equal(np.isnan(in_order), np.sort(np.isnan(scores)))
+    assert np.mean(rank_order(scores32) == rank_order(scores)) > 0.99
+
+def test_float32_overflow_keeps_float64():
+    # Magnitudes this close to 0 score beyond the float32 range; they must not tie at inf
+    column_space = [np.array([1e-40, 1e-39, 12.0, 3e-39, np.nan]), np.array([0.5, 0.5, 0.5, 0.5, 0.5])]
+    matrix = parm_metrix(column_space, ['mag', 'pwd'], verbose=False, dtype=np.float32)
+    assert matrix.dtype == np.float64 and np.isfinite(matrix[:4]).all()
+    assert np.array_equal(matrix, parm_metrix(column_space, ['mag', 'pwd'], verbose=False), equal_nan=True)
+    assert list(rank_order(ranking_mult(matrix, [1.0, 1.0], verbose=False))) == [0, 1, 3, 2, 4]
+    
+    # Without an overflow the float32 matrix stays float32
+    assert parm_metrix([np.array([12.0, 1e-3])], ['mag'], verbose=False, dtype=np.float32).dtype == np.float32
+# ------------------------------------------------------------- #
@@ -0,0 +1,26 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Sharded Ranking Tests
+#
+# Purpose: Check that a sharded run gives the same subject sets as ranking
+#          the single concatenated file
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import pytest
+from exorank.pipeline import rank_file
+from exorank.shards import rank_shards
+from .catalogs import user_options, user_types, user_scalings, subject_sets
+# ------------------------------------------------------------- #
+
+
+
+# Shard Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('top_k', [None, 700])
+def test_shards_match_single_file(tables, tmp_path, top_k):
+    single = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, top_k=top_k, table_cache=False)
+    sharded = rank_shards(str(tables / 'shards'), 'CSV', user_options, user_types, user_scalings, workers=2, top_k=top_k, table_cache=False)
+    assert subject_sets(sharded, tables, tmp_path / 'shards') == subject_sets(single, tables, tmp_path / 'single')
+# ------------------------------------------------------------- #
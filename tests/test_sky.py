@@ -0,0 +1,130 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Sky Index Tests
+#
+# Purpose: Check the sky index selections against a brute-force test of
+#          every row
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pytest
+from exorank.sky import check_region, region_mask, build_sky_index, region_rows, sky_cells, top_per_cell_rows
+# ------------------------------------------------------------- #
+
+
+# Test Settings
+# ------------------------------------------------------------- #
+# Regions around RA = 0/360, over and next to the poles, and plain ones
+test_regions = [
+    {'cone': [0.5, 10, 3]},
+    {'cone': [359.2, -20, 2.5]},
+    {'cone': [120, 88.5, 4]},
+    {'cone': [300, -87, 5]},
+    {'cone': [45, 80, 9.9]},
+    {'cone': [200, 0, 0.3]},
+    {'cone': [10, 30, 120]},
+    {'box': [350, 10, -5, 5]},
+    {'box': [-20, 15, 60, 90]},
+    {'box': [100, 140, -90, -70]},
+    {'box': [0, 360, -10, 10]},
+    {'box': [359.5, 0.5, -90, 90]},
+    {'box': [10, 10, -30, 30]},
+]
+# ------------------------------------------------------------- #
+
+
+
+# Reference Functions
+# ------------------------------------------------------------- #
+def sky_points(rng, n_rows):
+    # Uniform points on the sphere, a 2.5 degree grid that puts rows on cell edges, and points
+    # crowded loosely and tightly around every test region
+    ra = rng.uniform(0, 360, n_rows)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n_rows)))
+    grid_ra, grid_dec = np.meshgrid(np.arange(0, 360.1, 2.5), np.arange(-90, 90.1, 2.5))
+    ra, dec = np.concatenate([ra, grid_ra.ravel()]), np.concatenate([dec, grid_dec.ravel()])
+    for region in test_regions:
+        values = next(iter(region.values()))
+        center_ra, center_dec = (values[0], values[1]) if 'cone' in region else (values[0], (values[2] + values[3]) / 2)
+        for spread in (6, 0.3):
+            ra = np.concatenate([ra, (center_ra + rng.normal(0, spread, n_rows // 20)) % 360])
+            dec = np.concatenate([dec, np.clip(center_dec + rng.normal(0, spread, n_rows // 20), -90, 90)])
+    return ra, dec
+
+def unit_vectors(ra, dec):
+    ra, dec = np.radians(ra), np.radians(dec)
+    return np.stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)], axis=-1)
+
+def brute_force_rows(ra_list, dec_list, region):
+    # Every row tested on its own: angle between unit vectors for cones, and plain RA/DEC limits for boxes
+    region = check_region(region)
+    if 'cone' in region:
+        ra, dec, radius = region['cone']
+        cosines = unit_vectors(ra_list, dec_list) @ unit_vectors(ra, dec)
+        separation = np.degrees(np.arccos(np.clip(cosines, -1, 1)))
+        return np.flatnonzero(separation <= radius), np.flatnonzero(np.abs(separation - radius) < 1e-7)
+    ra_min, ra_max, dec_min, dec_max = region['box']
+    rows = []
+    for i, (ra, dec) in enumerate(zip(ra_list % 360, dec_list)):
+        if not dec_min <= dec <= dec_max:
+            continue
+        if ra_max == 360 or (ra_min <= ra <= ra_max if ra_min <= ra_max else (ra >= ra_min or ra <= ra_max)):
+            rows.append(i)
+    return np.array(rows, dtype=np.int64), np.empty(0, dtype=np.int64)
+# ------------------------------------------------------------- #
+
+
+
+# Region Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('cell_deg', [0.5, 1.0, 7.0])
+@pytest.mark.parametrize('region', test_regions, ids=lambda region: '_'.join(str(value) for value in next(iter(region.values()))))
+def test_region_rows_match_brute_force(region, cell_deg):
+    rng = np.random.default_rng(5)
+    ra_list, dec_list = sky_points(rng, 20000)
+    expected, on_edge = brute_force_rows(ra_list, dec_list, region)
+    index = build_sky_index(ra_list, dec_list, cell_deg)
+    
+    # The mask and the index query agree exactly; rows within rounding of a cone edge may go either way
+    mask_rows = np.flatnonzero(region_mask(ra_list, dec_list, check_region(region)))
+    rows = region_rows(index, ra_list, dec_list, check_region(region))
+    assert np.array_equal(rows, mask_rows)
+    assert np.array_equal(np.setdiff1d(rows, on_edge), np.setdiff1d(expected, on_edge))
+    assert len(expected) > 0
+
+def test_poles_and_missing_coordinates():
+    # Rows at the poles, on RA = 0 and 360, and without coordinates
+    ra_list = np.array([0.0, 360.0, 123.0, 250.0, np.nan, 10.0, 359.99])
+    dec_list = np.array([0.0, 0.0, 90.0, -90.0, 0.0, np.nan, 0.0])
+    index = build_sky_index(ra_list, dec_list, 1.0)
+    assert list(region_rows(index, ra_list, dec_list, check_region({'cone': [0, 90, 0.5]}))) == [2]
+    assert list(region_rows(index, ra_list, dec_list, check_region({'cone': [77, -89.8, 0.5]}))) == [3]
+    assert list(region_rows(index, ra_list, dec_list, check_region({'cone': [360, 0, 0.1]}))) == [0, 1, 6]
+    assert list(region_rows(index, ra_list, dec_list, check_region({'box': [359, 1, -1, 1]}))) == [0, 1, 6]
+    assert list(region_rows(index, ra_list, dec_list, check_region({'box': [0, 360, -90, 90]}))) == [0, 1, 2, 3, 6]
+    assert sky_cells(ra_list, dec_list, 1.0)[4] == sky_cells(ra_list, dec_list, 1.0)[5] == index['offsets'][-1]
+# ------------------------------------------------------------- #
+
+
+
+# Top Per Cell Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('n_per_cell', [1, 3, 50])
+def test_top_per_cell_rows_match_brute_force(n_per_cell):
+    rng = np.random.default_rng(n_per_cell)
+    ra_list, dec_list = sky_points(rng, 5000)
+    cells = sky_cells(ra_list, dec_list, 5.0)
+    
+    # Whole-number keys give many ties, and some rows have no rank
+    keys = -rng.integers(0, 4, len(cells)).astype(np.float64)
+    keys[rng.random(len(cells)) < 0.1] = np.nan
+    
+    expected = []
+    for cell in np.unique(cells):
+        members = np.flatnonzero(cells == cell)
+        best = sorted(members, key=lambda row: (np.isnan(keys[row]), 0 if np.isnan(keys[row]) else keys[row], row))
+        expected.extend(best[:n_per_cell])
+    assert np.array_equal(top_per_cell_rows(cells, keys, n_per_cell), np.sort(expected))
+# ------------------------------------------------------------- #
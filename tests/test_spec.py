@@ -0,0 +1,130 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Spec Tests
+#
+# Purpose: Check that bad ranking specs are rejected with a clear error, and
+#          that python -m exorank run writes the subject sets of a spec
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import sys
+import json
+import re
+import subprocess
+import numpy as np
+import pandas as pd
+import pytest
+import exorank
+from exorank.spec import load_spec, validate_spec
+from .catalogs import user_options, user_types, user_scalings
+# ------------------------------------------------------------- #
+
+
+# Test Settings
+# ------------------------------------------------------------- #
+# Each bad setting and the words its error must contain
+bad_settings = [
+    ({'file': ''}, "missing 'file'"),
+    ({'type': 'XLSX'}, 'type must be one of'),
+    ({'columns': []}, 'at least one entry in "columns"'),
+    ({'columns': ['pwd']}, 'must be a mapping'),
+    ({'columns': [{'type': 'pwd', 'scaling': 1}]}, 'must be a mapping with a "name"'),
+    ({'columns': [{'name': 'pwd', 'type': 'ruwe', 'scaling': 1}]}, "must have a type in"),
+    ({'columns': [{'name': 'pwd', 'type': 'pwd', 'scaling': 1.5}]}, 'scaling between 0 and 1'),
+    ({'columns': [{'name': 'pwd', 'type': 'pwd', 'scaling': 'high'}]}, "the scaling of column 'pwd' must be a number"),
+    ({'transforms': {'ruwe': {'units': ''}}}, 'needs an "expression" or a "function"'),
+    ({'transforms': ['ruwe']}, '"transforms" must map'),
+    ({'chunk_size': 0}, 'chunk size must be a positive integer'),
+    ({'chunk_size': 'many'}, "chunk_size must be an integer, not 'many'"),
+    ({'chunk_memory_mb': -1}, 'chunk memory must be a positive'),
+    ({'top_k': 0}, 'top_k must be a positive integer'),
+    ({'workers': 0}, 'workers must be a positive integer'),
+    ({'output_format': 'xlsx'}, 'output_format must be one of'),
+    ({'shard_workers': 0}, 'shard_workers must be a positive integer'),
+    ({'region': {'circle': [0, 0, 1]}}, 'A sky region must be'),
+    ({'region': {'cone': [0, 95, 1]}}, 'A cone needs'),
+    ({'region': {'box': [0, 10, 20, -20]}}, 'A box needs'),
+    ({'sky_cell_deg': 0}, 'sky_cell_deg must be between'),
+    ({'top_per_cell': 5, 'stream': True}, 'top_per_cell cannot be used with streaming'),
+    ({'precision': 'float16'}, 'precision must be one of'),
+    ({'cache_verify': 'sha1'}, 'cache_verify must be one of'),
+]
+# ------------------------------------------------------------- #
+
+
+
+# Test Helpers
+# ------------------------------------------------------------- #
+def good_spec(tables, output_dir):
+    return {
+        'file': str(tables / 'catalog.csv'),
+        'type': 'CSV',
+        'tp_file': str(tables / 'tp.csv'),
+        'tn_file': str(tables / 'tn.csv'),
+        'output': 'run',
+        'output_dir': str(output_dir),
+        'columns': [{'name': name, 'type': kind, 'scaling': scaling} for name, kind, scaling in zip(user_options, user_types, user_scalings)],
+        'chunk_size': 1000,
+        'true_positive_perc': 0.1,
+        'true_negative_perc': 0.1,
+        'table_cache': False,
+    }
+
+def run_command_line(*args, cwd):
+    # Run python -m exorank as a user would, with this checkout on the path
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(exorank.__file__)))
+    return subprocess.run([sys.executable, '-m', 'exorank'] + list(args), cwd=cwd, env=env, capture_output=True, text=True, timeout=300)
+# ------------------------------------------------------------- #
+
+
+
+# Spec Validation Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('settings, error', bad_settings, ids=[next(iter(settings)) for settings, _ in bad_settings])
+def test_bad_spec_is_rejected(tables, tmp_path, settings, error):
+    with pytest.raises(ValueError, match=re.escape(error)):
+        validate_spec(dict(good_spec(tables, tmp_path), **settings))
+
+def test_spec_must_be_a_mapping(tmp_path):
+    with open(tmp_path / 'spec.json', 'w') as spec_json:
+        json.dump([{'file': 'catalog.csv'}], spec_json)
+    with pytest.raises(ValueError, match='must be a mapping'):
+        load_spec(str(tmp_path / 'spec.json'))
+
+def test_good_spec_gets_the_defaults(tables, tmp_path):
+    spec = validate_spec(dict(good_spec(tables, tmp_path), chunk_size='500', resume=True))
+    assert spec['chunk_size'] == 500 and spec['checkpoint'] and spec['workers'] == 1 and spec['precision'] == 'float64'
+    assert [column['scaling'] for column in spec['columns']] == user_scalings
+# ------------------------------------------------------------- #
+
+
+
+# Command Line Tests
+# ------------------------------------------------------------- #
+def test_command_line_run_writes_the_subject_sets(tables, tmp_path):
+    with open(tmp_path / 'spec.json', 'w') as spec_json:
+        json.dump(good_spec(tables, 'sets'), spec_json)
+    result = run_command_line('run', 'spec.json', '--seed', '3', cwd=tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'ExoRANK Has Finished Running!' in result.stdout and 'Stage write' in result.stdout
+    
+    # The relative output folder is inside the working directory, with every subject set and the control manifest
+    names = sorted(os.listdir(tmp_path / 'sets'))
+    assert 'run_controls.json' in names
+    subject_sets = pd.concat([pd.read_csv(tmp_path / 'sets' / name) for name in names if name.startswith('run_subjectset_')])
+    ranked = subject_sets[subject_sets['#BITMASK'] == 1]
+    controls = subject_sets[subject_sets['#BITMASK'].isna()]
+    assert len(ranked) == 6000 and np.allclose(np.sort(ranked['RA']), np.sort(pd.read_csv(tables / 'catalog.csv')['RA']))
+    control_ra = np.concatenate([pd.read_csv(tables / 'tp.csv')['RA'], pd.read_csv(tables / 'tn.csv')['RA']])
+    assert len(controls) > 0 and all(np.isclose(control_ra, ra).any() for ra in controls['RA'])
+
+def test_command_line_reports_a_bad_spec(tables, tmp_path):
+    with open(tmp_path / 'spec.json', 'w') as spec_json:
+        json.dump(dict(good_spec(tables, 'sets'), chunk_size=0), spec_json)
+    result = run_command_line('run', 'spec.json', cwd=tmp_path)
+    assert result.returncode == 1
+    assert 'ExoRANK Failed: The chunk size must be a positive integer' in result.stdout
+    assert not os.path.exists(tmp_path / 'sets')
+# ------------------------------------------------------------- #
@@ -0,0 +1,80 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Streaming Tests
+#
+# Purpose: Check that a streamed run ranks exactly like an in-memory run,
+#          and that the memory limit covers the whole run
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+from exorank.pipeline import rank_file
+from exorank.stream import stream_rank, plan_tables, plan_target_ids
+from exorank.instrument import memory_limit, current_rss_mb, peak_rss_mb, stage, progress
+from .catalogs import user_options, user_types, user_scalings, subject_sets
+# ------------------------------------------------------------- #
+
+
+
+# Streaming Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('top_k', [None, 700])
+def test_stream_plan_matches_in_memory(tables, top_k):
+    # The plan's rows, gathered in several batches, are the in-memory ranked table in rank order
+    in_memory = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, top_k=top_k, table_cache=False)
+    in_memory = in_memory.sort_values(by='#Target ID', kind='stable').reset_index(drop=True)
+    ranked_plan, report = stream_rank(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, chunk_rows=777, top_k=top_k)
+    assert report['chunks'] == 8
+    ranges = [(start, min(start + 1000, len(in_memory))) for start in range(0, len(in_memory), 1000)]
+    streamed = pd.concat(list(plan_tables(ranked_plan, ranges, batch_rows=2500)), ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, in_memory)
+
+@pytest.mark.parametrize('top_k', [None, 700])
+@pytest.mark.parametrize('table_cache', [False, True])
+def test_stream_subject_sets_match_in_memory(tables, tmp_path, top_k, table_cache, monkeypatch):
+    # Subject sets written from a streamed plan are byte for byte those of the in-memory table
+    monkeypatch.setenv('EXORANK_CACHE_DIR', str(tmp_path / 'cache'))
+    in_memory = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, top_k=top_k, table_cache=False)
+    ranked_plan, _ = stream_rank(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, chunk_rows=777, top_k=top_k, table_cache=table_cache)
+    assert 'RA' not in ranked_plan and len(ranked_plan['rows']) == len(in_memory)
+    assert subject_sets(ranked_plan, tables, tmp_path / 'streamed') == subject_sets(in_memory, tables, tmp_path / 'in_memory')
+
+def test_stream_region_matches_in_memory(tables, tmp_path):
+    region = {'box': [300, 60, -30, 40]}
+    in_memory = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False, region=region)
+    ranked_plan, report = stream_rank(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, chunk_rows=500, region=region)
+    assert report['selected'] == len(in_memory) < report['rows']
+    assert subject_sets(ranked_plan, tables, tmp_path / 'streamed') == subject_sets(in_memory, tables, tmp_path / 'in_memory')
+
+@pytest.mark.parametrize('step', [1, 7, 64, 1000])
+def test_plan_target_ids_match_average_ranks(step):
+    # Runs of tied ranks that cross range boundaries get the average rank of the whole run
+    ranks = np.sort(np.random.default_rng(3).integers(0, 40, 1000).astype(np.float64))[::-1].copy()
+    ranks[-50:] = np.nan
+    ranked_plan = {'top_k': False, 'ranks': ranks}
+    target_ids = np.concatenate([plan_target_ids(ranked_plan, start, min(start + step, len(ranks))) for start in range(0, len(ranks), step)])
+    np.testing.assert_array_equal(target_ids, pd.Series(ranks).rank(ascending=False).to_numpy())
+
+def test_memory_limit_covers_export(tables, tmp_path):
+    ranked_table = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+    with pytest.raises(MemoryError):
+        with memory_limit(1):
+            subject_sets(ranked_table, tables, tmp_path / 'limited')
+
+@pytest.mark.skipif(current_rss_mb() is None, reason='current RSS is only read on Linux')
+def test_memory_limit_ignores_an_earlier_peak():
+    # A large allocation freed before the limit is entered does not count against it
+    ballast = np.ones(400 * 1024**2 // 8)
+    del ballast
+    limit = current_rss_mb() + 100
+    assert peak_rss_mb() > limit
+    with memory_limit(limit):
+        with stage('after'):
+            progress('after', 1, 1)
+    with pytest.raises(MemoryError):
+        with memory_limit(current_rss_mb() / 2):
+            progress('after', 1, 1)
+# ------------------------------------------------------------- #
@@ -0,0 +1,94 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Weight Sweep Tests
+#
+# Purpose: Check that every vector of a sweep gets exactly the top rows a
+#          normal ranking with its scalings would give
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pytest
+from exorank.ranking import parm_metrix, ranking_mult, rank_order
+from exorank.sweep import sweep_weights, weight_sweep, sweep_groups, sweep_top, pruned_sweep_top, rank_correlations, neighbour_vectors
+# ------------------------------------------------------------- #
+
+
+# Test Fixtures
+# ------------------------------------------------------------- #
+user_types = ['pwd', 'plx', 'pm', 'mag']
+
+def parameter_matrix(n_rows, seed=4):
+    # Transformed columns with missing values, invalid values and tied scores
+    rng = np.random.default_rng(seed)
+    column_space = [rng.uniform(0, 1, n_rows), rng.uniform(0, 50, n_rows), rng.uniform(0, 500, n_rows), rng.uniform(-5, 25, n_rows)]
+    for column in column_space:
+        column[rng.random(n_rows) < 0.05] = np.nan
+    column_space[1][rng.random(n_rows) < 0.01] = 0.0
+    column_space[0][:300] = 0.5
+    column_space[2][:300] = 100.0
+    return parm_metrix(column_space, user_types, verbose=False)
+# ------------------------------------------------------------- #
+
+
+
+# Sweep Tests
+# ------------------------------------------------------------- #
+@pytest.mark.parametrize('steps, samples', [(3, None), (None, 20), (None, 3 * sweep_groups)])
+@pytest.mark.parametrize('top_k', [1, 50])
+def test_sweep_top_rows_match_ranking(steps, samples, top_k):
+    # Small sweeps are scored directly, large ones through the pruned grouped search
+    matrix = parameter_matrix(20000)
+    weights = sweep_weights([1.0, 0.5, 0.25, 0.75], steps=steps, samples=samples, seed=2)
+    report = weight_sweep(matrix, weights, top_k)
+    for v in range(len(weights)):
+        expected = rank_order(ranking_mult(matrix, weights[v], verbose=False), top_k)
+        np.testing.assert_array_equal(report['top_rows'][:, v], expected)
+    assert report['overlap'][0] == 1.0
+
+def test_pruned_sweep_matches_direct_on_many_columns():
+    # Nine columns, so scores go through numpy's blocked summation and the group bounds have many terms
+    rng = np.random.default_rng(5)
+    matrix = rng.normal(size=(30000, 9)) * rng.uniform(0.1, 100, 9)
+    matrix[rng.random(matrix.shape) < 0.05] = np.nan
+    matrix[:200, :4] = 1.0
+    weights = sweep_weights(list(rng.uniform(0, 1, 9)), samples=3 * sweep_groups, seed=6)
+    for top_k in [1, 40]:
+        direct_rows, direct_scores = sweep_top(matrix, weights, top_k, show_progress=False)
+        pruned_rows, pruned_scores = pruned_sweep_top(matrix, weights, top_k)
+        np.testing.assert_array_equal(pruned_rows, direct_rows)
+        np.testing.assert_array_equal(pruned_scores, direct_scores)
+        np.testing.assert_array_equal(weight_sweep(matrix, weights, top_k)['top_rows'], direct_rows)
+
+def test_sweep_neighbour_correlations():
+    # Every vector is compared with its closest other direction, over its own top-k rows
+    matrix = parameter_matrix(5000)
+    weights = sweep_weights([1.0, 0.5, 0.25, 0.75], steps=3)
+    report = weight_sweep(matrix, weights, 30)
+    unit = weights / weights.sum(axis=1, keepdims=True)
+    for v in [0, 5, len(weights) - 1]:
+        neighbour = report['neighbour'][v]
+        assert not np.allclose(unit[neighbour], unit[v])
+        distances = ((unit - unit[v])**2).sum(axis=1)
+        assert np.isclose(distances[neighbour], distances[distances > 1e-12].min())
+        
+        # The same as correlating the two vectors' scores of the vector's own top rows
+        rows = report['top_rows'][:, v]
+        scores = np.nansum(matrix[rows][:, :, None] * weights[[v, neighbour]].T, axis=1)
+        spearman, kendall = rank_correlations(scores)
+        assert np.isclose(report['neighbour_spearman'][v], spearman[1])
+        assert np.isclose(report['neighbour_kendall'][v], kendall[1])
+
+def test_neighbour_of_single_direction_is_itself():
+    assert list(neighbour_vectors(np.array([[1.0, 2.0], [0.5, 1.0]]))) == [0, 1]
+
+def test_sweep_rejects_all_zero_reference():
+    with pytest.raises(ValueError):
+        sweep_weights([0.0, 0.0, 0.0, 0.0], samples=10)
+
+def test_sweep_rejects_empty_top_k():
+    weights = sweep_weights([1.0, 0.5, 0.25, 0.75], samples=5)
+    with pytest.raises(ValueError):
+        weight_sweep(parameter_matrix(100), weights, 0)
+# ------------------------------------------------------------- #
@@ -0,0 +1,132 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Table Cache Tests
+#
+# Purpose: Check when the on-disk table cache is read, refilled or dropped
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import exorank.pipeline
+from exorank.__main__ import main
+from exorank.pipeline import read_columns
+from exorank.tablecache import cache_entry_dir, read_meta, list_table_cache
+# ------------------------------------------------------------- #
+
+
+
+# Test Helpers
+# ------------------------------------------------------------- #
+@pytest.fixture
+def parses(tmp_path, monkeypatch):
+    # Keep the cache in the test folder and count every full parse of a table
+    monkeypatch.setenv('EXORANK_CACHE_DIR', str(tmp_path / 'cache'))
+    counted = []
+    read_table = exorank.pipeline.read_table
+    def counting_read_table(file, filetype):
+        counted.append(file)
+        return read_table(file, filetype)
+    monkeypatch.setattr(exorank.pipeline, 'read_table', counting_read_table)
+    return counted
+
+def write_catalog(path, n_rows, seed):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({'RA': rng.uniform(0, 360, n_rows), 'DEC': rng.uniform(-90, 90, n_rows), 'pwd': rng.uniform(0, 1, n_rows), 'plx': rng.uniform(0.1, 50, n_rows)}).to_csv(path, index=False, float_format='%.6f')
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+# ------------------------------------------------------------- #
+
+
+
+# Table Cache Tests
+# ------------------------------------------------------------- #
+def test_second_read_is_a_hit(tmp_path, parses):
+    path = str(tmp_path / 'catalog.csv')
+    write_catalog(path, 300, 1)
+    parsed = read_columns(path, 'CSV', ['RA', 'pwd'])
+    cached = read_columns(path, 'CSV', ['RA', 'pwd'])
+    assert len(parses) == 1
+    assert isinstance(cached['pwd'], np.memmap)
+    assert all(np.array_equal(parsed[column], cached[column]) for column in ('RA', 'pwd'))
+    assert np.array_equal(cached['pwd'], pd.read_csv(path)['pwd'].to_numpy())
+
+def test_changed_size_or_mtime_is_parsed_again(tmp_path, parses):
+    path = str(tmp_path / 'catalog.csv')
+    write_catalog(path, 300, 1)
+    read_columns(path, 'CSV', ['pwd'])
+    
+    # A touched file is parsed again in the default 'mtime' mode
+    set_mtime(path, os.stat(path).st_mtime_ns + 10**9)
+    read_columns(path, 'CSV', ['pwd'])
+    assert len(parses) == 2
+    
+    # So is a file with new content and a new size, even with the old mtime
+    mtime_ns = os.stat(path).st_mtime_ns
+    write_catalog(path, 400, 2)
+    set_mtime(path, mtime_ns)
+    values = read_columns(path, 'CSV', ['pwd'])['pwd']
+    assert len(parses) == 3 and len(values) == 400
+
+def test_hash_verify_checks_the_content(tmp_path, parses):
+    path = str(tmp_path / 'catalog.csv')
+    write_catalog(path, 300, 1)
+    read_columns(path, 'CSV', ['pwd'], cache_verify='hash')
+    
+    # New content of the same size and mtime is only caught by the hash
+    mtime_ns = os.stat(path).st_mtime_ns
+    lines = open(path).read().splitlines(True)
+    lines[1], lines[2] = lines[2], lines[1]
+    with open(path, 'w') as catalog:
+        catalog.write(''.join(lines))
+    set_mtime(path, mtime_ns)
+    swapped = pd.read_csv(path)['pwd'].to_numpy()
+    assert not np.array_equal(read_columns(path, 'CSV', ['pwd'])['pwd'], swapped)
+    assert len(parses) == 1
+    assert np.array_equal(read_columns(path, 'CSV', ['pwd'], cache_verify='hash')['pwd'], swapped)
+    assert len(parses) == 2
+    
+    # A touched but unchanged file is still a hit
+    set_mtime(path, mtime_ns + 10**9)
+    read_columns(path, 'CSV', ['pwd'], cache_verify='hash')
+    assert len(parses) == 2
+
+def test_new_columns_are_added_to_the_entry(tmp_path, parses):
+    path = str(tmp_path / 'catalog.csv')
+    write_catalog(path, 300, 1)
+    read_columns(path, 'CSV', ['RA', 'pwd'])
+    read_columns(path, 'CSV', ['pwd', 'plx'])
+    meta = read_meta(cache_entry_dir(path))
+    assert list(meta['columns']) == ['RA', 'pwd', 'plx']
+    assert meta['columns']['pwd']['file'] == 'column_1.bin' and meta['columns']['plx']['file'] == 'column_2.bin'
+    
+    # All three columns are now read without parsing the table
+    cached = read_columns(path, 'CSV', ['RA', 'pwd', 'plx'])
+    assert len(parses) == 2
+    assert all(np.array_equal(cached[column], pd.read_csv(path)[column].to_numpy()) for column in ('RA', 'pwd', 'plx'))
+
+def test_cache_list_and_clear(tmp_path, parses, capsys):
+    paths = [str(tmp_path / f'catalog_{i}.csv') for i in range(3)]
+    for i, path in enumerate(paths):
+        write_catalog(path, 100 + i, i)
+        read_columns(path, 'CSV', ['pwd'])
+    set_mtime(paths[0], os.stat(paths[0]).st_mtime_ns + 10**9)
+    
+    # The list shows every entry and which source files changed since
+    assert main(['cache', 'list']) == 0
+    listed = capsys.readouterr().out
+    assert '(3 tables)' in listed and listed.count('stale') == 1 and listed.count('current') == 2
+    assert {entry['source']: entry['rows'] for entry in list_table_cache()} == {os.path.abspath(path): 100 + i for i, path in enumerate(paths)}
+    
+    # Clearing one source file leaves the others
+    assert main(['cache', 'clear', paths[1]]) == 0
+    assert 'Removed 1 cached tables' in capsys.readouterr().out
+    assert sorted(entry['source'] for entry in list_table_cache()) == sorted(os.path.abspath(path) for path in (paths[0], paths[2]))
+    assert main(['cache', 'clear']) == 0
+    assert 'Removed 2 cached tables' in capsys.readouterr().out
+    assert list_table_cache() == [] and not os.path.exists(tmp_path / 'cache')
+# ------------------------------------------------------------- #
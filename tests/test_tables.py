@@ -0,0 +1,103 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Table Reading Tests
+#
+# Purpose: Check the memory-mapped FITS read path and that every table of a
+#          run is read from its own file
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import os
+import gc
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from astropy.table import Table
+from exorank.pipeline import run
+from exorank.tables import read_fits_columns, read_table, native_column
+from .catalogs import user_options, user_types, user_scalings, subject_set_files
+# ------------------------------------------------------------- #
+
+
+
+# Test Helpers
+# ------------------------------------------------------------- #
+def write_fits(frame, path):
+    Table.from_pandas(frame).write(path, format='fits')
+    return str(path)
+
+def open_files():
+    # Paths of the files this process has open
+    return sorted(os.readlink(os.path.join('/proc/self/fd', fd)) for fd in os.listdir('/proc/self/fd') if os.path.exists(os.path.join('/proc/self/fd', fd)))
+
+def table_spec(file, tp_file, tn_file, filetype, output_dir):
+    return {
+        'file': str(file),
+        'type': filetype,
+        'tp_file': str(tp_file),
+        'tn_file': str(tn_file),
+        'output': 'run',
+        'output_dir': str(output_dir),
+        'columns': [{'name': name, 'type': kind, 'scaling': scaling} for name, kind, scaling in zip(user_options, user_types, user_scalings)],
+        'chunk_size': 500,
+        'true_positive_perc': 0.1,
+        'true_negative_perc': 0.1,
+        'table_cache': False,
+    }
+# ------------------------------------------------------------- #
+
+
+
+# FITS Tests
+# ------------------------------------------------------------- #
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc to list open files')
+def test_fits_columns_are_mapped_and_the_file_closed(tables, tmp_path):
+    catalog = pd.read_csv(tables / 'catalog.csv')
+    path = write_fits(catalog, tmp_path / 'catalog.fits')
+    
+    # The columns are big-endian views of the file; only the memory map keeps it open, not the HDU list
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ResourceWarning)
+        columns = read_fits_columns(path, ['pwd', 'RA', 'pwd'])
+        assert list(columns) == ['pwd', 'RA']
+        assert not columns['pwd'].dtype.isnative
+        assert open_files().count(path) <= 1
+        assert np.array_equal(native_column(columns['pwd']), catalog['pwd'].to_numpy(), equal_nan=True)
+        assert native_column(columns['RA']).dtype.isnative
+        
+        # So is a whole table, and a missing column is named
+        table = read_table(path, 'FITS')
+        assert np.array_equal(native_column(table['plx']), catalog['plx'].to_numpy(), equal_nan=True)
+        with pytest.raises(KeyError, match='teff'):
+            read_fits_columns(path, ['RA', 'teff'])
+        
+        # Once the columns are dropped the file is closed, and no handle was left for the garbage collector
+        del columns, table
+        gc.collect()
+    assert path not in open_files()
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_fits_run_reads_each_control_table_from_its_path(tables, tmp_path, stream):
+    # The control tables sit in their own folder under names unrelated to the catalog
+    os.makedirs(tmp_path / 'controls')
+    catalog = write_fits(pd.read_csv(tables / 'catalog.csv'), tmp_path / 'catalog.fits')
+    tp_file = write_fits(pd.read_csv(tables / 'tp.csv'), tmp_path / 'controls' / 'known_planets.fits')
+    tn_file = write_fits(pd.read_csv(tables / 'tn.csv'), tmp_path / 'controls' / 'rejected.fits')
+    
+    # The FITS run writes the same subject sets as the CSV run of the same tables
+    run(dict(table_spec(catalog, tp_file, tn_file, 'FITS', tmp_path / 'fits_out'), stream=stream))
+    run(table_spec(tables / 'catalog.csv', tables / 'tp.csv', tables / 'tn.csv', 'CSV', tmp_path / 'csv_out'))
+    fits_sets = subject_set_files(tmp_path / 'fits_out')
+    assert len(fits_sets) > 5 and fits_sets == subject_set_files(tmp_path / 'csv_out')
+    
+    # The control rows (no #BITMASK) of the sets come from both control tables, and only from them
+    subject_sets = pd.concat([pd.read_csv(tmp_path / 'fits_out' / name) for name in fits_sets])
+    control_ra = subject_sets.loc[subject_sets['#BITMASK'].isna(), 'RA'].to_numpy()
+    tp_ra, tn_ra = pd.read_csv(tables / 'tp.csv')['RA'].to_numpy(), pd.read_csv(tables / 'tn.csv')['RA'].to_numpy()
+    from_tp = np.array([np.isclose(tp_ra, ra).any() for ra in control_ra])
+    from_tn = np.array([np.isclose(tn_ra, ra).any() for ra in control_ra])
+    assert len(control_ra) > 0 and (from_tp | from_tn).all() and from_tp.any() and from_tn.any()
+# ------------------------------------------------------------- #
@@ -0,0 +1,36 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Top-K Tests
+#
+# Purpose: Check that a top-k run keeps exactly the best rows of a full run
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+from exorank.pipeline import rank_file
+from exorank.ranking import rank_order, top_rows
+from .catalogs import user_options, user_types, user_scalings
+# ------------------------------------------------------------- #
+
+
+
+# Top-K Tests
+# ------------------------------------------------------------- #
+def test_top_rows_keep_ties_in_table_order():
+    ranked_list = np.array([1.0, 3.0, np.nan, 3.0, 2.0, 3.0, np.nan])
+    assert top_rows(ranked_list, 2).tolist() == [1, 3]
+    assert rank_order(ranked_list).tolist() == [1, 3, 5, 4, 0, 2, 6]
+    assert rank_order(ranked_list, 4).tolist() == rank_order(ranked_list)[:4].tolist()
+
+@pytest.mark.parametrize('top_k', [1, 150, 5990, 6000, 10000])
+def test_top_k_run_is_head_of_full_run(tables, top_k):
+    # The full run is sorted by its average ranks, so ties keep their table order in both
+    full = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, table_cache=False)
+    full = full.sort_values(by='#Target ID', kind='stable').reset_index(drop=True)
+    best = rank_file(str(tables / 'catalog.csv'), 'CSV', user_options, user_types, user_scalings, top_k=top_k, table_cache=False)
+    assert best['#Target ID'].tolist() == list(range(1, min(top_k, len(full)) + 1))
+    pd.testing.assert_frame_equal(best.drop(columns='#Target ID').reset_index(drop=True), full.drop(columns='#Target ID').head(top_k))
+# ------------------------------------------------------------- #
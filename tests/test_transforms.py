@@ -0,0 +1,99 @@
+#-----------------------------------------------------------------------#
+# ExoRANK Transform Tests
+#
+# Purpose: Check the invalid value policies, and that spec transforms only
+#          exist for the run that declares them
+#-----------------------------------------------------------------------#
+
+
+# Import all needed packages.
+# ------------------------------------------------------------- #
+import numpy as np
+import pytest
+from exorank.pipeline import run
+from exorank.transforms import apply_transform, register_spec_transforms, restore_transforms, spec_transforms, transform_registry
+from .catalogs import user_options, user_types, user_scalings
+# ------------------------------------------------------------- #
+
+
+
+# Invalid Value Tests
+# ------------------------------------------------------------- #
+def test_invalid_values_follow_the_type_policy():
+    # pwd scores out-of-range probabilities at the nearest of 0 and 1, the others use NaN
+    values, n_invalid = apply_transform([0.5, 1.0000001, -0.1, np.nan, np.inf], 'pwd')
+    assert n_invalid == 3
+    assert values[0] == np.exp(0.5*7.5) - 500 and values[1] == np.exp(7.5) - 500 and values[2] == -499.0
+    assert np.isnan(values[3:]).all()
+    values, n_invalid = apply_transform([0.0, -1.0, 4.0, np.inf], 'plx')
+    assert n_invalid == 3 and np.isnan(values[[0, 1, 3]]).all()
+
+def test_rounded_probability_keeps_the_best_score():
+    # A probability that rounding pushed just over 1 ranks with the other 1s, not last
+    values = apply_transform([1.0, 1.0000001, 0.99, 0.0], 'pwd')[0]
+    assert values[0] == values[1] == values.max()
+
+def test_negative_magnitudes_are_scored():
+    # Bright targets keep the original 10000/x score; only a magnitude of 0 has none
+    values, n_invalid = apply_transform([-1.5, 12.0, 0.0, np.nan], 'mag')
+    assert n_invalid == 1
+    assert values[0] == 10000/-1.5 and values[1] == 10000/12.0 and np.isnan(values[2:]).all()
+
+def test_spec_transform_policies():
+    replaced = register_spec_transforms({
+        'test_fill': {'expression': 'np.log10(x)', 'low': 0, 'low_inclusive': False, 'invalid': 0},
+        'test_clip': {'expression': 'np.sqrt(x)', 'low': 1, 'high': 4, 'invalid': 'clip'},
+    })
+    try:
+        values, n_invalid = apply_transform([100.0, -3.0, 0.0], 'test_fill')
+        assert n_invalid == 2 and list(values) == [2.0, 0.0, 0.0]
+        values, n_invalid = apply_transform([9.0, 0.25, 2.25], 'test_clip')
+        assert n_invalid == 2 and list(values) == [2.0, 1.0, 1.5]
+    finally:
+        restore_transforms(replaced)
+    with pytest.raises(ValueError):
+        register_spec_transforms({'test_fill': {'expression': 'x', 'invalid': 'zero'}})
+    with pytest.raises(ValueError):
+        register_spec_transforms({'test_clip': {'expression': 'x', 'invalid': 'clip'}})
+    assert 'test_fill' not in transform_registry and 'test_clip' not in transform_registry
+# ------------------------------------------------------------- #
+
+
+
+# Spec Transform Scope Tests
+# ------------------------------------------------------------- #
+def test_spec_cannot_silently_replace_a_built_in():
+    pwd = transform_registry['pwd']
+    with pytest.raises(ValueError, match='overwrite'):
+        register_spec_transforms({'test_new': {'expression': 'x'}, 'pwd': {'expression': 'x'}})
+    assert transform_registry['pwd'] is pwd and 'test_new' not in transform_registry
+    
+    # Asked for explicitly, the override holds until the scope ends
+    with spec_transforms({'pwd': {'expression': '2 * x', 'overwrite': True}}):
+        assert list(apply_transform([0.25], 'pwd')[0]) == [0.5]
+    assert transform_registry['pwd'] is pwd
+
+def test_run_scopes_its_spec_transforms(tables, tmp_path):
+    pwd = transform_registry['pwd']
+    spec = {
+        'file': str(tables / 'catalog.csv'),
+        'type': 'CSV',
+        'tp_file': str(tables / 'tp.csv'),
+        'tn_file': str(tables / 'tn.csv'),
+        'output': 'run',
+        'output_dir': str(tmp_path / 'out'),
+        'columns': [{'name': name, 'type': kind, 'scaling': scaling} for name, kind, scaling in zip(user_options, user_types, user_scalings)] + [{'name': 'plx', 'type': 'test_log', 'scaling': 0.5}],
+        'transforms': {'test_log': {'expression': 'np.log10(x)', 'low': 0, 'low_inclusive': False}, 'pwd': {'expression': '10 * x', 'overwrite': True}},
+        'table_cache': False,
+    }
+    ranked_table = run(spec)
+    assert 'test_log' not in transform_registry and transform_registry['pwd'] is pwd
+    
+    # The run scored pwd with the override (at most 10) rather than the built-in (up to exp(7.5) - 500)
+    assert np.nanmax(ranked_table['#RANK']) < 500
+    
+    # A failed run puts the registry back as well
+    with pytest.raises(OSError):
+        run(dict(spec, file=str(tmp_path / 'missing.csv')))
+    assert 'test_log' not in transform_registry and transform_registry['pwd'] is pwd
+# ------------------------------------------------------------- #